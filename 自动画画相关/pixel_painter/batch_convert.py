@@ -0,0 +1,187 @@
+"""
+批量转换 - 把一个目录下的图片并行转换为像素画 JSON（或 .pxg 二进制格式）
+
+每张图片由进程池中的一个进程完成解码、缩放、配色（可选抖动）并写出文件，
+主进程只收集每张图的摘要（尺寸、颜色数、需要点击的格子数、耗时），按完成顺序显示进度。
+
+用法:
+    python batch_convert.py ../壁纸                           # 输出到 ../壁纸/pixel_json/
+    python batch_convert.py ../壁纸 -o ../转换数据 --width 150
+    python batch_convert.py ../壁纸 --dither floyd_steinberg --perceptual -j 4
+    python batch_convert.py a.jpg b.png --compact             # 不缩进，文件小很多
+    python batch_convert.py ../壁纸 --format pxg              # 二进制格式，几 KB，加载不用解析
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from color_mapper import ColorMapper
+from dither import DITHER_METHODS
+from image_ingest import BACKGROUND_COLOR, RESAMPLE_METHODS, is_image_file, load_image
+from pixel_format import PIXEL_EXTENSION, save_pixel_file
+from pixel_json import save_pixel_json
+
+# 每个工作进程自己的 ColorMapper（在进程初始化时创建）
+_worker_mapper = None
+
+
+def _init_worker(match_mode):
+    global _worker_mapper
+    _worker_mapper = ColorMapper(match_mode)
+
+
+def convert_one(source, output_path, options):
+    """转换一张图片（在工作进程中运行），返回摘要字典"""
+    start = time.perf_counter()
+    json_data = load_image(source, width=options["width"], height=options["height"],
+                           resample=options["resample"], color_mapper=_worker_mapper,
+                           dither=options["dither"], serpentine=options["serpentine"],
+                           background_error_cap=options["background_error_cap"])
+    if options["format"] == "pxg":
+        save_pixel_file(json_data, output_path)
+    else:
+        save_pixel_json(json_data, output_path, options["compact"])
+
+    counts = json_data["color_counts"]
+    return {
+        "source": source,
+        "output": output_path,
+        "size": f"{json_data['width']}x{json_data['height']}",
+        "colors": len(counts),
+        "clicks": sum(count for color, count in counts.items() if color != BACKGROUND_COLOR),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def collect_images(inputs):
+    """展开输入的目录和文件，返回图片路径列表"""
+    images = []
+    for path in inputs:
+        if os.path.isdir(path):
+            images.extend(sorted(p for p in glob.glob(os.path.join(path, "*")) if is_image_file(p)))
+        elif is_image_file(path):
+            images.append(path)
+        else:
+            print(f"跳过（不是图片）: {path}", file=sys.stderr)
+    return images
+
+
+def output_names(images, extension):
+    """每张图片的输出文件名
+
+    文件名相同、扩展名不同的图片（a.png 和 a.jpg）保留原扩展名（a_png.json、a_jpg.json），
+    这样仍然重名的（不同目录下的同名文件）跳过并警告，不会互相覆盖。
+
+    Returns:
+        ([(图片路径, 输出文件名), ...], [跳过的图片路径, ...])
+    """
+    extensions = {}
+    for source in images:
+        stem, source_extension = os.path.splitext(os.path.basename(source))
+        extensions.setdefault(stem.lower(), set()).add(source_extension.lower())
+
+    named = []
+    skipped = []
+    used = set()
+    for source in images:
+        stem, source_extension = os.path.splitext(os.path.basename(source))
+        if len(extensions[stem.lower()]) > 1:
+            stem = f"{stem}_{source_extension.lstrip('.').lower()}"
+        name = stem + extension
+        if name.lower() in used:
+            skipped.append(source)
+            continue
+        used.add(name.lower())
+        named.append((source, name))
+    return named, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量把图片转换为像素画 JSON")
+    parser.add_argument("inputs", nargs="+", help="图片文件或目录")
+    parser.add_argument("-o", "--output", help="输出目录（默认为第一个输入目录下的 pixel_json/）")
+    parser.add_argument("--width", type=int, default=150, help="画板宽度（格子数）")
+    parser.add_argument("--height", type=int, help="画板高度（默认按原图比例）")
+    parser.add_argument("--resample", choices=list(RESAMPLE_METHODS), default="box", help="缩放方式")
+    parser.add_argument("--dither", choices=list(DITHER_METHODS), help="抖动方法（默认不抖动）")
+    parser.add_argument("--serpentine", action="store_true", help="误差扩散时蛇形扫描（串行处理，比默认慢约 10 倍）")
+    parser.add_argument("--cap-background", action="store_true", help="背景色像素不向外扩散误差")
+    parser.add_argument("--perceptual", action="store_true", help="感知配色（ΔE2000）")
+    parser.add_argument("--format", choices=["json", "pxg"], default="json", help="输出格式")
+    parser.add_argument("--compact", action="store_true", help="输出不缩进的 JSON")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    args = parser.parse_args()
+
+    images = collect_images(args.inputs)
+    if not images:
+        print("没有找到图片", file=sys.stderr)
+        return 1
+
+    output_dir = args.output
+    if not output_dir:
+        base = args.inputs[0] if os.path.isdir(args.inputs[0]) else os.path.dirname(args.inputs[0])
+        output_dir = os.path.join(base, "pixel_json")
+    os.makedirs(output_dir, exist_ok=True)
+
+    match_mode = "perceptual" if args.perceptual else "rgb"
+    if args.perceptual:
+        ColorMapper(match_mode).lut  # 先在主进程构建好查找表，工作进程直接读磁盘缓存
+
+    options = {
+        "width": args.width,
+        "height": args.height,
+        "resample": args.resample,
+        "dither": args.dither,
+        "serpentine": args.serpentine,
+        "background_error_cap": 0 if args.cap_background else None,
+        "compact": args.compact,
+        "format": args.format
+    }
+
+    extension = PIXEL_EXTENSION if args.format == "pxg" else ".json"
+    named, skipped = output_names(images, extension)
+    for source in skipped:
+        print(f"⚠️ 跳过 {source}: 输出文件名与前面的图片重复", file=sys.stderr)
+    renamed = [name for source, name in named
+               if os.path.splitext(name)[0] != os.path.splitext(os.path.basename(source))[0]]
+    if renamed:
+        print(f"⚠️ {len(renamed)} 张图片与其他图片同名，输出文件名保留原扩展名（如 {renamed[0]}）",
+              file=sys.stderr)
+    images = [source for source, _ in named]
+
+    jobs = max(1, min(args.jobs, len(images)))
+    print(f"转换 {len(images)} 张图片 → {output_dir}（{jobs} 个进程）", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(match_mode,)) as pool:
+        futures = {}
+        for source, name in named:
+            futures[pool.submit(convert_one, source, os.path.join(output_dir, name), options)] = source
+
+        for done, future in enumerate(as_completed(futures), 1):
+            source = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(images)}] ❌ {os.path.basename(source)}: {e}", file=sys.stderr)
+                continue
+            results.append(result)
+            print(f"[{done}/{len(images)}] ✓ {os.path.basename(source)}: {result['size']}, "
+                  f"{result['colors']} 色, {result['clicks']} 次点击, {result['seconds'] * 1000:.0f}ms",
+                  file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    total_clicks = sum(result["clicks"] for result in results)
+    print(f"\n完成 {len(results)} 张（失败 {failed}），共 {total_clicks} 次点击，耗时 {elapsed:.2f}s",
+          file=sys.stderr)
+    return 1 if failed or skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
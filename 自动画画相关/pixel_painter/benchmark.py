@@ -0,0 +1,271 @@
+"""
+绘制引擎基准测试 - 用模拟输入后端跑 PixelPainter 的计划和执行流程
+
+数据集：转换数据/ 和 壁纸/ 下的所有像素画 JSON，以及合成的 300×300、1000×1000 图片。
+每个用例报告计划耗时、点击数、分类翻页次数、光标移动距离、模拟绘制时长和内存峰值，
+结果输出为 JSON，可以用 --compare 与旧版本的结果对比。
+autotune 模式模拟比起始点击速率慢的机器，检查自动调速能把图画对。
+有用例画错格子时退出码为 1。
+
+用法:
+    python benchmark.py                          # 全部用例，结果打印到屏幕
+    python benchmark.py -o bench.json            # 保存结果
+    python benchmark.py --compare old.json       # 与旧结果对比
+    python benchmark.py --synthetic-only --modes click
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from painter import DISMISS_POINT, PixelPainter
+from color_mapper import ColorMapper
+from sim_input import BACKGROUND_COLOR, SimulatedInput, VirtualCanvas
+from canvas_verify import diff_grids
+from pixel_grid import pixel_grid_of
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRS = [os.path.join(BASE_DIR, "..", "转换数据"), os.path.join(BASE_DIR, "..", "壁纸")]
+SYNTHETIC_SIZES = [300, 1000]
+
+# 绘制模式 → paint_from_json 参数
+MODES = {
+    "click": {},
+    "stroke": {"stroke_mode": True, "stroke_direction": "auto"},
+    "autotune": {"autotune": True},
+}
+
+# 自动调速用例：从 AUTOTUNE_START_PERIOD 的点击周期开始，而游戏两次事件至少要间隔
+# AUTOTUNE_MIN_EVENT_INTERVAL（模拟比设定速率慢的机器），调速后必须全部画对
+AUTOTUNE_START_PERIOD = 0.004
+AUTOTUNE_MIN_EVENT_INTERVAL = 0.015
+
+# 对比时关注的指标（越小越好）
+COMPARE_METRICS = ["plan_seconds", "wall_seconds", "clicks", "events", "category_switches",
+                   "cursor_travel_px", "simulated_seconds", "peak_memory_mb"]
+
+
+def load_corpus():
+    """加载数据目录下的所有像素画 JSON（跳过调色板等其他 JSON）"""
+    images = []
+    for data_dir in DATA_DIRS:
+        for path in sorted(glob.glob(os.path.join(data_dir, "*.json"))):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"跳过 {path}: {e}", file=sys.stderr)
+                continue
+            if isinstance(data, dict) and "pixels" in data and data.get("width") and data.get("height"):
+                name = f"{os.path.basename(os.path.normpath(data_dir))}/{os.path.basename(path)}"
+                images.append((name, data))
+    return images
+
+
+def synthetic_image(size, color_mapper, seed=0):
+    """生成确定性的合成像素画
+
+    低分辨率随机色块放大（模拟成片的同色区域）+ 3% 的随机噪点，约 1/4 为背景色
+    """
+    rng = np.random.default_rng(seed)
+    colors = [color for palette in color_mapper.color_palette.values() for color in palette]
+    colors = np.array(colors + [BACKGROUND_COLOR] * (len(colors) // 3))
+
+    block = max(1, size // 30)
+    coarse = rng.integers(0, len(colors), size=(size // block + 1, size // block + 1))
+    grid = np.repeat(np.repeat(coarse, block, axis=0), block, axis=1)[:size, :size]
+    noise = rng.random((size, size)) < 0.03
+    grid[noise] = rng.integers(0, len(colors), size=int(noise.sum()))
+
+    return {"width": size, "height": size, "pixels": colors[grid].tolist()}
+
+
+def make_painter(width, height, journal_file, press_duration, click_interval, latency, drop_rate):
+    """创建连接到虚拟画板的 PixelPainter
+
+    画板每格至少 3 像素，按钮和色块放在画板右侧。整个布局放在翻页前点击的空白处
+    （DISMISS_POINT）下方，那一下不会落在画板上画出多余的格子
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        painter = PixelPainter()
+    side = max(582, 3 * max(width, height))
+    top = DISMISS_POINT[1] + 100
+    painter.grid_start = (100, top)
+    painter.grid_end = (100 + side, top + side)
+    panel = 100 + side + 100
+    painter.color_left_btn = (panel, top)
+    painter.color_right_btn = (panel + 100, top)
+    painter.color_positions = [(panel + 100 * (i % 2), top + 100 + 70 * (i // 2)) for i in range(10)]
+    painter.calibration_window_rect = None
+    painter.journal.journal_file = journal_file
+    painter.plan_cache = None  # 每次都重新编译，测的是计划本身的耗时
+
+    canvas = VirtualCanvas(painter, width, height)
+    sim = SimulatedInput(canvas, latency=latency, drop_rate=drop_rate)
+    sim.press_duration = press_duration
+    sim.click_interval = click_interval
+    painter.input = sim
+    return painter, canvas, sim
+
+
+def run_case(name, json_data, mode, args, measure_memory):
+    """运行一个用例，返回结果字典"""
+    width, height = json_data["width"], json_data["height"]
+    journal_file = os.path.join(tempfile.gettempdir(), "benchmark_journal.log")
+    painter, canvas, sim = make_painter(width, height, journal_file, args.press_duration,
+                                        args.click_interval, args.latency, args.drop_rate)
+    options = dict(MODES[mode], route_method=args.route or None)
+    tuning_file = os.path.join(tempfile.gettempdir(), "benchmark_tuning.json")
+    if options.get("autotune"):
+        sim.min_event_interval = AUTOTUNE_MIN_EVENT_INTERVAL
+        painter.click_tuner.tuning_file = tuning_file
+        painter.click_tuner.period = AUTOTUNE_START_PERIOD
+        painter.click_tuner.apply(sim)
+
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        painter.paint_from_json(json_data, **options)
+    end = time.perf_counter()
+    peak = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    mismatched = int(diff_grids(canvas.to_grid(), pixel_grid_of(json_data), painter.color_mapper).sum())
+    first_event = sim.first_event_time or end
+    stats = sim.stats()
+    result = {
+        "image": name,
+        "size": f"{width}x{height}",
+        "mode": mode,
+        "plan_seconds": round(first_event - start, 4),
+        "wall_seconds": round(end - start, 4),
+        "clicks": stats["clicks"],
+        "drags": stats["drags"],
+        "events": stats["events"],
+        "cells_painted": stats["cells_painted"],
+        "category_switches": stats["category_switches"],
+        "color_selections": stats["color_selections"],
+        "cursor_travel_px": stats["cursor_travel_px"],
+        "simulated_seconds": stats["simulated_seconds"],
+        "mismatched_cells": mismatched
+    }
+    if peak is not None:
+        result["peak_memory_mb"] = round(peak / 1024 / 1024, 2)
+
+    for path in (journal_file, tuning_file):
+        if os.path.exists(path):
+            os.remove(path)
+    return result
+
+
+def git_revision():
+    """当前 git 提交（不在仓库中时返回 None）"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_file):
+    """打印与旧结果的对比（按 image + mode 匹配用例）"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    old_cases = {(case["image"], case["mode"]): case for case in baseline.get("results", [])}
+
+    print(f"\n与 {baseline_file} ({baseline.get('git_revision')}) 对比:", file=sys.stderr)
+    for case in results:
+        old = old_cases.get((case["image"], case["mode"]))
+        if not old:
+            continue
+        changes = []
+        for metric in COMPARE_METRICS:
+            if metric in case and old.get(metric):
+                ratio = case[metric] / old[metric]
+                if abs(ratio - 1) >= 0.05:
+                    changes.append(f"{metric} {old[metric]} → {case[metric]} ({ratio - 1:+.0%})")
+        status = "; ".join(changes) if changes else "无明显变化"
+        print(f"  {case['image']} [{case['mode']}]: {status}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="绘制引擎基准测试（模拟输入）")
+    parser.add_argument("-o", "--output", help="结果保存路径（默认打印到屏幕）")
+    parser.add_argument("--compare", help="与旧的结果文件对比")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES),
+                        help="绘制模式")
+    parser.add_argument("--route", default="hilbert",
+                        help="路径优化方法（serpentine / nn_2opt / hilbert，空字符串表示不优化）")
+    parser.add_argument("--synthetic-only", action="store_true", help="只跑合成图片")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="不测内存峰值（tracemalloc 会拖慢计划和执行，内存单独再跑一遍）")
+    parser.add_argument("--press-duration", type=float, default=0.01, help="按下时长（秒）")
+    parser.add_argument("--click-interval", type=float, default=0.01, help="点击间隔（秒）")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟每个事件的延迟（秒）")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="模拟事件漏掉的概率")
+    args = parser.parse_args()
+
+    color_mapper = ColorMapper()
+    images = [] if args.synthetic_only else load_corpus()
+    images += [(f"synthetic/{size}x{size}", synthetic_image(size, color_mapper)) for size in SYNTHETIC_SIZES]
+
+    results = []
+    for name, json_data in images:
+        for mode in args.modes:
+            result = run_case(name, json_data, mode, args, measure_memory=False)
+            if not args.no_memory:
+                result["peak_memory_mb"] = run_case(name, json_data, mode, args,
+                                                    measure_memory=True)["peak_memory_mb"]
+            results.append(result)
+            print(f"{name} [{mode}]: 计划 {result['plan_seconds']:.2f}s, 点击 {result['clicks']}, "
+                  f"翻页 {result['category_switches']}, 模拟 {result['simulated_seconds']:.0f}s",
+                  file=sys.stderr)
+
+    report = {
+        "git_revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "settings": {
+            "route": args.route,
+            "press_duration": args.press_duration,
+            "click_interval": args.click_interval,
+            "latency": args.latency,
+            "drop_rate": args.drop_rate
+        },
+        "results": results
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"结果已保存: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    failed = [result for result in results if result["mismatched_cells"]]
+    for result in failed:
+        print(f"❌ {result['image']} [{result['mode']}]: {result['mismatched_cells']} 个格子画错",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
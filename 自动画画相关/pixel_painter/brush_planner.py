@@ -0,0 +1,167 @@
+"""
+多尺寸笔刷规划 - 用 k×k 笔刷一次盖住一块同色区域，减少大片平涂时的点击次数
+
+游戏提供更大的笔刷时，一次点击可以画 2×2、3×3 个格子。这里把每个颜色的格子分解为笔刷"印章"：
+    1. 对该颜色的格子做 k×k 腐蚀（按行、按列各 k-1 次移位求与），全是该颜色的窗口才可以落笔
+       （不会盖到别的颜色）
+    2. 按行扫描找第一个还没盖住的格子，在包含它的合法窗口中取最靠右下的一个落笔
+       （上方和左侧已经盖住，尽量往右下延伸），对矩形色块就是整齐的平铺，边缘处与前一笔重叠
+    3. 从大到小依次处理各尺寸，剩下的格子用 1×1 点击
+某个尺寸省下的点击数不足以抵消来回换笔刷的点击时，跳过这个尺寸。
+
+笔刷以点击的格子为锚点，覆盖左上角为 (row - (k-1)//2, col - (k-1)//2) 的 k×k 区域
+（奇数尺寸居中，偶数尺寸锚点在中心偏左上）。
+"""
+import numpy as np
+
+# 默认使用的笔刷尺寸（1×1 总是可用）
+DEFAULT_BRUSH_SIZES = (3, 2)
+
+# 换一次笔刷（换过去再换回来）大约多花的点击数
+BRUSH_SWITCH_COST = 2
+
+
+def normalize_brush_sizes(sizes):
+    """可用的大笔刷尺寸（去重、只保留大于 1 的、从大到小），没有时为 None"""
+    return sorted({int(size) for size in sizes or () if size > 1}, reverse=True) or None
+
+
+def brush_origin(size):
+    """锚点到笔刷覆盖区域左上角的距离"""
+    return (size - 1) // 2
+
+
+def _window_reduce(mask, size, reduce):
+    """对每个 size×size 窗口做逻辑归约（先按行再按列，各 size-1 次移位），返回 (H-size+1, W-size+1)"""
+    height, width = mask.shape
+    if height < size or width < size:
+        return np.zeros((max(0, height - size + 1), max(0, width - size + 1)), dtype=bool)
+    rows = mask[:height - size + 1].copy()
+    for shift in range(1, size):
+        reduce(rows, mask[shift:height - size + 1 + shift], out=rows)
+    result = rows[:, :width - size + 1].copy()
+    for shift in range(1, size):
+        reduce(result, rows[:, shift:width - size + 1 + shift], out=result)
+    return result
+
+
+def window_all(mask, size):
+    """每个 size×size 窗口是否全为 True（窗口左上角坐标），窗口放不下时为空"""
+    return _window_reduce(np.asarray(mask, dtype=bool), size, np.logical_and)
+
+
+def window_any(mask, size):
+    """每个 size×size 窗口是否有 True（窗口左上角坐标），窗口放不下时为空"""
+    return _window_reduce(np.asarray(mask, dtype=bool), size, np.logical_or)
+
+
+def _cover(allowed, todo, size):
+    """用 size×size 的窗口贪心覆盖 todo 中能被覆盖的格子
+
+    Args:
+        allowed: 可以落笔的格子（该颜色的格子）
+        todo: 还需要画的格子
+
+    Returns:
+        ((M, 2) 窗口左上角, 被覆盖的格子 bool 数组)
+    """
+    height, width = allowed.shape
+    valid = window_all(allowed, size)
+    covered = np.zeros((height, width), dtype=bool)
+    if not valid.any():
+        return np.zeros((0, 2), dtype=np.int32), covered
+
+    # 能被某个合法窗口覆盖的格子：把合法窗口向右下膨胀 size-1
+    padded = np.zeros((height + size - 1, width + size - 1), dtype=bool)
+    padded[size - 1:size - 1 + valid.shape[0], size - 1:size - 1 + valid.shape[1]] = valid
+    coverable = window_any(padded, size)
+
+    valid_width = valid.shape[1]
+    valid_flat = valid.reshape(-1).tobytes()
+    marks = bytearray(height * width)
+    fill = b"\x01" * size
+    tops = []
+    lefts = []
+    for cell in np.flatnonzero(todo & coverable).tolist():
+        if marks[cell]:
+            continue
+        row, col = divmod(cell, width)
+        found = False
+        for top in range(min(row, height - size), max(-1, row - size), -1):
+            base = top * valid_width
+            for left in range(min(col, width - size), max(-1, col - size), -1):
+                if valid_flat[base + left]:
+                    found = True
+                    break
+            if found:
+                break
+        for r in range(top, top + size):
+            marks[r * width + left:r * width + left + size] = fill
+        tops.append(top)
+        lefts.append(left)
+
+    covered = np.frombuffer(bytes(marks), dtype=bool).reshape(height, width)
+    return np.stack([tops, lefts], axis=1).astype(np.int32), covered
+
+
+def plan_stamps(cells, sizes=DEFAULT_BRUSH_SIZES, switch_cost=BRUSH_SWITCH_COST):
+    """把一个颜色要画的格子分解为笔刷印章
+
+    只在这些格子上落笔，不会盖到别的颜色或不需要画的格子。
+
+    Args:
+        cells: (N, 2) 格子 (row, col)
+        sizes: 可用的笔刷尺寸（大于 1 的部分有效，1×1 总是可用）
+        switch_cost: 换笔刷的代价（点击数），某尺寸省下的点击不超过它时不用该尺寸
+
+    Returns:
+        (M, 3) 印章 (anchor_row, anchor_col, size)，按尺寸从大到小分组，组内按行扫描顺序
+    """
+    cells = np.asarray(cells, dtype=np.int32).reshape(-1, 2)
+    if len(cells) == 0:
+        return np.zeros((0, 3), dtype=np.int32)
+
+    # 只在该颜色的包围盒内计算
+    origin = cells.min(axis=0)
+    local = cells - origin
+    height, width = local.max(axis=0) + 1
+    allowed = np.zeros((height, width), dtype=bool)
+    allowed[local[:, 0], local[:, 1]] = True
+    todo = allowed.copy()
+
+    stamps = []
+    for size in sorted({int(s) for s in sizes if s > 1}, reverse=True):
+        corners, covered = _cover(allowed, todo, size)
+        newly = int((covered & todo).sum())
+        if newly - len(corners) <= switch_cost:
+            continue
+        todo &= ~covered
+        anchors = corners + brush_origin(size) + origin
+        stamps.append(np.column_stack([anchors, np.full(len(anchors), size, dtype=np.int32)]))
+
+    rest = np.argwhere(todo).astype(np.int32) + origin
+    stamps.append(np.column_stack([rest, np.ones(len(rest), dtype=np.int32)]))
+    return np.concatenate(stamps).astype(np.int32)
+
+
+def expand_stamps(stamps):
+    """把印章 (M, 3) 展开为覆盖的格子，每个印章的锚点排在第一个
+
+    Returns:
+        ((N, 2) 格子数组, (M,) 每个印章的格子数)
+    """
+    stamps = np.asarray(stamps, dtype=np.int64).reshape(-1, 3)
+    lengths = stamps[:, 2] ** 2
+    stamp_of_cell = np.repeat(np.arange(len(stamps)), lengths)
+    first_cell = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    step = np.arange(int(lengths.sum())) - first_cell[stamp_of_cell]
+
+    # 第 0 个为锚点，其余按行扫描顺序（跳过锚点所在的位置）
+    sizes = stamps[stamp_of_cell, 2]
+    origin = (sizes - 1) // 2
+    anchor_step = origin * sizes + origin
+    position = np.where(step == 0, anchor_step, np.where(step <= anchor_step, step - 1, step))
+    cells = np.empty((len(step), 2), dtype=np.int64)
+    cells[:, 0] = stamps[stamp_of_cell, 0] - origin + position // sizes
+    cells[:, 1] = stamps[stamp_of_cell, 1] - origin + position % sizes
+    return cells, lengths
@@ -0,0 +1,54 @@
+"""
+画板截图模块 - 截取屏幕上的画板区域并采样格子中心颜色
+"""
+import numpy as np
+from PIL import ImageGrab
+
+
+def grab_region(left, top, right, bottom):
+    """截取屏幕矩形区域（屏幕坐标，右下不含），返回 (H, W, 3) 的 uint8 数组"""
+    image = ImageGrab.grab(bbox=(left, top, right, bottom), all_screens=True)
+    return np.asarray(image.convert("RGB"))
+
+
+def sample_cells(coord_table, rows, cols, radius=1, grab=grab_region):
+    """截图并采样若干格子的颜色
+
+    只截取覆盖这些格子的最小矩形；每个格子取中心 (2r+1)×(2r+1) 邻域的平均值，
+    减少格子边线和抗锯齿的干扰。格子太小时缩小邻域（中心坐标取整后离格子边缘可能不到 1 像素），
+    不把相邻格子的颜色平均进来。
+
+    Args:
+        coord_table: CanvasCoordTable
+        rows, cols: 格子行列（原图坐标）
+        radius: 采样邻域半径（像素）
+        grab: 截图函数 (left, top, right, bottom) -> (H, W, 3) 数组，默认截取真实屏幕
+
+    Returns:
+        (N, 3) float32 RGB 数组
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if rows.size == 0:
+        return np.zeros((0, 3), dtype=np.float32)
+
+    (left, top), (right, bottom) = coord_table.grid_start, coord_table.grid_end
+    cell_size = min((right - left) / coord_table.width, (bottom - top) / coord_table.height)
+    radius = max(0, min(radius, int((cell_size - 2) // 2)))
+
+    xs, ys = coord_table.lookup(rows, cols)
+    left = int(xs.min()) - radius
+    top = int(ys.min()) - radius
+    right = int(xs.max()) + radius + 1
+    bottom = int(ys.max()) + radius + 1
+
+    image = grab(left, top, right, bottom).astype(np.float32)
+    local_x = xs - left
+    local_y = ys - top
+
+    total = np.zeros((rows.size, 3), dtype=np.float32)
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            total += image[local_y + dy, local_x + dx]
+
+    return total / (2 * radius + 1) ** 2
@@ -0,0 +1,49 @@
+"""
+画板校验模块 - 对比画板当前状态与目标像素画，找出需要重画的格子
+
+画板当前状态可以来自截图，也可以来自上一次绘制的像素画 JSON
+"""
+import numpy as np
+
+from canvas_capture import grab_region, sample_cells
+
+
+def find_mismatches(coord_table, grid, color_mapper, grab=grab_region):
+    """截图并找出与目标不一致的格子
+
+    Args:
+        coord_table: CanvasCoordTable（整张图的坐标表）
+        grid: 要检查的 PixelGrid（区域校验时为区域视图，带有在原图中的偏移）
+        color_mapper: ColorMapper
+        grab: 截图函数，默认截取真实屏幕
+
+    Returns:
+        (height, width) bool 数组，True 表示该格子没有画对
+    """
+    expected = color_mapper.grid_entries(grid)
+    height, width = expected.shape
+
+    rows, cols = np.indices((height, width))
+    rgb = sample_cells(coord_table, rows.ravel() + grid.row_offset, cols.ravel() + grid.col_offset, grab=grab)
+    actual = color_mapper.nearest_entries(rgb).reshape(height, width)
+
+    return actual != expected
+
+
+def diff_grids(previous_grid, grid, color_mapper):
+    """对比上一次绘制的像素画与目标，找出需要重画的格子
+
+    两边颜色映射到同一个色块时视为相同（画出来一样，不用重画）
+
+    Args:
+        previous_grid: 上一次绘制的 PixelGrid（与 grid 同尺寸）
+        grid: 目标 PixelGrid
+        color_mapper: ColorMapper
+
+    Returns:
+        (height, width) bool 数组，True 表示该格子需要重画
+    """
+    if previous_grid.indices.shape != grid.indices.shape:
+        raise ValueError(f"图片尺寸不一致: {previous_grid.width}×{previous_grid.height} 和 "
+                         f"{grid.width}×{grid.height}")
+    return color_mapper.grid_entries(previous_grid) != color_mapper.grid_entries(grid)
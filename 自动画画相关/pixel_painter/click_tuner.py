@@ -0,0 +1,108 @@
+"""
+点击速率自动调节模块 - 根据截图检测到的漏点率调整点击间隔（AIMD）
+"""
+import json
+import os
+import platform
+
+
+class ClickRateTuner:
+    """闭环点击速率调节
+
+    每绘制 sample_every 个像素，截图抽查最近绘制的 sample_size 个格子：
+    - 漏点率不超过 target_drop_rate：点击周期减少 additive_step（加性提速）
+    - 漏点率超标：点击周期乘以 backoff_factor（乘性降速）
+    这样速率会停在游戏能接受的上限附近。调好的参数按机器名保存，下次启动直接使用。
+
+    抽查的格子几乎都不对（不少于 selection_miss_rate）时多半是选色的点击被漏掉，整批画成了
+    上一个颜色，这时先重新选色、重画再抽查一次，不把它当成漏点率。
+    """
+
+    def __init__(self, tuning_file="painter_tuning.json"):
+        self.tuning_file = tuning_file
+        self.machine = platform.node() or "default"
+
+        # 一次点击的总周期 = 按下时长 + 点击间隔（各占一半）
+        self.period = 0.02
+        self.min_period = 0.004
+        self.max_period = 0.2
+        self.additive_step = 0.002
+        self.backoff_factor = 2.0
+        self.target_drop_rate = 0.01
+
+        # 抽查设置
+        self.sample_every = 200   # 每绘制多少个像素抽查一次
+        self.sample_size = 20     # 每次抽查的格子数
+        self.settle_time = 0.15   # 截图前等待游戏刷新画面（秒）
+        self.color_tolerance = 48 # 截图颜色与目标色的最大 RGB 距离
+        self.selection_miss_rate = 0.8  # 抽查中不对的比例达到这个值时，先怀疑选色被漏掉
+        self.max_retries = 8      # 每次抽查后最多重画几次（降速后重画，直到抽查通过）
+
+        self.clicks_since_sample = 0
+        self.loaded = self.load()
+
+    def apply(self, input_device):
+        """把当前周期写入输入设备的按下时长和点击间隔"""
+        input_device.press_duration = self.period / 2
+        input_device.click_interval = self.period / 2
+
+    def record_clicks(self, count):
+        """记录已绘制的像素数，返回是否到了抽查时机"""
+        self.clicks_since_sample += count
+        if self.clicks_since_sample < self.sample_every:
+            return False
+        self.clicks_since_sample = 0
+        return True
+
+    def update(self, sampled, dropped):
+        """根据一次抽查结果调整点击周期
+
+        Args:
+            sampled: 抽查的格子数
+            dropped: 其中没有画上的格子数
+
+        Returns:
+            本次漏点率
+        """
+        if sampled <= 0:
+            return 0.0
+
+        drop_rate = dropped / sampled
+        if drop_rate > self.target_drop_rate:
+            self.period = min(self.max_period, self.period * self.backoff_factor)
+        else:
+            self.period = max(self.min_period, self.period - self.additive_step)
+        return drop_rate
+
+    @property
+    def clicks_per_second(self):
+        return 1.0 / self.period if self.period > 0 else float("inf")
+
+    def load(self):
+        """加载本机保存的调节结果"""
+        if not os.path.exists(self.tuning_file):
+            return False
+        try:
+            with open(self.tuning_file, 'r', encoding='utf-8') as f:
+                tuning = json.load(f).get(self.machine)
+            if not tuning:
+                return False
+            self.period = min(self.max_period, max(self.min_period, tuning["period"]))
+            return True
+        except Exception as e:
+            print(f"加载点击速率配置失败: {e}")
+            return False
+
+    def save(self):
+        """保存本机的调节结果（保留其他机器的记录）"""
+        data = {}
+        if os.path.exists(self.tuning_file):
+            try:
+                with open(self.tuning_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception:
+                data = {}
+
+        data[self.machine] = {"period": round(self.period, 4)}
+        with open(self.tuning_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
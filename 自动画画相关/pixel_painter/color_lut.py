@@ -0,0 +1,173 @@
+"""
+感知配色查找表 - 用 CIELAB / ΔE2000 选最近色，预先算好 RGB → 调色板条目的查找立方体
+
+RGB 欧氏距离对 2~13 分类里的灰调颜色经常选错，ΔE2000 更接近人眼，但逐像素计算太慢。
+这里把 RGB 空间量化为 (2^bits)³ 个小格，每格取中心点按 ΔE2000 选出最近的调色板条目，
+结果存成 uint8 的 .npy 文件（按调色板内容哈希命名），之后用内存映射打开，查询只是一次数组下标：
+
+    lut = ColorLUT.for_palette(color_mapper.palette_rgb)
+    entries = lut.lookup(rgb)      # (N, 3) → (N,)
+
+bits=6（64³，256 KB，首次构建几秒）是默认值；bits=8 为完整 24 位（16 MB，构建需要几分钟）。
+"""
+import hashlib
+import os
+
+import numpy as np
+
+# 查找表格式或算法变化时加一，使旧缓存失效
+LUT_VERSION = 1
+
+# 默认每个通道的量化位数
+DEFAULT_BITS = 6
+
+# 构建时每次计算的小格数
+BUILD_CHUNK = 32768
+
+
+def rgb_to_lab(rgb):
+    """sRGB（0~255）转 CIELAB（D65 白点），输入 (..., 3)，输出同形状的 float64 数组"""
+    rgb = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+
+    matrix = np.array([[0.4124564, 0.3575761, 0.1804375],
+                       [0.2126729, 0.7151522, 0.0721750],
+                       [0.0193339, 0.1191920, 0.9503041]])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+
+    epsilon, kappa = 216 / 24389, 24389 / 27
+    f = np.where(xyz > epsilon, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def delta_e2000(lab1, lab2):
+    """CIEDE2000 色差，lab1 和 lab2 可广播，返回广播后形状的数组"""
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    C1 = np.hypot(a1, b1)
+    C2 = np.hypot(a2, b2)
+    C_mean7 = ((C1 + C2) / 2) ** 7
+    G = 0.5 * (1 - np.sqrt(C_mean7 / (C_mean7 + 25.0 ** 7)))
+
+    a1p = (1 + G) * a1
+    a2p = (1 + G) * a2
+    C1p = np.hypot(a1p, b1)
+    C2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, dhp)
+    dhp = np.where(dhp < -180, dhp + 360, dhp)
+    chroma_zero = (C1p * C2p) == 0
+    dhp = np.where(chroma_zero, 0, dhp)
+    dHp = 2 * np.sqrt(C1p * C2p) * np.sin(np.radians(dhp) / 2)
+
+    Lp_mean = (L1 + L2) / 2
+    Cp_mean = (C1p + C2p) / 2
+    hp_sum = h1p + h2p
+    hp_mean = np.where(np.abs(h1p - h2p) > 180,
+                       np.where(hp_sum < 360, hp_sum + 360, hp_sum - 360), hp_sum) / 2
+    hp_mean = np.where(chroma_zero, hp_sum, hp_mean)
+
+    T = (1 - 0.17 * np.cos(np.radians(hp_mean - 30)) + 0.24 * np.cos(np.radians(2 * hp_mean))
+         + 0.32 * np.cos(np.radians(3 * hp_mean + 6)) - 0.20 * np.cos(np.radians(4 * hp_mean - 63)))
+    d_theta = 30 * np.exp(-(((hp_mean - 275) / 25) ** 2))
+    Cp_mean7 = Cp_mean ** 7
+    R_C = 2 * np.sqrt(Cp_mean7 / (Cp_mean7 + 25.0 ** 7))
+    L_term = (Lp_mean - 50) ** 2
+    S_L = 1 + 0.015 * L_term / np.sqrt(20 + L_term)
+    S_C = 1 + 0.045 * Cp_mean
+    S_H = 1 + 0.015 * Cp_mean * T
+    R_T = -np.sin(np.radians(2 * d_theta)) * R_C
+
+    dL = dLp / S_L
+    dC = dCp / S_C
+    dH = dHp / S_H
+    return np.sqrt(dL ** 2 + dC ** 2 + dH ** 2 + R_T * dC * dH)
+
+
+def nearest_by_delta_e(rgb, palette_rgb):
+    """按 ΔE2000 逐个计算最近的调色板条目 (N,)（构建查找表用，慢）"""
+    lab = rgb_to_lab(np.asarray(rgb).reshape(-1, 3))
+    palette_lab = rgb_to_lab(palette_rgb)
+    result = np.empty(len(lab), dtype=np.int64)
+    for start in range(0, len(lab), BUILD_CHUNK):
+        chunk = lab[start:start + BUILD_CHUNK]
+        distance = delta_e2000(chunk[:, None, :], palette_lab[None, :, :])
+        result[start:start + BUILD_CHUNK] = distance.argmin(axis=1)
+    return result
+
+
+def palette_digest(palette_rgb, bits):
+    """查找表缓存文件名用的哈希（调色板内容 + 量化位数 + 版本）"""
+    digest = hashlib.sha1(f"v{LUT_VERSION}-{bits}".encode())
+    digest.update(np.ascontiguousarray(palette_rgb, dtype=np.uint8).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class ColorLUT:
+    """RGB → 调色板条目的查找立方体"""
+
+    def __init__(self, table, bits):
+        """
+        Args:
+            table: (2^bits)³ 的 uint8 数组（可以是内存映射），下标为 (r >> shift, g >> shift, b >> shift)
+            bits: 每个通道的量化位数
+        """
+        self.table = table
+        self.bits = bits
+        self.shift = 8 - bits
+
+    @classmethod
+    def build(cls, palette_rgb, bits=DEFAULT_BITS):
+        """计算查找表：每个小格取中心点按 ΔE2000 选最近的条目"""
+        if not 1 <= bits <= 8:
+            raise ValueError(f"量化位数必须在 1~8 之间: {bits}")
+        if len(palette_rgb) > 256:
+            raise ValueError("调色板超过 256 色，无法存为 uint8 查找表")
+
+        levels = 1 << bits
+        step = 256 / levels
+        centers = np.arange(levels) * step + (step - 1) / 2
+        r, g, b = np.meshgrid(centers, centers, centers, indexing="ij")
+        rgb = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+        entries = nearest_by_delta_e(rgb, np.asarray(palette_rgb, dtype=np.float64))
+        return cls(entries.astype(np.uint8).reshape(levels, levels, levels), bits)
+
+    @classmethod
+    def for_palette(cls, palette_rgb, bits=DEFAULT_BITS, cache_dir="color_lut"):
+        """读取磁盘上的查找表（内存映射），没有时构建并保存"""
+        path = os.path.join(cache_dir, f"lut_{palette_digest(palette_rgb, bits)}.npy")
+        if os.path.exists(path):
+            try:
+                return cls(np.load(path, mmap_mode="r"), bits)
+            except Exception as e:
+                print(f"读取配色查找表失败，重新构建: {e}")
+
+        print(f"正在构建感知配色查找表（{1 << bits}³，只在第一次使用时构建）...")
+        lut = cls.build(palette_rgb, bits)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                np.save(f, lut.table)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"保存配色查找表失败: {e}")
+        return lut
+
+    def lookup(self, rgb):
+        """查表：(..., 3) RGB → 同形状（去掉最后一维）的条目下标"""
+        rgb = np.asarray(rgb)
+        q = np.clip(np.rint(rgb), 0, 255).astype(np.intp) >> self.shift
+        return self.table[q[..., 0], q[..., 1], q[..., 2]]
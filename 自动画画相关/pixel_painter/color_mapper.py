@@ -1,9 +1,23 @@
 """
 颜色映射模块 - 管理颜色分类和索引
 """
+from functools import lru_cache
+
+import numpy as np
+
+from color_lut import ColorLUT
+
+# 最近色计算分块大小（每块生成 N×126 的距离矩阵，块小一些能留在缓存里）
+NEAREST_CHUNK = 4096
+
+# 单个颜色最近色查询的缓存条数
+CLOSEST_CACHE_SIZE = 4096
+
+# 最近色匹配方式："rgb" RGB 欧氏距离 / "perceptual" ΔE2000 查找表
+MATCH_MODES = ("rgb", "perceptual")
 
 class ColorMapper:
-    def __init__(self):
+    def __init__(self, match_mode="rgb"):
         # 13个分类的颜色数据
         self.color_palette = {
             1: ["#051616", "#414545", "#808282", "#BEBFBF", "#FEFFFF", "#F9F6E9"],
@@ -41,6 +55,49 @@ class ColorMapper:
                     "category": category,
                     "index": index
                 }
+        
+        # 调色板矩阵：所有色块按分类、索引展开，下标称为"条目"
+        self.palette_positions = [(category, index) for category, colors in self.color_palette.items()
+                                  for index in range(len(colors))]
+        self.palette_colors = [color.upper() for colors in self.color_palette.values() for color in colors]
+        self.palette_rgb = np.array([self.hex_to_rgb(color) for color in self.palette_colors], 
+                                    dtype=np.float32)
+        self._palette_norms = (self.palette_rgb ** 2).sum(axis=1)
+        self.palette_categories = np.array([category for category, _ in self.palette_positions], 
+                                           dtype=np.int32)
+        self.palette_indices = np.array([index for _, index in self.palette_positions], dtype=np.int32)
+        self.entry_of_color = {color: entry for entry, color in enumerate(self.palette_colors)}
+        
+        self._palette_values = np.sort(self._pack(self.palette_rgb))
+        self._palette_value_entries = np.argsort(self._pack(self.palette_rgb), kind="stable")
+        
+        # 单个颜色的最近色查询结果缓存（有界，避免无限增长）
+        self._closest_entry = lru_cache(maxsize=CLOSEST_CACHE_SIZE)(self._find_closest_entry)
+        
+        self.match_mode = "rgb"
+        self._lut = None  # 感知配色查找表，第一次用到时加载
+        self.set_match_mode(match_mode)
+    
+    def set_match_mode(self, match_mode):
+        """切换最近色匹配方式 "rgb" / "perceptual"（清空单色缓存）"""
+        if match_mode not in MATCH_MODES:
+            raise ValueError(f"未知的配色方式: {match_mode}")
+        if match_mode != self.match_mode:
+            self.match_mode = match_mode
+            self._closest_entry.cache_clear()
+    
+    @property
+    def lut(self):
+        """ΔE2000 查找表（磁盘缓存，第一次构建需要几秒）"""
+        if self._lut is None:
+            self._lut = ColorLUT.for_palette(self.palette_rgb)
+        return self._lut
+    
+    @staticmethod
+    def _pack(rgb):
+        """(..., 3) RGB → 24 位整数"""
+        rgb = np.clip(np.rint(np.asarray(rgb, dtype=np.float64)), 0, 255).astype(np.int64)
+        return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
     
     def get_color_position(self, hex_color):
         """
@@ -56,21 +113,78 @@ class ColorMapper:
     
     def find_closest_color(self, hex_color):
         """
-        找到最接近的颜色（基于RGB欧几里得距离）
+        找到最接近的颜色（基于RGB欧几里得距离，结果有缓存）
         """
-        target_rgb = self.hex_to_rgb(hex_color)
-        min_distance = float('inf')
-        closest_position = None
+        entry = self._closest_entry(hex_color.upper())
+        return self.color_to_position[self.palette_colors[entry]]
+    
+    def _find_closest_entry(self, hex_color):
+        return int(self.nearest_entries([self.hex_to_rgb(hex_color)])[0])
+    
+    def nearest_entries(self, rgb):
+        """批量最近色：返回每个 RGB 颜色最接近的调色板条目下标 (N,)
+        
+        Args:
+            rgb: (N, 3) 或 (..., 3) 的 RGB 数组
+        """
+        if self.match_mode == "perceptual":
+            return self._perceptual_entries(rgb)
         
-        for color, position in self.color_to_position.items():
-            color_rgb = self.hex_to_rgb(color)
-            distance = sum((a - b) ** 2 for a, b in zip(target_rgb, color_rgb)) ** 0.5
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_position = position
+        rgb = np.asarray(rgb, dtype=np.float32).reshape(-1, 3)
+        result = np.empty(len(rgb), dtype=np.int64)
+        for start in range(0, len(rgb), NEAREST_CHUNK):
+            chunk = rgb[start:start + NEAREST_CHUNK]
+            # |x - p|² = |x|² - 2x·p + |p|²，|x|² 对每行相同，不影响 argmin；
+            # 分量都是整数，float32 下结果精确，平局时与逐个比较一样取靠前的条目
+            distance = self._palette_norms - 2 * (chunk @ self.palette_rgb.T)
+            result[start:start + NEAREST_CHUNK] = distance.argmin(axis=1)
+        return result
+    
+    def _perceptual_entries(self, rgb):
+        """感知配色：查 ΔE2000 表；与色块完全相同的颜色直接取该色块（不受量化影响）"""
+        rgb = np.asarray(rgb).reshape(-1, 3)
+        result = self.lut.lookup(rgb).astype(np.int64)
+        
+        values = self._pack(rgb)
+        slot = np.searchsorted(self._palette_values, values).clip(max=len(self._palette_values) - 1)
+        exact = self._palette_values[slot] == values
+        result[exact] = self._palette_value_entries[slot[exact]]
+        return result
+    
+    def map_rgb(self, rgb):
+        """批量把 RGB 颜色映射到调色板位置
         
-        return closest_position
+        Args:
+            rgb: (..., 3) 的 RGB 数组
+        
+        Returns:
+            (categories, indices) 两个与输入同形状（去掉最后一维）的数组
+        """
+        rgb = np.asarray(rgb)
+        entries = self.nearest_entries(rgb).reshape(rgb.shape[:-1])
+        return self.palette_categories[entries], self.palette_indices[entries]
+    
+    def color_entries(self, hex_colors):
+        """一组十六进制颜色对应的调色板条目下标 (N,)，不在调色板中的按最近色换算"""
+        entries = np.empty(len(hex_colors), dtype=np.int64)
+        missing = []
+        for i, color in enumerate(hex_colors):
+            entry = self.entry_of_color.get(color.upper())
+            if entry is None:
+                missing.append(i)
+            else:
+                entries[i] = entry
+        if missing:
+            rgb = [self.hex_to_rgb(hex_colors[i]) for i in missing]
+            entries[missing] = self.nearest_entries(rgb)
+        return entries
+    
+    def grid_entries(self, grid):
+        """PixelGrid 每个格子应选中的调色板条目下标 (height, width)
+        
+        只换算网格调色板中的几十种颜色，再按索引数组查表
+        """
+        return self.color_entries(grid.palette)[grid.indices]
     
     @staticmethod
     def hex_to_rgb(hex_color):
@@ -0,0 +1,79 @@
+"""
+坐标查找表模块 - 画板格子 (row, col) 到屏幕坐标 (x, y) 的预计算映射
+"""
+import numpy as np
+
+
+class CanvasCoordTable:
+    """画板格子中心的屏幕坐标表
+
+    画板是轴对齐的矩形，所以 x 只取决于列、y 只取决于行，
+    分别存成一维数组即可，查表就是两次数组索引。
+    """
+
+    def __init__(self, grid_start, grid_end, width, height, offset=(0, 0)):
+        """
+        Args:
+            grid_start: 画板左上角屏幕坐标（校准时的位置）
+            grid_end: 画板右下角屏幕坐标（校准时的位置）
+            width: 图片宽度（列数）
+            height: 图片高度（行数）
+            offset: 窗口相对校准时的位移 (dx, dy)
+        """
+        left, top = grid_start
+        right, bottom = grid_end
+
+        self.grid_start = tuple(grid_start)
+        self.grid_end = tuple(grid_end)
+        self.width = width
+        self.height = height
+
+        # 每个格子中心的坐标（未加窗口位移）
+        cell_width = (right - left) / width
+        cell_height = (bottom - top) / height
+        self.base_xs = np.floor(left + (np.arange(width) + 0.5) * cell_width).astype(np.int32)
+        self.base_ys = np.floor(top + (np.arange(height) + 0.5) * cell_height).astype(np.int32)
+
+        self.offset = None
+        self.set_offset(*offset)
+
+    def matches(self, grid_start, grid_end, width, height):
+        """校准数据和图片尺寸是否与本表一致"""
+        return (tuple(grid_start) == self.grid_start and tuple(grid_end) == self.grid_end
+                and width == self.width and height == self.height)
+
+    def set_offset(self, dx, dy):
+        """窗口移动后平移整张表（只需两次向量加法）"""
+        if self.offset == (dx, dy):
+            return
+        self.offset = (dx, dy)
+        self.xs = self.base_xs + dx
+        self.ys = self.base_ys + dy
+
+    def point(self, row, col):
+        """单个格子的屏幕坐标"""
+        return int(self.xs[col]), int(self.ys[row])
+
+    def lookup(self, rows, cols):
+        """批量查表，返回 (xs, ys) 两个数组"""
+        return self.xs[cols], self.ys[rows]
+
+    def points(self, positions, row_offset=0, col_offset=0):
+        """把 [(row, col), ...] 转为 [(x, y), ...]
+
+        Args:
+            positions: 格子列表
+            row_offset, col_offset: 区域绘制时裁剪区域在原图中的起点
+        """
+        if not len(positions):
+            return []
+        cells = np.asarray(positions, dtype=np.int64)
+        xs, ys = self.lookup(cells[:, 0] + row_offset, cells[:, 1] + col_offset)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def as_array(self):
+        """完整的 (height, width, 2) 坐标表"""
+        table = np.empty((self.height, self.width, 2), dtype=np.int32)
+        table[:, :, 0] = self.xs[None, :]
+        table[:, :, 1] = self.ys[:, None]
+        return table
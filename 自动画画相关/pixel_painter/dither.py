@@ -0,0 +1,218 @@
+"""
+抖动模块 - 把照片映射到游戏调色板时用抖动代替直接取最近色，减少只有 126 色时的色带
+
+支持三种方法：
+    floyd_steinberg  误差扩散（右 7/16，左下 3/16，下 5/16，右下 1/16）
+    atkinson         误差扩散（只扩散 6/8 的误差，对比更强，适合小图）
+    bayer            有序抖动（按 Bayer 阈值矩阵加偏移后取最近色，完全向量化）
+
+误差扩散本身是串行的，这里按"波前"并行：像素 (y, x) 只依赖左边、上一行和上两行的像素，
+令 t = x + 2y，同一个 t 上的像素互不依赖，一次取最近色、一次扩散误差，
+1000×1000 的图只需约 3000 步向量化计算（约 0.5 秒）。
+
+蛇形扫描（奇数行从右往左）不在这条快速路径上：每一行的第一个像素依赖上一行的最后一个像素，
+所有像素只能一个接一个处理，没有可以并行的波前。这里逐行处理，行内的横向误差在 Python 里
+逐个传递（查表取最近色），只有向下的误差整行向量化扩散；150×150 约 0.3 秒，
+1000×1000 约 4~5 秒，因此默认关闭，只在需要减少斜向纹理时使用。
+
+结果为调色板条目下标 (H, W)，与 ColorMapper.nearest_entries 一致（跟随其配色方式）。
+"""
+import numpy as np
+
+# 误差扩散核：(dy, dx, 权重)，dx 以扫描方向为正
+KERNELS = {
+    "floyd_steinberg": [(0, 1, 7 / 16), (1, -1, 3 / 16), (1, 0, 5 / 16), (1, 1, 1 / 16)],
+    "atkinson": [(0, 1, 1 / 8), (0, 2, 1 / 8), (1, -1, 1 / 8), (1, 0, 1 / 8), (1, 1, 1 / 8),
+                 (2, 0, 1 / 8)],
+}
+
+DITHER_METHODS = ("floyd_steinberg", "atkinson", "bayer")
+
+# 画板背景色（绘制时跳过）
+BACKGROUND_COLOR = "#F9F6E9"
+
+# 蛇形扫描查表的量化位数（每通道 64 级）
+TABLE_BITS = 6
+
+
+def bayer_matrix(size):
+    """size×size 的 Bayer 阈值矩阵（size 为 2 的幂），值为 0 ~ size²-1"""
+    if size < 2 or size & (size - 1):
+        raise ValueError(f"Bayer 矩阵大小必须是 2 的幂: {size}")
+    matrix = np.array([[0, 2], [3, 1]])
+    while len(matrix) < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2],
+                           [4 * matrix + 3, 4 * matrix + 1]])
+    return matrix
+
+
+def ordered_dither(rgb, color_mapper, matrix_size=4, strength=32.0):
+    """有序抖动
+
+    Args:
+        rgb: (H, W, 3) RGB 数组
+        color_mapper: ColorMapper
+        matrix_size: Bayer 矩阵大小（2 / 4 / 8）
+        strength: 偏移幅度（RGB 单位），约等于调色板中相邻颜色的间距
+
+    Returns:
+        (H, W) 调色板条目下标
+    """
+    rgb = np.asarray(rgb, dtype=np.float32)
+    height, width = rgb.shape[:2]
+    matrix = bayer_matrix(matrix_size)
+    threshold = (matrix + 0.5) / matrix.size - 0.5
+    offset = np.tile(threshold, (height // matrix_size + 1, width // matrix_size + 1))[:height, :width]
+    shifted = np.clip(rgb + strength * offset[..., None], 0, 255)
+    return color_mapper.nearest_entries(shifted).reshape(height, width)
+
+
+def _background_entry(color_mapper):
+    return color_mapper.color_entries([BACKGROUND_COLOR])[0]
+
+
+def error_diffusion(rgb, color_mapper, method="floyd_steinberg", serpentine=False,
+                    background_error_cap=None):
+    """误差扩散抖动
+
+    Args:
+        rgb: (H, W, 3) RGB 数组
+        color_mapper: ColorMapper
+        method: "floyd_steinberg" / "atkinson"
+        serpentine: 蛇形扫描（奇数行从右往左，减少斜向纹理；逐像素串行处理，
+                    比默认的波前并行慢约 10 倍，大图要几秒）
+        background_error_cap: 取到背景色的像素（不会被画）向外扩散的误差上限（每通道，RGB 单位），
+                              None 表示不限制，0 表示不扩散
+
+    Returns:
+        (H, W) 调色板条目下标
+    """
+    if method not in KERNELS:
+        raise ValueError(f"未知的误差扩散方法: {method}")
+    work = np.array(rgb, dtype=np.float32)
+    if serpentine:
+        return _diffuse_serpentine(work, color_mapper, KERNELS[method], background_error_cap)
+    return _diffuse_wavefront(work, color_mapper, KERNELS[method], background_error_cap)
+
+
+def _cap_background_error(error, entries, background, cap):
+    if cap is not None:
+        is_background = entries == background
+        error[is_background] = np.clip(error[is_background], -cap, cap)
+
+
+def _diffuse_wavefront(work, color_mapper, kernel, background_error_cap):
+    """按 t = x + 2y 的波前并行扩散（所有行从左往右）
+
+    先把图像错切为 skewed[t, y] = work[y, t - 2y]，同一波前就是 skewed 的一行里连续的一段，
+    扩散核的每个目标 (y + dy, x + dx) 落在 skewed[t + dx + 2dy, y + dy]，也是连续的一段，
+    每步都是切片运算，不需要花式索引。超出图像的目标落在错切数组的空白处，直接丢弃。
+    """
+    height, width = work.shape[:2]
+    palette_rgb = color_mapper.palette_rgb
+    background = _background_entry(color_mapper)
+    steps = width + 2 * (height - 1)
+    reach_t = max(dx + 2 * dy for dy, dx, _ in kernel)
+    reach_y = max(dy for dy, _, _ in kernel)
+
+    skewed = np.zeros((steps + reach_t, height + reach_y, 3), dtype=np.float32)
+    chosen = np.zeros((steps, height), dtype=np.int64)
+    for y in range(height):
+        skewed[2 * y:2 * y + width, y] = work[y]
+    targets = [(dx + 2 * dy, dy, np.float32(weight)) for dy, dx, weight in kernel]
+
+    for t in range(steps):
+        # 本步的像素：x = t - 2y 落在 [0, width) 内的行
+        first = max(0, (t - width + 2) // 2)
+        last = min(height - 1, t // 2) + 1
+
+        values = skewed[t, first:last].clip(0, 255)
+        entries = color_mapper.nearest_entries(values)
+        chosen[t, first:last] = entries
+        error = values - palette_rgb[entries]
+        _cap_background_error(error, entries, background, background_error_cap)
+
+        for dt, dy, weight in targets:
+            skewed[t + dt, first + dy:last + dy] += weight * error
+
+    ys, xs = np.indices((height, width))
+    return chosen[xs + 2 * ys, ys]
+
+
+def _entry_table(color_mapper):
+    """蛇形扫描用的 RGB → 条目查找表（扁平列表，下标为 (r>>2)<<12 | (g>>2)<<6 | b>>2）"""
+    levels = 1 << TABLE_BITS
+    step = 256 // levels
+    centers = np.arange(levels) * step + (step - 1) / 2
+    r, g, b = np.meshgrid(centers, centers, centers, indexing="ij")
+    rgb = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+    return color_mapper.nearest_entries(rgb).tolist()
+
+
+def _diffuse_serpentine(work, color_mapper, kernel, background_error_cap):
+    """蛇形扫描：逐行处理，行内横向误差逐个传递，向下的误差整行扩散（串行，不走波前快速路径）"""
+    height, width = work.shape[:2]
+    shift = 8 - TABLE_BITS
+    table = _entry_table(color_mapper)
+    palette = color_mapper.palette_rgb.tolist()
+    background = _background_entry(color_mapper)
+    cap = background_error_cap
+    same_row = [(dx, weight) for dy, dx, weight in kernel if dy == 0]
+    below = [(dy, dx, weight) for dy, dx, weight in kernel if dy > 0]
+    entries = np.empty((height, width), dtype=np.int64)
+
+    for y in range(height):
+        reverse = y % 2 == 1
+        row = work[y, ::-1] if reverse else work[y]
+        values = row.tolist()
+        chosen = [0] * width
+        errors = [None] * width
+        carry = [[0.0, 0.0, 0.0] for _ in range(width + 2)]
+
+        for x in range(width):
+            extra = carry[x]
+            r = min(255.0, max(0.0, values[x][0] + extra[0]))
+            g = min(255.0, max(0.0, values[x][1] + extra[1]))
+            b = min(255.0, max(0.0, values[x][2] + extra[2]))
+            entry = table[(int(r) >> shift) << (2 * TABLE_BITS) | (int(g) >> shift) << TABLE_BITS |
+                          int(b) >> shift]
+            pr, pg, pb = palette[entry]
+            er, eg, eb = r - pr, g - pg, b - pb
+            if cap is not None and entry == background:
+                er = min(cap, max(-cap, er))
+                eg = min(cap, max(-cap, eg))
+                eb = min(cap, max(-cap, eb))
+            chosen[x] = entry
+            errors[x] = (er, eg, eb)
+            for dx, weight in same_row:
+                target = carry[x + dx]
+                target[0] += weight * er
+                target[1] += weight * eg
+                target[2] += weight * eb
+
+        chosen = np.array(chosen, dtype=np.int64)
+        errors = np.array(errors, dtype=np.float32)
+        if reverse:
+            chosen = chosen[::-1]
+            errors = errors[::-1]
+        entries[y] = chosen
+
+        # 向下的误差整行扩散（从右往左的行，横向偏移取反）
+        for dy, dx, weight in below:
+            if y + dy >= height:
+                continue
+            dx = -dx if reverse else dx
+            if dx >= 0:
+                work[y + dy, dx:] += weight * errors[:width - dx]
+            else:
+                work[y + dy, :dx] += weight * errors[-dx:]
+
+    return entries
+
+
+def dither(rgb, color_mapper, method="floyd_steinberg", serpentine=False, background_error_cap=None,
+           matrix_size=4, strength=32.0):
+    """按方法名抖动，返回 (H, W) 调色板条目下标"""
+    if method == "bayer":
+        return ordered_dither(rgb, color_mapper, matrix_size, strength)
+    return error_diffusion(rgb, color_mapper, method, serpentine, background_error_cap)
@@ -0,0 +1,180 @@
+"""
+油漆桶规划 - 找出可以用游戏的填充工具一键画完的同色连通区域
+
+游戏的油漆桶把点击处所在的同色连通区域（4 邻接）整体换成当前颜色。在空白画板上：
+    1. 先用画笔画完所有不填充的格子，它们围成每个填充区域的边界
+    2. 再在每个填充区域内点一下，填充只会在边界内扩散
+要保证不漏出去，一个区域只有满足下面的条件才会被填充：
+    - 不与画板底色的格子（不画的背景，或配色后与底色相同的颜色）相邻，否则会连成一片
+    - 不与另一个填充区域相邻（两边都要等对方先画好，只能二选一，优先保留大的）
+    - 不贴着区域绘制时的裁剪边（外面的格子状态未知），画板边缘没有问题
+    - 格子数不少于 min_cells（少了不值得切换工具和重新选色）
+
+连通区域标记完全向量化：同色的相邻格子连边，反复"挂到更小的根 + 指针跳跃"直到收敛，
+不依赖 scipy。
+"""
+import numpy as np
+
+# 默认的最小填充格子数
+FILL_MIN_CELLS = 8
+
+
+def label_components(indices):
+    """按颜色标记 4 邻接连通区域
+
+    Args:
+        indices: (H, W) 调色板索引数组
+
+    Returns:
+        ((H, W) 区域编号数组（0 ~ count-1，按行扫描时首次出现的顺序）, 区域数)
+    """
+    indices = np.asarray(indices)
+    height, width = indices.shape
+    size = height * width
+    if size == 0:
+        return np.zeros((height, width), dtype=np.int32), 0
+
+    ids = np.arange(size, dtype=np.int64).reshape(height, width)
+    horizontal = indices[:, 1:] == indices[:, :-1]
+    vertical = indices[1:] == indices[:-1]
+    left = np.concatenate([ids[:, :-1][horizontal], ids[:-1][vertical]])
+    right = np.concatenate([ids[:, 1:][horizontal], ids[1:][vertical]])
+
+    parent = np.arange(size, dtype=np.int64)
+    while len(left):
+        roots_left, roots_right = parent[left], parent[right]
+        low = np.minimum(roots_left, roots_right)
+        high = np.maximum(roots_left, roots_right)
+        pending = low != high
+        if not pending.any():
+            break
+        np.minimum.at(parent, high[pending], low[pending])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        left, right = left[pending], right[pending]
+
+    # 根是区域内行扫描的第一个格子，按根排序即按首次出现排序
+    roots, labels = np.unique(parent, return_inverse=True)
+    return labels.reshape(height, width).astype(np.int32), len(roots)
+
+
+def _pick_seeds(labels, chosen):
+    """每个选中区域的点击格子：优先取四邻都在区域内的格子中离重心最近的一个"""
+    height, width = labels.shape
+    inside = chosen[labels]
+    interior = inside.copy()
+    interior[0, :] = interior[-1, :] = False
+    interior[:, 0] = interior[:, -1] = False
+    interior[1:-1, 1:-1] &= ((labels[1:-1, 1:-1] == labels[:-2, 1:-1]) & (labels[1:-1, 1:-1] == labels[2:, 1:-1]) &
+                             (labels[1:-1, 1:-1] == labels[1:-1, :-2]) & (labels[1:-1, 1:-1] == labels[1:-1, 2:]))
+
+    rows, cols = np.nonzero(inside)
+    cell_labels = labels[rows, cols]
+    counts = np.bincount(cell_labels, minlength=len(chosen))
+    center_row = np.bincount(cell_labels, rows, minlength=len(chosen)) / np.maximum(counts, 1)
+    center_col = np.bincount(cell_labels, cols, minlength=len(chosen)) / np.maximum(counts, 1)
+    distance = (rows - center_row[cell_labels]) ** 2 + (cols - center_col[cell_labels]) ** 2
+
+    # 排序键：区域、是否边缘格子、离重心的距离，每个区域取第一个
+    order = np.lexsort((distance, ~interior[rows, cols], cell_labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = cell_labels[order][1:] != cell_labels[order][:-1]
+    picked = order[first]
+    return dict(zip(cell_labels[picked].tolist(), zip(rows[picked].tolist(), cols[picked].tolist())))
+
+
+def plan_fills(grid, open_colors, canvas_size, min_cells=FILL_MIN_CELLS):
+    """选出可以用油漆桶填充的连通区域
+
+    Args:
+        grid: 要画的 PixelGrid（可以是区域视图，row_offset/col_offset 为其在画板上的位置）
+        open_colors: 在画板上保持底色的颜色（不画的背景色、配色后与底色相同的颜色）
+        canvas_size: 画板的格子数 (height, width)
+        min_cells: 最小填充格子数
+
+    Returns:
+        ({color: [(K, 2) 格子数组（原图坐标，第一个为点击的格子）, ...]}（按颜色首次出现的顺序）,
+         与 grid 同尺寸的 bool 数组，True 表示该格子由填充完成）
+    """
+    indices = np.asarray(grid.indices)
+    height, width = indices.shape
+    filled = np.zeros((height, width), dtype=bool)
+    if indices.size == 0:
+        return {}, filled
+
+    labels, count = label_components(indices)
+    sizes = np.bincount(labels.reshape(-1), minlength=count)
+    first_cells = np.unique(labels.reshape(-1), return_index=True)[1]
+    component_values = indices.reshape(-1)[first_cells]
+
+    open_values = np.zeros(len(grid.palette), dtype=bool)
+    open_upper = {color.upper() for color in open_colors}
+    for value, color in enumerate(grid.palette):
+        open_values[value] = color.upper() in open_upper
+    is_open = open_values[component_values]
+
+    candidate = (sizes >= min_cells) & ~is_open
+
+    # 与底色相邻的区域填充会漏到底色里
+    pairs = np.concatenate([
+        np.stack([labels[:, :-1].reshape(-1), labels[:, 1:].reshape(-1)], axis=1),
+        np.stack([labels[:-1].reshape(-1), labels[1:].reshape(-1)], axis=1)])
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+    touches_open = np.zeros(count, dtype=bool)
+    touches_open[pairs[is_open[pairs[:, 1]], 0]] = True
+    touches_open[pairs[is_open[pairs[:, 0]], 1]] = True
+    candidate &= ~touches_open
+
+    # 贴着裁剪边（不是画板边）的区域外侧状态未知
+    canvas_height, canvas_width = canvas_size
+    edges = []
+    if grid.row_offset > 0:
+        edges.append(labels[0])
+    if grid.row_offset + height < canvas_height:
+        edges.append(labels[-1])
+    if grid.col_offset > 0:
+        edges.append(labels[:, 0])
+    if grid.col_offset + width < canvas_width:
+        edges.append(labels[:, -1])
+    if edges:
+        candidate[np.unique(np.concatenate(edges))] = False
+
+    # 相邻的两个填充区域只保留一个（大的优先）
+    both = candidate[pairs[:, 0]] & candidate[pairs[:, 1]]
+    neighbors = {}
+    for a, b in pairs[both].tolist():
+        neighbors.setdefault(a, []).append(b)
+        neighbors.setdefault(b, []).append(a)
+    chosen = np.zeros(count, dtype=bool)
+    for component in sorted(np.flatnonzero(candidate).tolist(), key=lambda c: -sizes[c]):
+        if not any(chosen[other] for other in neighbors.get(component, ())):
+            chosen[component] = True
+
+    if not chosen.any():
+        return {}, filled
+
+    filled = chosen[labels]
+    seeds = _pick_seeds(labels, chosen)
+
+    # 按区域分组格子（区域内行扫描顺序），点击的格子放到第一个
+    rows, cols = np.nonzero(filled)
+    cell_labels = labels[rows, cols]
+    order = np.argsort(cell_labels, kind="stable")
+    rows, cols, cell_labels = rows[order], cols[order], cell_labels[order]
+    starts = np.flatnonzero(np.concatenate(([True], cell_labels[1:] != cell_labels[:-1])))
+    ends = np.append(starts[1:], len(cell_labels))
+
+    groups = {}
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        component = int(cell_labels[start])
+        cells = np.stack([rows[start:end], cols[start:end]], axis=1).astype(np.int32)
+        seed = seeds[component]
+        seed_index = int(np.flatnonzero((cells[:, 0] == seed[0]) & (cells[:, 1] == seed[1]))[0])
+        cells[[0, seed_index]] = cells[[seed_index, 0]]
+        cells += np.array([grid.row_offset, grid.col_offset], dtype=np.int32)
+        groups.setdefault(grid.palette[component_values[component]], []).append(cells)
+    return groups, filled
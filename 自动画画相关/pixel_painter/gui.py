@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-import json
 import time
 import threading
 from painter import PixelPainter
+from color_mapper import ColorMapper
+from pixel_json import load_pixel_json
+from image_ingest import IMAGE_EXTENSIONS, is_image_file, load_image
+from pixel_format import PIXEL_EXTENSION, is_pixel_file, load_pixel_file
+from tile_scheduler import DONE, TileScheduler
 from pynput import mouse, keyboard
 import win32gui # 假设您有这个模块来选择窗口
 from win_input import win_input
@@ -23,6 +27,8 @@ class PixelPainterGUI:
         # 初始化所有变量（在 create_widgets 之前）
         self.painter = PixelPainter()
         self.json_data = None
+        self.tile_scheduler = None  # 大图分块调度（按需创建）
+        self.paint_thread = None
         self.calibration_mode = None
         self.calibration_points = []
         # 起始颜色索引UAYH6 
@@ -208,6 +214,35 @@ class PixelPainterGUI:
         self.color_status = tk.Label(color_frame, text="未校准", fg="red")
         self.color_status.pack(side="left", padx=10)
         
+        # 笔刷尺寸按钮校准（使用大笔刷时需要，1×1 也要标记）
+        brush_frame = tk.Frame(calib_frame)
+        brush_frame.pack(fill="x", pady=5)
+        
+        tk.Label(brush_frame, text="笔刷按钮:").pack(side="left")
+        
+        self.brush_calib_size_var = tk.IntVar(value=1)
+        tk.Spinbox(brush_frame, textvariable=self.brush_calib_size_var, 
+                  from_=1, to=8, width=4).pack(side="left", padx=2)
+        tk.Button(brush_frame, text="标记该尺寸按钮", 
+                  command=lambda: self.start_calibration(f"brush_{self.brush_calib_size_var.get()}")
+                  ).pack(side="left", padx=5)
+        
+        self.brush_status = tk.Label(brush_frame, text="未校准（可选）", fg="gray")
+        self.brush_status.pack(side="left", padx=10)
+        
+        # 绘图工具按钮校准（使用油漆桶时需要）
+        tool_frame = tk.Frame(calib_frame)
+        tool_frame.pack(fill="x", pady=5)
+        
+        tk.Label(tool_frame, text="绘图工具:").pack(side="left")
+        tk.Button(tool_frame, text="画笔", 
+                  command=lambda: self.start_calibration("pen_tool")).pack(side="left", padx=5)
+        tk.Button(tool_frame, text="油漆桶", 
+                  command=lambda: self.start_calibration("fill_tool")).pack(side="left", padx=5)
+        
+        self.tool_status = tk.Label(tool_frame, text="未校准（可选）", fg="gray")
+        self.tool_status.pack(side="left", padx=10)
+        
         # 坐标选取控制区域
         # coord_control_frame = ttk.LabelFrame(self.root, text="坐标选取", padding=5)
         # coord_control_frame.pack(fill="x", padx=10, pady=5)
@@ -290,6 +325,24 @@ class PixelPainterGUI:
                                 text='示例: [130,400] 或 [130, 400] 或 130,400', 
                                 font=("Arial", 8), fg="gray")
         example_label.pack(pady=2)
+        
+        # 大图分块：按区域大小切块，按固定顺序逐块绘制，记录每块是否画完
+        tile_frame = tk.Frame(region_frame)
+        tile_frame.pack(pady=5)
+        
+        tk.Label(tile_frame, text="分块绘制:").pack(side="left", padx=5)
+        
+        self.tile_btn = tk.Button(tile_frame, text="画下一块", 
+                                  command=self.paint_next_tile,
+                                  bg="#009688", fg="white", width=10)
+        self.tile_btn.pack(side="left", padx=2)
+        
+        tk.Button(tile_frame, text="重置进度", 
+                command=self.reset_tiles,
+                width=8).pack(side="left", padx=2)
+        
+        self.tile_status_label = tk.Label(tile_frame, text="按上面的区域大小切块（后台预编译所有块）", fg="gray")
+        self.tile_status_label.pack(side="left", padx=10)
 
         
         # ============ 控制区域 ============
@@ -321,6 +374,95 @@ class PixelPainterGUI:
                                         fg="blue", font=("Arial", 9))
         self.total_colors_label.pack(side="left", padx=10)
         
+        # 笔画模式
+        stroke_frame = tk.Frame(control_frame)
+        stroke_frame.pack(pady=5)
+        
+        self.stroke_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(stroke_frame, text="笔画模式（同色连续格子拖动绘制）", 
+                      variable=self.stroke_mode_var).pack(side="left", padx=5)
+        
+        tk.Label(stroke_frame, text="速率(格/秒):").pack(side="left", padx=5)
+        
+        self.move_rate_var = tk.IntVar(value=200)
+        tk.Spinbox(stroke_frame, textvariable=self.move_rate_var, 
+                from_=10, to=2000, width=6).pack(side="left", padx=2)
+        
+        # 大笔刷
+        brush_option_frame = tk.Frame(control_frame)
+        brush_option_frame.pack(pady=5)
+        
+        self.brush_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(brush_option_frame, text="大笔刷（同色大块一次画多格）", 
+                      variable=self.brush_mode_var).pack(side="left", padx=5)
+        
+        tk.Label(brush_option_frame, text="尺寸:").pack(side="left", padx=5)
+        
+        self.brush_sizes_var = tk.StringVar(value="3,2")
+        tk.Entry(brush_option_frame, textvariable=self.brush_sizes_var, width=8).pack(side="left", padx=2)
+        
+        tk.Label(brush_option_frame, text="(不能与笔画模式同时使用)", 
+                fg="gray", font=("Arial", 9)).pack(side="left", padx=5)
+        
+        # 油漆桶
+        fill_option_frame = tk.Frame(control_frame)
+        fill_option_frame.pack(pady=5)
+        
+        self.bucket_fill_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(fill_option_frame, text="油漆桶填充（大块同色区域一键填充，需空白画板）", 
+                      variable=self.bucket_fill_var).pack(side="left", padx=5)
+        
+        tk.Label(fill_option_frame, text="渐进绘制:").pack(side="left", padx=5)
+        
+        self.progressive_var = tk.StringVar(value="关闭")
+        ttk.Combobox(fill_option_frame, textvariable=self.progressive_var, 
+                    values=["关闭", "lattice", "outline"], 
+                    state="readonly", width=8).pack(side="left", padx=5)
+        
+        tk.Label(fill_option_frame, text="(先稀疏点阵/轮廓，中途停下也能看出全图)", 
+                fg="gray", font=("Arial", 9)).pack(side="left", padx=5)
+        
+        # 同色像素绘制顺序
+        route_frame = tk.Frame(control_frame)
+        route_frame.pack(pady=5)
+        
+        tk.Label(route_frame, text="绘制路径:").pack(side="left", padx=5)
+        
+        self.route_method_var = tk.StringVar(value="hilbert")
+        ttk.Combobox(route_frame, textvariable=self.route_method_var, 
+                    values=["hilbert", "serpentine", "nn_2opt"], 
+                    state="readonly", width=12).pack(side="left", padx=5)
+        
+        tk.Label(route_frame, text="(nn_2opt 限时约 0.3 秒，超时的颜色改用 hilbert)", 
+                fg="gray", font=("Arial", 9)).pack(side="left", padx=5)
+        
+        self.autotune_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(route_frame, text="自动调速", 
+                      variable=self.autotune_var).pack(side="left", padx=5)
+        
+        self.perceptual_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(route_frame, text="感知配色(ΔE2000)", 
+                      variable=self.perceptual_var).pack(side="left", padx=5)
+        
+        # 图片导入时的抖动
+        dither_frame = tk.Frame(control_frame)
+        dither_frame.pack(pady=5)
+        
+        tk.Label(dither_frame, text="图片抖动:").pack(side="left", padx=5)
+        
+        self.dither_var = tk.StringVar(value="无")
+        ttk.Combobox(dither_frame, textvariable=self.dither_var, 
+                    values=["无", "floyd_steinberg", "atkinson", "bayer"], 
+                    state="readonly", width=14).pack(side="left", padx=5)
+        
+        self.serpentine_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(dither_frame, text="蛇形扫描（较慢）", 
+                      variable=self.serpentine_var).pack(side="left", padx=5)
+        
+        self.cap_background_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(dither_frame, text="背景不扩散误差", 
+                      variable=self.cap_background_var).pack(side="left", padx=5)
+        
         # 控制按钮
         btn_frame = tk.Frame(control_frame)
         btn_frame.pack()
@@ -342,6 +484,24 @@ class PixelPainterGUI:
                                 bg="#f44336", fg="white", 
                                 width=15, height=2, state="disabled")
         self.stop_btn.pack(side="left", padx=5)
+        
+        self.repair_btn = tk.Button(btn_frame, text="检查并补画", 
+                                    command=self.repair_painting, 
+                                    bg="#2196F3", fg="white", 
+                                    width=15, height=2)
+        self.repair_btn.pack(side="left", padx=5)
+        
+        self.resume_btn = tk.Button(btn_frame, text="续画", 
+                                    command=self.resume_painting, 
+                                    bg="#9C27B0", fg="white", 
+                                    width=15, height=2)
+        self.resume_btn.pack(side="left", padx=5)
+        
+        self.diff_btn = tk.Button(btn_frame, text="对比旧图绘制", 
+                                  command=self.diff_painting, 
+                                  bg="#607D8B", fg="white", 
+                                  width=15, height=2)
+        self.diff_btn.pack(side="left", padx=5)
 
         
         # 进度区域
@@ -913,6 +1073,9 @@ class PixelPainterGUI:
         核心：将确认的 x, y 坐标保存到相应的校准属性中
         这个方法现在只负责保存逻辑，不负责获取坐标或重置UI状态
         """
+        # 新坐标是在当前窗口位置下取的，已有的坐标先换算到同一基准
+        self.painter.rebase_calibration()
+        
         if self.calibration_mode == "grid_start":
             self.painter.grid_start = (x, y)
             self.log(f"✓ 画板左上角: ({x}, {y})")
@@ -935,6 +1098,21 @@ class PixelPainterGUI:
             self.log(f"✓ 右切换按钮: ({x}, {y})")
             self.check_color_calibration()
         
+        elif self.calibration_mode.startswith("brush_"):
+            size = int(self.calibration_mode[len("brush_"):])
+            self.painter.brush_buttons[size] = (x, y)
+            self.log(f"✓ 笔刷 {size}×{size} 按钮: ({x}, {y})")
+            self.check_brush_calibration()
+        
+        elif self.calibration_mode in ("pen_tool", "fill_tool"):
+            if self.calibration_mode == "pen_tool":
+                self.painter.pen_tool_btn = (x, y)
+                self.log(f"✓ 画笔按钮: ({x}, {y})")
+            else:
+                self.painter.fill_tool_btn = (x, y)
+                self.log(f"✓ 油漆桶按钮: ({x}, {y})")
+            self.check_tool_calibration()
+        
         elif self.calibration_mode.startswith("color_point_"):
             # 颜色点校准
             self.calibration_points.append((x, y))
@@ -989,8 +1167,13 @@ class PixelPainterGUI:
             "grid_start": "画板左上角",
             "grid_end": "画板右下角",
             "color_left": "左切换按钮",
-            "color_right": "右切换按钮"
+            "color_right": "右切换按钮",
+            "pen_tool": "画笔按钮",
+            "fill_tool": "油漆桶按钮"
         }
+        if mode.startswith("brush_"):
+            size = mode[len("brush_"):]
+            mode_names[mode] = f"笔刷 {size}×{size} 按钮"
         self.log(f"请使用方向键移动光标到 {mode_names.get(mode, mode)} 的位置，按'J'键测试双击，按'Space'键确认")
         
         # 自动开始追踪
@@ -1056,6 +1239,34 @@ class PixelPainterGUI:
             len(self.painter.color_positions) >= 6): # 假设至少需要6个颜色点
             self.color_status.config(text="已校准 ✓", fg="green")
     
+    def check_brush_calibration(self):
+        """检查笔刷按钮校准状态"""
+        sizes = sorted(self.painter.brush_buttons)
+        if sizes:
+            text = "已标记: " + ", ".join(f"{size}×{size}" for size in sizes)
+            self.brush_status.config(text=text, fg="green" if 1 in sizes and len(sizes) > 1 else "orange")
+    
+    def check_tool_calibration(self):
+        """检查绘图工具按钮校准状态"""
+        marked = [name for name, button in (("画笔", self.painter.pen_tool_btn), 
+                                            ("油漆桶", self.painter.fill_tool_btn)) if button]
+        if marked:
+            self.tool_status.config(text="已标记: " + ", ".join(marked), 
+                                    fg="green" if len(marked) == 2 else "orange")
+    
+    def _progressive(self):
+        """界面选择的渐进绘制方式，关闭时为 None"""
+        mode = self.progressive_var.get()
+        return mode if mode in ("lattice", "outline") else None
+    
+    def _brush_sizes(self):
+        """界面选择的大笔刷尺寸，未启用时为 None"""
+        import re
+        if not self.brush_mode_var.get():
+            return None
+        sizes = [int(part) for part in re.split(r"[,，\s]+", self.brush_sizes_var.get()) if part.isdigit()]
+        return [size for size in sizes if size > 1] or None
+    
     def load_saved_config(self):
         """加载保存的配置"""
         if self.painter.config:
@@ -1072,6 +1283,8 @@ class PixelPainterGUI:
             
             self.check_grid_calibration()
             self.check_color_calibration()
+            self.check_brush_calibration()
+            self.check_tool_calibration()
             self.log("✓ 已加载保存的坐标配置")
     
     def log(self, message):
@@ -1082,28 +1295,45 @@ class PixelPainterGUI:
         self.log_text.config(state="disabled")
     
     def load_json(self):
-        """加载JSON文件"""
+        """加载JSON文件或图片（图片直接缩放并映射到调色板）"""
+        image_patterns = " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)
         filename = filedialog.askopenfilename(
-            title="选择像素画JSON文件",
-            filetypes=[("JSON文件", "*.json"), ("所有文件", "*.*")]
+            title="选择像素画JSON文件或图片",
+            filetypes=[("像素画文件", f"*.json *{PIXEL_EXTENSION}"), ("图片", image_patterns), ("所有文件", "*.*")]
         )
         
         if filename:
+            grid_width = None
+            if is_image_file(filename):
+                grid_width = simpledialog.askinteger("图片转像素画", "画板宽度（格子数）:", 
+                                                     initialvalue=150, minvalue=1, maxvalue=1000)
+                if not grid_width:
+                    return
+            
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    self.json_data = json.load(f)
+                self.file_label.config(text=f"加载中: {os.path.basename(filename)}", fg="black")
+                
+                if grid_width:
+                    start_time = time.time()
+                    dither = self.dither_var.get()
+                    self.json_data = load_image(
+                        filename, width=grid_width, 
+                        color_mapper=ColorMapper(self._match_mode()),
+                        dither=None if dither == "无" else dither,
+                        serpentine=self.serpentine_var.get(),
+                        background_error_cap=0 if self.cap_background_var.get() else None
+                    )
+                    self.log(f"图片转换完成: 耗时 {(time.time() - start_time) * 1000:.0f}ms")
+                elif is_pixel_file(filename):
+                    # 二进制格式：内存映射，不需要解析
+                    self.json_data = load_pixel_file(filename)
+                else:
+                    # 流式加载：逐行转成调色板索引，同时统计颜色
+                    self.json_data = load_pixel_json(filename, progress_callback=self._update_load_progress)
                 
                 width = self.json_data["width"]
                 height = self.json_data["height"]
-                
-                # 计算总颜色数
-                pixels = self.json_data["pixels"]
-                unique_colors = set()
-                for row in pixels:
-                    for color in row:
-                        unique_colors.add(color.upper())
-                
-                total_colors = len(unique_colors)
+                total_colors = len(self.json_data["color_counts"])
                 
                 self.file_label.config(
                     text=f"已加载: {os.path.basename(filename)} ({width}x{height})",
@@ -1119,7 +1349,20 @@ class PixelPainterGUI:
             except Exception as e:
                 messagebox.showerror("错误", f"加载文件失败:\n{str(e)}")
                 self.log(f"加载文件失败: {str(e)}")
+            finally:
+                self.progress_bar['value'] = 0
+                self.progress_label.config(text="等待开始...")
 
+    def _match_mode(self):
+        """界面选择的配色方式"""
+        return "perceptual" if self.perceptual_var.get() else "rgb"
+    
+    def _update_load_progress(self, done, total):
+        """加载进度（在主线程中加载，刷新界面让进度条动起来）"""
+        self.progress_bar['value'] = (done / total) * 100 if total > 0 else 100
+        self.progress_label.config(text=f"加载中: {done / 1024 / 1024:.1f}/{total / 1024 / 1024:.1f} MB")
+        self.root.update_idletasks()
+    
     def start_painting(self):
         """开始绘制"""
         if not self.painter:
@@ -1174,6 +1417,9 @@ class PixelPainterGUI:
         
         # 禁用开始按钮，启用暂停和停止按钮
         self.start_btn.config(state="disabled")
+        self.repair_btn.config(state="disabled")
+        self.resume_btn.config(state="disabled")
+        self.diff_btn.config(state="disabled")
         self.pause_btn.config(state="normal")
         self.stop_btn.config(state="normal")
         
@@ -1184,27 +1430,295 @@ class PixelPainterGUI:
         else:
             self.log(f"开始全图绘制，起始颜色索引: {start_color_index}")
         
+        # 绘制选项（在主线程读取界面变量）
+        paint_options = self._paint_options()
+        if paint_options["stroke_mode"]:
+            self.log(f"笔画模式: 速率 {paint_options['move_rate']} 格/秒")
+        
         # 在新线程中执行绘制
         self.paint_thread = threading.Thread(
             target=self._paint_worker,
-            args=(start_color_index, region_info),
+            args=(start_color_index, region_info, paint_options),
+            daemon=True
+        )
+        self.paint_thread.start()
+
+    def _paint_options(self):
+        """界面上的绘制选项（需在主线程调用）"""
+        return {
+            "stroke_mode": self.stroke_mode_var.get(),
+            "stroke_direction": "auto",
+            "move_rate": self.move_rate_var.get(),
+            "route_method": self.route_method_var.get(),
+            "autotune": self.autotune_var.get(),
+            "match_mode": self._match_mode(),
+            "brush_sizes": self._brush_sizes(),
+            "bucket_fill": self.bucket_fill_var.get(),
+            "progressive": self._progressive()
+        }
+    
+    def _diff_paint_options(self):
+        """差异绘制（检查补画、对比绘制）的选项：同 _paint_options，
+        但不用油漆桶（会漫过没变的格子）和渐进绘制（只补零散的格子，不需要分遍）"""
+        paint_options = self._paint_options()
+        del paint_options["bucket_fill"], paint_options["progressive"]
+        return paint_options
+    
+    def _get_tile_scheduler(self):
+        """当前图片和方块大小的分块调度，图片或大小变化时重新创建"""
+        tile_size = self.region_size_var.get()
+        scheduler = self.tile_scheduler
+        if scheduler is None or scheduler.json_data is not self.json_data or scheduler.tile_size != tile_size:
+            if scheduler:
+                scheduler.shutdown()
+            scheduler = self.tile_scheduler = TileScheduler(self.json_data, tile_size)
+        return scheduler
+    
+    def _update_tile_status(self):
+        scheduler = self.tile_scheduler
+        if not scheduler:
+            return
+        index = scheduler.next_tile()
+        if index is None:
+            text, color = f"全部 {len(scheduler.tiles)} 块已完成 ✓", "green"
+        else:
+            text, color = f"已完成 {scheduler.done_count}/{len(scheduler.tiles)}，下一块: {scheduler.describe(index)}", "blue"
+        self.tile_status_label.config(text=text, fg=color)
+    
+    def paint_next_tile(self):
+        """大图分块绘制：画下一个方块（第一次点击时在后台预编译所有方块的计划）"""
+        if not self.painter or not self.json_data:
+            messagebox.showerror("错误", "请先选择目标窗口并加载JSON文件")
+            return
+        
+        if not self.painter.grid_start or not self.painter.grid_end or not self.painter.color_positions:
+            messagebox.showerror("错误", "请先完成画板校准并标记颜色位置")
+            return
+        
+        if self.paint_thread and self.paint_thread.is_alive():
+            messagebox.showwarning("提示", "正在绘制中，请等当前绘制结束")
+            return
+        
+        try:
+            scheduler = self._get_tile_scheduler()
+            paint_options = self._paint_options()
+            scheduler.precompute(self.painter, paint_options)
+        except Exception as e:
+            messagebox.showerror("错误", f"分块设置错误:\n{str(e)}")
+            return
+        
+        index = scheduler.next_tile()
+        self._update_tile_status()
+        if index is None:
+            messagebox.showinfo("提示", "所有方块都已画完")
+            return
+        
+        self.is_painting = True
+        self.start_btn.config(state="disabled")
+        self.repair_btn.config(state="disabled")
+        self.resume_btn.config(state="disabled")
+        self.diff_btn.config(state="disabled")
+        self.tile_btn.config(state="disabled")
+        self.pause_btn.config(state="normal")
+        self.stop_btn.config(state="normal")
+        self.log(f"开始分块绘制: {scheduler.describe(index)}")
+        
+        self.paint_thread = threading.Thread(
+            target=self._paint_worker,
+            args=(1, None, paint_options, "tile"),
+            daemon=True
+        )
+        self.paint_thread.start()
+    
+    def reset_tiles(self):
+        """清空分块进度"""
+        if not self.json_data:
+            return
+        if not messagebox.askyesno("确认", "将所有方块标记为未画，确定吗？"):
+            return
+        self._get_tile_scheduler().reset()
+        self._update_tile_status()
+        self.log("已重置分块进度")
+    
+    def repair_painting(self):
+        """截图检查画板，只补画没画对的格子"""
+        if not self.painter or not self.json_data:
+            messagebox.showerror("错误", "请先选择目标窗口并加载JSON文件")
+            return
+        
+        if not self.painter.grid_start or not self.painter.grid_end or not self.painter.color_positions:
+            messagebox.showerror("错误", "请先完成画板校准并标记颜色位置")
+            return
+        
+        try:
+            region_info = self._get_region_info()
+        except ValueError as e:
+            messagebox.showerror("错误", f"区域设置错误:\n{str(e)}")
+            return
+        
+        if not messagebox.askyesno("确认补画", "将截图检查画板并补画不一致的格子\n\n请确保画板没有被遮挡，确定开始吗？"):
+            return
+        
+        self.is_painting = True
+        self.start_btn.config(state="disabled")
+        self.repair_btn.config(state="disabled")
+        self.resume_btn.config(state="disabled")
+        self.diff_btn.config(state="disabled")
+        self.pause_btn.config(state="normal")
+        self.stop_btn.config(state="normal")
+        self.log("开始检查画板并补画")
+        
+        paint_options = self._diff_paint_options()
+        
+        self.paint_thread = threading.Thread(
+            target=self._paint_worker,
+            args=(1, region_info, paint_options, "diff"),
             daemon=True
         )
         self.paint_thread.start()
 
-    def _paint_worker(self, start_color_index=1, region_info=None):
+    def diff_painting(self):
+        """选择上一次绘制的 JSON，只绘制与当前图片不同的格子"""
+        if not self.painter or not self.json_data:
+            messagebox.showerror("错误", "请先选择目标窗口并加载JSON文件")
+            return
+        
+        if not self.painter.grid_start or not self.painter.grid_end or not self.painter.color_positions:
+            messagebox.showerror("错误", "请先完成画板校准并标记颜色位置")
+            return
+        
+        filename = filedialog.askopenfilename(
+            title="选择画板上已画好的像素画JSON文件",
+            filetypes=[("像素画文件", f"*.json *{PIXEL_EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not filename:
+            return
+        
+        try:
+            previous_json = load_pixel_file(filename) if is_pixel_file(filename) else load_pixel_json(filename)
+            region_info = self._get_region_info()
+        except Exception as e:
+            messagebox.showerror("错误", f"加载文件失败:\n{str(e)}")
+            return
+        
+        if (previous_json["width"], previous_json["height"]) != (self.json_data["width"], self.json_data["height"]):
+            messagebox.showerror("错误", "两张图片尺寸不一致，无法对比")
+            return
+        
+        if not messagebox.askyesno("确认绘制", f"将以 {os.path.basename(filename)} 为画板当前状态，\n只绘制有变化的格子，确定开始吗？"):
+            return
+        
+        self.is_painting = True
+        self.start_btn.config(state="disabled")
+        self.repair_btn.config(state="disabled")
+        self.resume_btn.config(state="disabled")
+        self.diff_btn.config(state="disabled")
+        self.pause_btn.config(state="normal")
+        self.stop_btn.config(state="normal")
+        self.log(f"对比 {os.path.basename(filename)} 差异绘制")
+        
+        paint_options = self._diff_paint_options()
+        paint_options["previous_json"] = previous_json
+        
+        self.paint_thread = threading.Thread(
+            target=self._paint_worker,
+            args=(1, region_info, paint_options, "diff"),
+            daemon=True
+        )
+        self.paint_thread.start()
+
+    def resume_painting(self):
+        """按绘制日志从上次中断的像素继续绘制"""
+        if not self.painter or not self.json_data:
+            messagebox.showerror("错误", "请先选择目标窗口并加载JSON文件")
+            return
+        
+        if not self.painter.grid_start or not self.painter.grid_end or not self.painter.color_positions:
+            messagebox.showerror("错误", "请先完成画板校准并标记颜色位置")
+            return
+        
+        state = self.painter.journal.load()
+        if not state or state["done"]:
+            messagebox.showinfo("提示", "没有未完成的绘制进度")
+            return
+        
+        confirm_msg = (f"上次绘制停在第 {state['color_index'] + 1} 个颜色的第 {state['offset']} 项\n"
+                       f"区域: {state['region'] if state['region'] else '整张图片'}\n\n"
+                       f"请确认加载的是同一张图片，确定继续吗？")
+        if not messagebox.askyesno("确认续画", confirm_msg):
+            return
+        
+        self.is_painting = True
+        self.start_btn.config(state="disabled")
+        self.repair_btn.config(state="disabled")
+        self.resume_btn.config(state="disabled")
+        self.diff_btn.config(state="disabled")
+        self.pause_btn.config(state="normal")
+        self.stop_btn.config(state="normal")
+        self.log("按绘制日志续画")
+        
+        # 影响绘制计划的选项由日志决定，这里只传速率相关的选项
+        paint_options = {
+            "move_rate": self.move_rate_var.get(),
+            "autotune": self.autotune_var.get()
+        }
+        
+        self.paint_thread = threading.Thread(
+            target=self._paint_worker,
+            args=(1, None, paint_options, "resume"),
+            daemon=True
+        )
+        self.paint_thread.start()
+
+    def _paint_worker(self, start_color_index=1, region_info=None, paint_options=None, mode="paint"):
         """绘制工作线程
         
         Args:
             start_color_index: 起始颜色索引
             region_info: (start_row, start_col, size) 或 None
+            paint_options: 传给 paint_from_json 的其他绘制选项
+            mode: "paint" 正常绘制 / "diff" 差异绘制（只画与画板当前状态不同的格子，
+                  当前状态取自 paint_options 中的 previous_json，没有则截图检查）/ 
+                  "resume" 按绘制日志续画 / "tile" 分块绘制下一块
         """
         try:
+            if mode == "tile":
+                index = self.tile_scheduler.paint_next(
+                    self.painter,
+                    progress_callback=self.update_progress,
+                    **(paint_options or {})
+                )
+                if index is not None:
+                    state = "完成" if self.tile_scheduler.states[index] == DONE else "已停止"
+                    self.root.after(0, self.log, f"{self.tile_scheduler.describe(index)} {state}")
+                self.root.after(0, self._update_tile_status)
+                return
+            
+            if mode == "resume":
+                self.painter.resume_painting(
+                    self.json_data,
+                    progress_callback=self.update_progress,
+                    **(paint_options or {})
+                )
+                self.root.after(0, self.log, "续画结束")
+                return
+            
+            if mode == "diff":
+                count = self.painter.paint_diff(
+                    self.json_data,
+                    progress_callback=self.update_progress,
+                    region_info=region_info,
+                    **(paint_options or {})
+                )
+                self.root.after(0, self.log, f"差异绘制完成，共绘制 {count} 格")
+                return
+            
             self.painter.paint_from_json(
                 self.json_data, 
                 progress_callback=self.update_progress,
                 start_color_index=start_color_index,
-                region_info=region_info  # ✅ 传递区域信息
+                region_info=region_info,  # ✅ 传递区域信息
+                **(paint_options or {})
             )
             
             self.root.after(0, lambda: messagebox.showinfo("完成", "绘制完成1！"))
@@ -1218,6 +1732,10 @@ class PixelPainterGUI:
         finally:
             # 恢复按钮状态
             self.root.after(0, self.start_btn.config, {"state": "normal"})
+            self.root.after(0, self.repair_btn.config, {"state": "normal"})
+            self.root.after(0, self.resume_btn.config, {"state": "normal"})
+            self.root.after(0, self.diff_btn.config, {"state": "normal"})
+            self.root.after(0, self.tile_btn.config, {"state": "normal"})
             self.root.after(0, self.pause_btn.config, {"state": "disabled"})
             self.root.after(0, self.stop_btn.config, {"state": "disabled"})
 
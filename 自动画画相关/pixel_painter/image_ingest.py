@@ -0,0 +1,146 @@
+"""
+图片导入模块 - 直接把 PNG/JPEG/WebP 图片转成可绘制的像素画数据
+
+不再需要先用浏览器里的 Image-to-Pixel-Robot 转成 JSON：
+    json_data = load_image("壁纸/阿尼亚.jpg", width=150)
+    painter.paint_from_json(json_data)
+
+流程：
+    1. PIL 打开图片，透明部分合成到画板背景色上
+    2. 缩放到目标格子数（默认按区域平均，像素风原图用 nearest 可保持色块边缘）
+    3. 每个格子映射到 ColorMapper 调色板中的最近色（向量化，只对出现过的颜色计算距离），
+       照片可以改用抖动（dither.py）减少色带
+返回的数据与 load_pixel_json 的格式相同（带 "grid" 和 "color_counts"，没有 "pixels"）。
+"""
+import os
+
+import numpy as np
+
+from color_mapper import ColorMapper
+from dither import DITHER_METHODS, dither as dither_entries
+from pixel_grid import PixelGrid
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 可以直接导入的图片格式
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif")
+
+# 透明像素合成到的颜色（画板背景色，绘制时会被跳过）
+BACKGROUND_COLOR = "#F9F6E9"
+
+# 缩放方式
+RESAMPLE_METHODS = {
+    "box": "BOX",          # 区域平均，照片类图片
+    "nearest": "NEAREST",  # 最近邻，已经像素化的图片
+    "lanczos": "LANCZOS",  # 高质量缩放，边缘更锐利
+}
+
+
+def is_image_file(filename):
+    """按扩展名判断是否为可导入的图片"""
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+
+def open_rgb(source, background=BACKGROUND_COLOR, draft_size=None):
+    """打开图片并转为 RGB，透明部分合成到 background 上
+
+    Args:
+        source: 文件路径或 PIL.Image
+        draft_size: 最终要缩放到的尺寸；JPEG 会直接以不小于它的缩小倍数解码，大图快很多
+    """
+    if Image is None:
+        raise ImportError("导入图片需要 Pillow（pip install pillow）")
+
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+    if draft_size and image.format == "JPEG":
+        image.draft("RGB", draft_size)
+    image.load()
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        base = Image.new("RGBA", rgba.size, ColorMapper.hex_to_rgb(background) + (255,))
+        return Image.alpha_composite(base, rgba).convert("RGB")
+    return image.convert("RGB")
+
+
+def target_size(image_size, width=None, height=None):
+    """目标格子数：只给一边时按原图比例计算另一边"""
+    image_width, image_height = image_size
+    if width is None and height is None:
+        raise ValueError("至少要指定宽度或高度")
+    if width is None:
+        width = round(image_width * height / image_height)
+    if height is None:
+        height = round(image_height * width / image_width)
+    if width < 1 or height < 1:
+        raise ValueError(f"目标尺寸无效: {width}×{height}")
+    return int(width), int(height)
+
+
+def quantize_rgb(rgb, color_mapper):
+    """把 (H, W, 3) RGB 数组映射到调色板最近色，返回 (H, W) 的 24 位整数颜色数组
+
+    先把像素打包成 24 位整数去重，只对出现过的颜色计算到调色板的距离
+    """
+    rgb = np.asarray(rgb, dtype=np.uint8)
+    packed = (rgb[..., 0].astype(np.int64) << 16) | (rgb[..., 1].astype(np.int64) << 8) | rgb[..., 2]
+    colors, inverse = np.unique(packed.reshape(-1), return_inverse=True)
+
+    unique_rgb = np.stack([(colors >> 16) & 0xFF, (colors >> 8) & 0xFF, colors & 0xFF], axis=1)
+    nearest = color_mapper.nearest_entries(unique_rgb)
+    return entries_to_values(nearest[inverse], color_mapper).reshape(packed.shape)
+
+
+def entries_to_values(entries, color_mapper):
+    """调色板条目下标 → 24 位整数颜色"""
+    palette_rgb = color_mapper.palette_rgb.astype(np.int64)
+    palette_values = (palette_rgb[:, 0] << 16) | (palette_rgb[:, 1] << 8) | palette_rgb[:, 2]
+    return palette_values[entries]
+
+
+def load_image(source, width=None, height=None, resample="box", color_mapper=None,
+               background=BACKGROUND_COLOR, dither=None, serpentine=False, background_error_cap=None):
+    """导入图片为像素画数据
+
+    Args:
+        source: 图片路径或 PIL.Image
+        width, height: 目标格子数，只给一边时按原图比例计算另一边
+        resample: 缩放方式 "box" / "nearest" / "lanczos"
+        color_mapper: ColorMapper，None 时新建
+        background: 透明部分合成到的颜色
+        dither: 抖动方法 "floyd_steinberg" / "atkinson" / "bayer"，None 表示直接取最近色
+        serpentine: 误差扩散时蛇形扫描（串行处理，比默认慢约 10 倍，大图要几秒）
+        background_error_cap: 误差扩散时取到背景色的像素向外扩散的误差上限，None 表示不限制
+
+    Returns:
+        {"width", "height", "grid": PixelGrid, "color_counts": {color: 像素数}}
+    """
+    if resample not in RESAMPLE_METHODS:
+        raise ValueError(f"未知的缩放方式: {resample}")
+    if dither is not None and dither not in DITHER_METHODS:
+        raise ValueError(f"未知的抖动方法: {dither}")
+    color_mapper = color_mapper or ColorMapper()
+
+    if Image is None:
+        raise ImportError("导入图片需要 Pillow（pip install pillow）")
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+    size = target_size(image.size, width, height)
+    image = open_rgb(image, background, draft_size=size)
+    if image.size != size:
+        image = image.resize(size, resample=getattr(Image.Resampling, RESAMPLE_METHODS[resample]))
+
+    rgb = np.asarray(image)
+    if dither:
+        entries = dither_entries(rgb, color_mapper, dither, serpentine, background_error_cap)
+        values = entries_to_values(entries, color_mapper)
+    else:
+        values = quantize_rgb(rgb, color_mapper)
+    grid = PixelGrid.from_values(values)
+    return {
+        "width": grid.width,
+        "height": grid.height,
+        "grid": grid,
+        "color_counts": grid.color_counts()
+    }
@@ -0,0 +1,107 @@
+"""
+输入后端接口 - 绘制引擎通过它操作鼠标、查询窗口和截图
+
+WindowsInput（win_input.py）驱动真实的游戏窗口；
+SimulatedInput（sim_input.py）把事件记到内存里的虚拟画板，用于在 Linux 上跑基准测试。
+"""
+import time
+from contextlib import contextmanager
+
+
+class InputBackend:
+    """输入后端基类
+
+    子类需要实现 focus_window、ensure_focus、click、click_many、double_click、drag、
+    move_mouse、get_window_rect 和 grab；会话管理、窗口锁定和 sleep 在这里统一实现。
+    """
+
+    def __init__(self):
+        self.target_hwnd = None
+        self.locked_hwnd = None # 添加锁定窗口
+
+        # 输入会话：会话内不再每次点击都聚焦窗口
+        self.session_depth = 0
+        self.focus_check_interval = 10  # 会话内每隔多少次操作检查一次前景窗口
+        self._events_since_check = 0
+
+        self.press_duration = 0.01  # 按下到松开的间隔（秒）
+        self.click_interval = 0.01  # 两次点击之间的间隔（秒）
+
+    def lock_window(self, hwnd):
+        """锁定目标窗口"""
+        self.locked_hwnd = hwnd
+        self.target_hwnd = hwnd
+        print(f"窗口已锁定: {hwnd}")
+
+    def unlock_window(self):
+        """解锁窗口"""
+        self.locked_hwnd = None
+        print("窗口已解锁")
+
+    def begin_session(self, check_interval=None):
+        """开始输入会话：立即聚焦一次窗口，之后只做廉价的前景窗口检查"""
+        if self.session_depth == 0:
+            self.focus_window()
+            self._events_since_check = 0
+            if check_interval:
+                self.focus_check_interval = check_interval
+        self.session_depth += 1
+
+    def end_session(self):
+        """结束输入会话，恢复每次操作前聚焦窗口"""
+        self.session_depth = max(0, self.session_depth - 1)
+
+    @contextmanager
+    def session(self, check_interval=None):
+        """输入会话上下文
+
+        用法:
+            with win_input.session():
+                win_input.click(x, y)
+        """
+        self.begin_session(check_interval)
+        try:
+            yield self
+        finally:
+            self.end_session()
+
+    def sleep(self, seconds):
+        """等待（模拟后端推进虚拟时钟，不真正等待）"""
+        time.sleep(seconds)
+
+    # ============ 子类实现 ============
+    def focus_window(self):
+        """将目标窗口置为前景窗口"""
+        raise NotImplementedError
+
+    def ensure_focus(self, force=False):
+        """确保目标窗口在前台"""
+        raise NotImplementedError
+
+    def click(self, x, y):
+        """在指定坐标点击"""
+        raise NotImplementedError
+
+    def click_many(self, points, should_stop=None):
+        """批量点击，返回已处理的点击数"""
+        raise NotImplementedError
+
+    def double_click(self, x, y):
+        """在指定坐标双击"""
+        raise NotImplementedError
+
+    def drag(self, points, move_rate=200):
+        """按住左键沿路径依次移动后松开"""
+        raise NotImplementedError
+
+    def move_mouse(self, x, y):
+        """移动鼠标到指定位置"""
+        raise NotImplementedError
+
+    def get_window_rect(self, hwnd):
+        """窗口位置 (left, top, right, bottom)"""
+        raise NotImplementedError
+
+    def grab(self, left, top, right, bottom):
+        """截取屏幕矩形区域（右下不含），返回 (H, W, 3) 的 uint8 数组"""
+        raise NotImplementedError
@@ -0,0 +1,132 @@
+"""
+绘制日志模块 - 记录绘制进度，程序崩溃、游戏断线或中途停止后可精确续画
+
+日志是一个只追加的文本文件：
+    第一行：计划头（JSON），包含计划哈希、区域、颜色顺序和重建计划所需的绘制选项
+    之后每行：C <颜色序号> <组内偏移>，表示该颜色组内前 <偏移> 项已画完
+    最后一行：D，表示整次绘制已完成
+写入先进缓冲，每 flush_every 个像素才 flush + fsync 一次，对点击循环几乎没有开销；
+崩溃时最后一行可能不完整，读取时忽略即可。
+"""
+import json
+import os
+
+
+class PaintJournal:
+    """绘制进度日志"""
+
+    def __init__(self, journal_file="paint_journal.log", flush_every=200):
+        """
+        Args:
+            journal_file: 日志文件路径
+            flush_every: 累计绘制多少个像素落盘一次
+        """
+        self.journal_file = journal_file
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
+        self._last = None
+
+    def begin(self, plan, region_info=None, colors=None, options=None):
+        """开始记录新的一次绘制（覆盖旧日志）
+
+        Args:
+            plan: 计划哈希
+            region_info: (start_row, start_col, size) 或 None
+            colors: 颜色绘制顺序（与当前所在分类有关，续画时需沿用）
+            options: 重建同一计划所需的绘制选项
+        """
+        self.close()
+        header = {
+            "plan": plan,
+            "region": list(region_info) if region_info else None,
+            "colors": list(colors or []),
+            "options": options or {}
+        }
+        self._file = open(self.journal_file, 'w', encoding='utf-8')
+        self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        self._sync()
+
+    def record(self, color_index, offset, count=0, force=False):
+        """记录进度
+
+        Args:
+            color_index: 当前颜色序号（从 0 开始）
+            offset: 该颜色组内已画完的项数
+            count: 本次新画的像素数，用于决定何时落盘
+            force: 立即落盘
+        """
+        if not self._file:
+            return
+        self._last = (color_index, offset)
+        self._pending += count
+        if force or self._pending >= self.flush_every:
+            self._write_last()
+
+    def complete(self):
+        """标记整次绘制已完成"""
+        if not self._file:
+            return
+        self._last = None
+        self._file.write("D\n")
+        self.close()
+
+    def close(self):
+        """写出最后的进度并关闭日志"""
+        if not self._file:
+            return
+        try:
+            self._write_last()
+            self._sync()
+        finally:
+            self._file.close()
+            self._file = None
+            self._last = None
+
+    def load(self):
+        """读取日志
+
+        Returns:
+            {"plan", "region", "colors", "options", "color_index", "offset", "done"}，
+            没有日志或日志损坏时返回 None
+        """
+        if not os.path.exists(self.journal_file):
+            return None
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                lines = f.read().split("\n")
+            header = json.loads(lines[0])
+        except Exception as e:
+            print(f"读取绘制日志失败: {e}")
+            return None
+
+        state = {
+            "plan": header.get("plan"),
+            "region": tuple(header["region"]) if header.get("region") else None,
+            "colors": header.get("colors", []),
+            "options": header.get("options", {}),
+            "color_index": 0,
+            "offset": 0,
+            "done": False
+        }
+        # 最后一行可能因崩溃而不完整，按行解析，格式不对的直接忽略
+        for line in lines[1:]:
+            parts = line.split()
+            if parts == ["D"]:
+                state["done"] = True
+            elif len(parts) == 3 and parts[0] == "C" and parts[1].isdigit() and parts[2].isdigit():
+                state["color_index"] = int(parts[1])
+                state["offset"] = int(parts[2])
+        return state
+
+    def _write_last(self):
+        if self._last is None:
+            return
+        self._file.write(f"C {self._last[0]} {self._last[1]}\n")
+        self._last = None
+        self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
@@ -0,0 +1,322 @@
+"""
+绘制计划模块 - 编译好的绘制计划（颜色选择顺序 + 每个颜色的屏幕坐标批次）和磁盘缓存
+
+计划由 PixelPainter.compile_plan 生成，保存为紧凑的 npz 二进制文件：
+    colors / categories / indices   每个颜色一条：颜色代码、调色板分类、分类内序号
+    color_starts                    每个颜色的绘制项在 item_starts 中的范围（长度 颜色数+1）
+    item_starts                     每个绘制项（单击为 1 格，笔画为一串格子，印章为 k×k 格）在 cells 中的范围
+    cells                           (N, 2) 格子 (row, col)，原图坐标，按绘制顺序排列
+    points                          (N, 2) 对应的屏幕坐标（校准时的位置，执行时再加窗口位移）
+    item_sizes                      笔刷模式下每个绘制项（印章）的笔刷尺寸，印章的第一个格子是点击的锚点
+    fills                           每个颜色一条：是否为油漆桶填充组（每项是一个连通区域，第一个格子是点击处）；
+                                    填充组排在所有画笔组之后，同一颜色可以各出现一次
+    passes                          每个颜色一条：渐进绘制时属于第几遍（从 0 开始），同一颜色每遍各出现一次
+缓存以像素内容、区域、校准数据和绘制选项的哈希为键，相同输入再次绘制时跳过分组、排序和路径优化。
+"""
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from brush_planner import expand_stamps
+
+# 计划格式或编译逻辑变化时加一，使旧缓存失效
+PLAN_VERSION = 4
+
+
+def expand_runs(runs):
+    """把笔画 (R, 4) 展开为按绘制顺序排列的格子
+
+    笔画是一行或一列上的连续格子，从 (start_row, start_col) 走到 (end_row, end_col)
+
+    Returns:
+        ((N, 2) 格子数组, (R,) 每个笔画的格子数)
+    """
+    runs = np.asarray(runs, dtype=np.int64).reshape(-1, 4)
+    starts = runs[:, 0:2]
+    steps = (runs[:, 2:4] > starts).astype(np.int64)
+    lengths = (runs[:, 2:4] - starts).sum(axis=1) + 1
+
+    # 每个格子在所属笔画中的序号
+    run_of_cell = np.repeat(np.arange(len(runs)), lengths)
+    first_cell = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    step_index = np.arange(int(lengths.sum())) - first_cell[run_of_cell]
+
+    cells = starts[run_of_cell] + step_index[:, None] * steps[run_of_cell]
+    return cells, lengths
+
+
+def plan_key(grid, params, cell_mask=None):
+    """计划缓存键：像素内容 + 编译参数（区域、校准数据、绘制选项等）的哈希
+
+    Args:
+        grid: 整张图的 PixelGrid
+        params: 影响计划的其他参数（需可 JSON 序列化）
+        cell_mask: 补画掩码，None 表示全部
+    """
+    digest = hashlib.sha1(f"v{PLAN_VERSION}".encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(",".join(grid.palette).encode())
+    digest.update(f"{grid.width}x{grid.height}".encode())
+    digest.update(np.ascontiguousarray(grid.indices).tobytes())
+    if cell_mask is not None:
+        digest.update(np.packbits(np.asarray(cell_mask, dtype=bool)).tobytes())
+    return digest.hexdigest()
+
+
+class PaintPlan:
+    """编译好的绘制计划"""
+
+    def __init__(self, colors, categories, indices, color_starts, item_starts, cells, points,
+                 stroke_mode=False, route_stats=None, item_sizes=None, fills=None, passes=None):
+        self.colors = [str(color) for color in colors]
+        self.categories = np.asarray(categories, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.color_starts = np.asarray(color_starts, dtype=np.int64)
+        self.item_starts = np.asarray(item_starts, dtype=np.int64)
+        self.cells = np.asarray(cells, dtype=np.int32).reshape(-1, 2)
+        self.points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        self.stroke_mode = bool(stroke_mode)
+        self.route_stats = route_stats
+        self.item_sizes = None if item_sizes is None else np.asarray(item_sizes, dtype=np.int32)
+        self.fills = (np.zeros(len(self.colors), dtype=bool) if fills is None 
+                      else np.asarray(fills, dtype=bool))
+        self.passes = (np.zeros(len(self.colors), dtype=np.int32) if passes is None 
+                       else np.asarray(passes, dtype=np.int32))
+        self._digest = None
+
+    @classmethod
+    def from_groups(cls, color_groups, color_mapper, coord_table, stroke_mode=False, route_stats=None,
+                    brush_mode=False, fill_groups=None, passes=None):
+        """由分好组、排好序的绘制项构建计划
+
+        Args:
+            color_groups: {color: 绘制项数组} 或 [(color, 绘制项数组), ...]（渐进绘制时同一颜色每遍一组），
+                          按绘制顺序排列；单击模式为 (N, 2) 格子，笔画模式为 (R, 4) 笔画，
+                          笔刷模式为 (M, 3) 印章 (row, col, size)，均为原图坐标
+            color_mapper: ColorMapper
+            coord_table: CanvasCoordTable（整张图的坐标表）
+            fill_groups: {color: [(K, 2) 连通区域格子, ...]}，排在画笔组之后的油漆桶填充
+            passes: 每个画笔组属于渐进绘制的第几遍，None 表示都是第 0 遍（填充组排在最后一遍之后）
+        """
+        if isinstance(color_groups, dict):
+            color_groups = list(color_groups.items())
+        fill_groups = fill_groups or {}
+        colors = [color for color, _ in color_groups] + list(fill_groups)
+        entries = color_mapper.color_entries(colors)
+        categories = color_mapper.palette_categories[entries]
+        indices = color_mapper.palette_indices[entries]
+        color_starts = [0]
+        item_lengths = []
+        cells = []
+        item_sizes = []
+        for color, items in color_groups:
+            if brush_mode:
+                color_cells, lengths = expand_stamps(items)
+                item_sizes.append(np.asarray(items, dtype=np.int32).reshape(-1, 3)[:, 2])
+            elif stroke_mode:
+                color_cells, lengths = expand_runs(items)
+            else:
+                color_cells = np.asarray(items, dtype=np.int64).reshape(-1, 2)
+                lengths = np.ones(len(color_cells), dtype=np.int64)
+            cells.append(color_cells)
+            item_lengths.append(lengths)
+            color_starts.append(color_starts[-1] + len(lengths))
+        for color, components in fill_groups.items():
+            color_cells = np.concatenate(components).astype(np.int64)
+            lengths = np.array([len(component) for component in components], dtype=np.int64)
+            cells.append(color_cells)
+            item_lengths.append(lengths)
+            color_starts.append(color_starts[-1] + len(lengths))
+            if brush_mode:
+                item_sizes.append(np.zeros(len(lengths), dtype=np.int32))
+
+        item_lengths = np.concatenate(item_lengths) if item_lengths else np.zeros(0, dtype=np.int64)
+        item_starts = np.zeros(len(item_lengths) + 1, dtype=np.int64)
+        np.cumsum(item_lengths, out=item_starts[1:])
+
+        cells = (np.concatenate(cells) if cells else np.zeros((0, 2))).astype(np.int32)
+        points = np.empty_like(cells)
+        points[:, 0] = coord_table.base_xs[cells[:, 1]]
+        points[:, 1] = coord_table.base_ys[cells[:, 0]]
+
+        if brush_mode:
+            item_sizes = np.concatenate(item_sizes) if item_sizes else np.zeros(0, dtype=np.int32)
+        else:
+            item_sizes = None
+        fills = [False] * len(color_groups) + [True] * len(fill_groups)
+        passes = list(passes) if passes is not None else [0] * len(color_groups)
+        passes += [max(passes, default=-1) + 1] * len(fill_groups)
+        return cls(colors, categories, indices, color_starts,
+                   item_starts, cells, points, stroke_mode, route_stats, item_sizes, fills, passes)
+
+    @property
+    def brush_mode(self):
+        return self.item_sizes is not None
+
+    @property
+    def pass_count(self):
+        """渐进绘制的遍数（不分遍时为 1，油漆桶填充算单独一遍）"""
+        return int(self.passes.max()) + 1 if len(self.passes) else 0
+
+    @property
+    def color_count(self):
+        return len(self.colors)
+
+    @property
+    def total_pixels(self):
+        return len(self.cells)
+
+    @property
+    def digest(self):
+        """计划内容的哈希（绘制日志用它确认续画时计划没有变化）"""
+        if self._digest is None:
+            digest = hashlib.sha1(",".join(self.colors).encode())
+            for array in (self.color_starts, self.item_starts, self.cells):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            if self.brush_mode:
+                digest.update(np.ascontiguousarray(self.item_sizes).tobytes())
+            if self.fills.any():
+                digest.update(np.packbits(self.fills).tobytes())
+            if self.passes.any():
+                digest.update(np.ascontiguousarray(self.passes).tobytes())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def item_count(self, color_index):
+        """该颜色的绘制项数（单击模式为像素数，笔画模式为笔画数，笔刷模式为印章数，填充组为区域数）"""
+        return int(self.color_starts[color_index + 1] - self.color_starts[color_index])
+
+    def _cell_range(self, color_index, start=0, stop=None):
+        """该颜色第 start..stop 个绘制项在 cells 中的范围"""
+        first = self.color_starts[color_index]
+        if stop is None:
+            stop = self.item_count(color_index)
+        return int(self.item_starts[first + start]), int(self.item_starts[first + stop])
+
+    def pixel_count(self, color_index, start=0, stop=None):
+        """该颜色第 start..stop 个绘制项包含的像素数"""
+        begin, end = self._cell_range(color_index, start, stop)
+        return end - begin
+
+    def pixels_before(self, color_index, item=0):
+        """计划中排在该颜色第 item 项之前的像素数（续画时计算已完成的进度）"""
+        return int(self.item_starts[self.color_starts[color_index] + item])
+
+    def cells_of(self, color_index, start=0, stop=None):
+        """该颜色第 start..stop 个绘制项的格子 (M, 2) 数组"""
+        begin, end = self._cell_range(color_index, start, stop)
+        return self.cells[begin:end]
+
+    def points_of(self, color_index, start=0, stop=None, offset=(0, 0)):
+        """该颜色第 start..stop 个绘制项的屏幕坐标列表 [[x, y], ...]
+
+        Args:
+            offset: 窗口相对校准时的位移 (dx, dy)
+        """
+        begin, end = self._cell_range(color_index, start, stop)
+        points = self.points[begin:end]
+        if offset != (0, 0):
+            points = points + np.array(offset, dtype=np.int32)
+        return points.tolist()
+
+    def sizes_of(self, color_index, start=0, stop=None):
+        """笔刷模式下该颜色第 start..stop 个印章的笔刷尺寸数组"""
+        first = int(self.color_starts[color_index])
+        if stop is None:
+            stop = self.item_count(color_index)
+        return self.item_sizes[first + start:first + stop]
+
+    def anchor_points(self, color_index, start=0, stop=None, offset=(0, 0)):
+        """该颜色第 start..stop 个绘制项第一个格子的屏幕坐标列表 [[x, y], ...]
+
+        即笔刷印章的锚点、填充区域的点击处
+        """
+        first = int(self.color_starts[color_index])
+        if stop is None:
+            stop = self.item_count(color_index)
+        points = self.points[self.item_starts[first + start:first + stop]]
+        if offset != (0, 0):
+            points = points + np.array(offset, dtype=np.int32)
+        return points.tolist()
+
+    def save(self, path):
+        """保存为 npz（不压缩，加载时直接读数组）"""
+        route_stats = self.route_stats or {}
+        with open(path, 'wb') as f:
+            np.savez(f,
+                     version=np.int32(PLAN_VERSION),
+                     colors=np.array(self.colors, dtype="U16"),
+                     categories=self.categories,
+                     indices=self.indices,
+                     color_starts=self.color_starts,
+                     item_starts=self.item_starts,
+                     cells=self.cells,
+                     points=self.points,
+                     stroke_mode=np.bool_(self.stroke_mode),
+                     brush_mode=np.bool_(self.brush_mode),
+                     item_sizes=self.item_sizes if self.brush_mode else np.zeros(0, dtype=np.int32),
+                     fills=self.fills,
+                     passes=self.passes,
+                     route_stats=np.array([route_stats.get("before", -1), route_stats.get("after", -1)],
+                                          dtype=np.float64))
+
+    @classmethod
+    def load(cls, path):
+        """从 npz 加载，格式版本不一致时返回 None"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != PLAN_VERSION:
+                return None
+            before, after = data["route_stats"].tolist()
+            route_stats = {"before": before, "after": after} if before >= 0 else None
+            item_sizes = data["item_sizes"] if bool(data["brush_mode"]) else None
+            return cls(data["colors"].tolist(), data["categories"], data["indices"],
+                       data["color_starts"], data["item_starts"], data["cells"], data["points"],
+                       bool(data["stroke_mode"]), route_stats, item_sizes, data["fills"], data["passes"])
+
+
+class PlanCache:
+    """绘制计划的磁盘缓存（每个计划一个 <key>.npz，只保留最近使用的 max_entries 个）"""
+
+    def __init__(self, cache_dir="plan_cache", max_entries=32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key):
+        """读取缓存的计划，没有或损坏时返回 None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            plan = PaintPlan.load(path)
+        except Exception as e:
+            print(f"读取计划缓存失败: {e}")
+            return None
+        if plan is not None:
+            os.utime(path)  # 记录最近使用时间
+        return plan
+
+    def put(self, key, plan):
+        """写入缓存（先写临时文件再改名，避免中途崩溃留下半个文件）"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = self._path(key) + ".tmp"
+            plan.save(temp_path)
+            os.replace(temp_path, self._path(key))
+            self._evict()
+        except Exception as e:
+            print(f"保存计划缓存失败: {e}")
+
+    def _evict(self):
+        """删除最久未使用的缓存"""
+        paths = sorted(glob.glob(os.path.join(self.cache_dir, "*.npz")), key=os.path.getmtime)
+        for path in paths[:-self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -1,13 +1,37 @@
 import json
 import time
 import os
-import win32gui
+import random
+import numpy as np
 from color_mapper import ColorMapper
 from win_input import win_input
-import math
+from route_optimizer import optimize_routes
+from brush_planner import normalize_brush_sizes, plan_stamps
+from fill_planner import plan_fills
+from pass_planner import plan_passes
+from coord_table import CanvasCoordTable
+from click_tuner import ClickRateTuner
+from canvas_capture import sample_cells
+from canvas_verify import find_mismatches, diff_grids
+from image_ingest import BACKGROUND_COLOR
+from paint_journal import PaintJournal
+from paint_plan import PaintPlan, PlanCache, plan_key
+from pixel_grid import pixel_grid_of
+
+# 翻页前先点一下的空白处（关闭可能弹出的面板），校准时的屏幕坐标
+DISMISS_POINT = (1200, 900)
+
+# 界面按钮（翻页、色块、笔刷、工具）点击前的停顿（秒）：紧跟在快速连点后面的界面点击
+# 容易被游戏漏掉，漏掉后分类或颜色就和记录的不一致了
+UI_CLICK_PAUSE = 0.05
 
 class PixelPainter:
-    def __init__(self):
+    def __init__(self, input_backend=None):
+        """
+        Args:
+            input_backend: 输入后端（InputBackend），默认驱动真实窗口的 win_input
+        """
+        self.input = input_backend or win_input
         self.color_mapper = ColorMapper()
         
         # 窗口信息
@@ -23,20 +47,43 @@ class PixelPainter:
         # 旧的绝对坐标（用于GUI显示）
         self.grid_start = None
         self.grid_end = None
+        self.calibration_window_rect = None  # 校准时的窗口位置，用于窗口移动后平移坐标
+        self.coord_table = None  # 格子 → 屏幕坐标查找表
         
         # 颜色选择器坐标
         self.color_left_btn = None
         self.color_right_btn = None
         self.color_positions = []
         
+        # 笔刷尺寸按钮 {尺寸: (x, y)}，使用大笔刷时 1×1 按钮也要校准（画完换回来）
+        self.brush_buttons = {}
+        
+        # 绘图工具按钮（油漆桶填充用，填充完换回画笔）
+        self.pen_tool_btn = None
+        self.fill_tool_btn = None
+        
         # 状态控制
         self.is_paused = False
         self.is_stopped = False
         self.current_category = 1
+        self.current_brush = 1  # 当前笔刷尺寸（游戏默认 1×1）
+        self.current_tool = "pen"  # 当前绘图工具 "pen" / "fill"
+        self.last_color_order = []  # 上次绘制的颜色顺序（续画时沿用）
+        self.click_batch_size = 50  # 每次交给输入层批量点击的像素数
+        self.journal = PaintJournal()  # 绘制进度日志（崩溃后续画）
+        self.plan_cache = PlanCache()  # 编译好的绘制计划缓存，None 表示不缓存
+        self._grid_cache = None  # (json_data, PixelGrid)，同一份像素数据只转换一次
+        self._autotune_cells = []  # 自动调速：当前颜色上次抽查之后画的格子
         
         # 配置文件
         self.config_file = "painter_config.json"
         self.config = self.load_config()
+        
+        # 点击速率（按机器保存的自动调速结果）
+        self.click_tuner = ClickRateTuner()
+        if self.click_tuner.loaded:
+            self.click_tuner.apply(self.input)
+            print(f"✓ 已加载本机点击速率: {self.click_tuner.clicks_per_second:.0f} 次/秒")
     
     def set_window(self, hwnd):
         """设置目标窗口"""
@@ -47,41 +94,66 @@ class PixelPainter:
     def update_window_rect(self):
         """更新窗口位置（窗口可能移动）"""
         if self.window_hwnd:
-            self.window_rect = win32gui.GetWindowRect(self.window_hwnd)
+            self.window_rect = self.input.get_window_rect(self.window_hwnd)
             print('窗口位置：',self.window_rect)
+            
+            # 窗口移动后只需平移坐标表
+            if self.coord_table:
+                self.coord_table.set_offset(*self._window_offset())
             return True
         return False
-
-    def calculate_pixel_pos(self, row, col, width, height):
-        """计算像素格的中心坐标"""
+    
+    def _window_offset(self):
+        """窗口相对校准时的位移 (dx, dy)"""
+        if not self.window_rect or not self.calibration_window_rect:
+            return (0, 0)
+        return (self.window_rect[0] - self.calibration_window_rect[0],
+                self.window_rect[1] - self.calibration_window_rect[1])
+    
+    def rebase_calibration(self):
+        """把已校准的坐标平移到当前窗口位置，并以当前位置作为校准基准
+        
+        重新校准任何一个坐标前调用：新坐标是在当前窗口位置下取的，
+        其余坐标也要换算到同一基准，之后窗口再移动时才能一起平移。
+        """
+        if not self.update_window_rect():
+            return
+        dx, dy = self._window_offset()
+        if dx or dy:
+            def shift(point):
+                return (point[0] + dx, point[1] + dy) if point else point
+            
+            self.grid_start = shift(self.grid_start)
+            self.grid_end = shift(self.grid_end)
+            self.color_left_btn = shift(self.color_left_btn)
+            self.color_right_btn = shift(self.color_right_btn)
+            self.color_positions = [shift(p) for p in self.color_positions]
+            self.brush_buttons = {size: shift(p) for size, p in self.brush_buttons.items()}
+            self.pen_tool_btn = shift(self.pen_tool_btn)
+            self.fill_tool_btn = shift(self.fill_tool_btn)
+            self.coord_table = None
+            print(f"已把校准坐标平移到当前窗口位置 ({dx:+d}, {dy:+d})")
+        self.calibration_window_rect = self.window_rect
+    
+    def get_coord_table(self, width, height):
+        """获取格子 → 屏幕坐标查找表，校准或图片尺寸变化时重建"""
         if not self.grid_start or not self.grid_end:
             raise Exception("画板未校准")
         
-        win32_left, win32_top = self.grid_start
-        win32_right, win32_bottom = self.grid_end
+        if not self.coord_table or not self.coord_table.matches(self.grid_start, self.grid_end, width, height):
+            self.coord_table = CanvasCoordTable(self.grid_start, self.grid_end, width, height, 
+                                                self._window_offset())
+        return self.coord_table
 
-        # SCALE_FACTOR = 1.5
-        # win32_left, win32_top = [544,277]
-        # win32_right, win32_bottom = [1129,862]
+    def get_pixel_grid(self, json_data):
+        """像素数据的调色板索引网格（同一份 json_data 只构建一次）"""
+        if self._grid_cache is None or self._grid_cache[0] is not json_data:
+            self._grid_cache = (json_data, pixel_grid_of(json_data))
+        return self._grid_cache[1]
 
-        # win32_left, win32_top = [round(left/SCALE_FACTOR),round(top/SCALE_FACTOR)]
-        # win32_right, win32_bottom = [round(right/SCALE_FACTOR),round(bottom/SCALE_FACTOR)]
-        
-        # 画板在 pynput 坐标系中的尺寸
-        canvas_width = win32_right - win32_left
-        canvas_height = win32_bottom - win32_top
-        
-        # 每个像素格的尺寸
-        pixel_width = canvas_width / width
-        pixel_height = canvas_height / height
-        
-        # 计算中心坐标（pynput 坐标系）
-        win32_x = math.floor(win32_left + col * pixel_width)
-        win32_y = math.floor(win32_top + row * pixel_height)
-        
-        print(f"像素({row},{col}): win32({win32_x},{win32_y})")
-        
-        return (win32_x, win32_y)
+    def calculate_pixel_pos(self, row, col, width, height):
+        """计算像素格的中心坐标"""
+        return self.get_coord_table(width, height).point(row, col)
 
     
     def test_click_points(self, width, height):
@@ -102,17 +174,19 @@ class PixelPainter:
             (height - 1, width - 1, "右下角"),
         ]
         
+        coord_table = self.get_coord_table(width, height)
+        
         for row, col, position_name in test_points:
             # 计算位置
-            x, y = self.calculate_pixel_pos(row, col, width, height)
+            x, y = coord_table.point(row, col)
 
             print(f"\n📍 {position_name}")
             print(f"   像素坐标: ({row}, {col})")
             print(f"   屏幕坐标: ({x}, {y})")
 
             # 点击测试点
-            win_input.click(x, y)
-            time.sleep(0.3)
+            self.input.click(x, y)
+            self.input.sleep(0.3)
 
         # # 固定参数
         # canvas_center = (835, 568)
@@ -170,6 +244,10 @@ class PixelPainter:
                 self.color_left_btn = tuple(config["color_left_btn"]) if config.get("color_left_btn") else None
                 self.color_right_btn = tuple(config["color_right_btn"]) if config.get("color_right_btn") else None
                 self.color_positions = [tuple(p) for p in config.get("color_positions", [])]
+                self.brush_buttons = {int(size): tuple(p) for size, p in config.get("brush_buttons", {}).items()}
+                self.pen_tool_btn = tuple(config["pen_tool_btn"]) if config.get("pen_tool_btn") else None
+                self.fill_tool_btn = tuple(config["fill_tool_btn"]) if config.get("fill_tool_btn") else None
+                self.calibration_window_rect = tuple(config["calibration_window_rect"]) if config.get("calibration_window_rect") else None
                 
                 print("✓ 已加载保存的坐标配置（绝对屏幕坐标）")
                 return config
@@ -181,12 +259,20 @@ class PixelPainter:
 
     def save_config(self):
         """保存配置 - 使用绝对坐标"""
+        # 记录校准时的窗口位置（之后窗口移动时据此平移坐标）
+        if not self.calibration_window_rect and self.update_window_rect():
+            self.calibration_window_rect = self.window_rect
+        
         config = {
             "grid_start": list(self.grid_start) if self.grid_start else None,
             "grid_end": list(self.grid_end) if self.grid_end else None,
             "color_left_btn": list(self.color_left_btn) if self.color_left_btn else None,
             "color_right_btn": list(self.color_right_btn) if self.color_right_btn else None,
-            "color_positions": [list(p) for p in self.color_positions]
+            "color_positions": [list(p) for p in self.color_positions],
+            "brush_buttons": {str(size): list(p) for size, p in sorted(self.brush_buttons.items())},
+            "pen_tool_btn": list(self.pen_tool_btn) if self.pen_tool_btn else None,
+            "fill_tool_btn": list(self.fill_tool_btn) if self.fill_tool_btn else None,
+            "calibration_window_rect": list(self.calibration_window_rect) if self.calibration_window_rect else None
         }
         
         with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -215,17 +301,25 @@ class PixelPainter:
             print('向左切换')
         
         # 执行切换
+        dx, dy = self._window_offset()
         for _ in range(clicks):
-            win_input.click(1200,900)
-            win_input.click(button[0], button[1])
-            time.sleep(0.5)  # 等待切换动画
+            self.input.sleep(UI_CLICK_PAUSE)
+            self.input.click(DISMISS_POINT[0] + dx, DISMISS_POINT[1] + dy)
+            self.input.sleep(UI_CLICK_PAUSE)
+            self.input.click(button[0] + dx, button[1] + dy)
+            self.input.sleep(0.5)  # 等待切换动画
         
         self.current_category = target_category
     
-    def select_color(self, hex_color):
-        """选择指定颜色"""
+    def select_color(self, hex_color, position=None):
+        """选择指定颜色
+        
+        Args:
+            position: 已知的调色板位置 {"category", "index"}（如编译好的计划中的），None 时查询
+        """
         # 获取颜色在调色板中的位置
-        position = self.color_mapper.get_color_position(hex_color)
+        if position is None:
+            position = self.color_mapper.get_color_position(hex_color)
         category = position["category"]
         index = position["index"]
         
@@ -235,30 +329,94 @@ class PixelPainter:
         # 点击对应的颜色块
         if index < len(self.color_positions):
             color_pos = self.color_positions[index]
-            win_input.click(color_pos[0], color_pos[1])
-            time.sleep(0.02)
+            dx, dy = self._window_offset()
+            self.input.sleep(UI_CLICK_PAUSE)
+            self.input.click(color_pos[0] + dx, color_pos[1] + dy)
+            self.input.sleep(0.02)
         else:
             raise Exception(f"颜色索引 {index} 超出范围")
         
     
-    def paint_from_json(self, json_data, progress_callback=None, start_color_index=1, region_info=None):
-        """从JSON数据绘制像素画
+    def select_brush(self, size):
+        """切换笔刷尺寸（点击校准好的尺寸按钮）"""
+        if size == self.current_brush:
+            return
         
-        Args:
-            json_data: 像素数据
-            progress_callback: 进度回调函数
-            start_color_index: 从第几个颜色开始绘制
-            region_info: (start_row, start_col, size) 区域信息，None表示绘制全图
+        button = self.brush_buttons.get(size)
+        if button is None:
+            raise Exception(f"笔刷 {size}×{size} 的按钮未校准")
+        
+        dx, dy = self._window_offset()
+        self.input.sleep(UI_CLICK_PAUSE)
+        self.input.click(button[0] + dx, button[1] + dy)
+        self.input.sleep(0.1)  # 等待切换
+        self.current_brush = size
+    
+    def select_tool(self, tool):
+        """切换绘图工具 "pen"（画笔）/ "fill"（油漆桶）"""
+        if tool == self.current_tool:
+            return
+        
+        button = self.fill_tool_btn if tool == "fill" else self.pen_tool_btn
+        if button is None:
+            raise Exception(f"{'油漆桶' if tool == 'fill' else '画笔'}按钮未校准")
+        
+        dx, dy = self._window_offset()
+        self.input.sleep(UI_CLICK_PAUSE)
+        self.input.click(button[0] + dx, button[1] + dy)
+        self.input.sleep(0.1)  # 等待切换
+        self.current_tool = tool
+    
+    def compile_plan(self, json_data, region_info=None, stroke_mode=False, stroke_direction="horizontal",
+                     route_method="hilbert", color_order="palette", cell_mask=None, 
+                     paint_background=False, previous_order=None, brush_sizes=None, bucket_fill=False,
+                     progressive=None, start_category=None):
+        """把像素数据编译为绘制计划（颜色选择顺序 + 每个颜色的屏幕坐标批次）
+        
+        相同的像素、区域、校准数据和选项再次编译时直接读取磁盘缓存。
+        参数含义同 paint_from_json；previous_order 为续画时沿用的颜色顺序。
+        可以在后台线程中调用（只读校准数据和配色，不改变画笔状态）。
+        
+        Returns:
+            PaintPlan，没有需要绘制的像素时返回 None
         """
         width = json_data["width"]
         height = json_data["height"]
-        pixels = json_data["pixels"]
+        grid = self.get_pixel_grid(json_data)
         
         # 定义要跳过的背景色
         BACKGROUND_COLORS = {"#F9F6E9"}
         
-        self.is_stopped = False
-        self.is_paused = False
+        coord_table = self.get_coord_table(width, height)
+        
+        # 颜色排序的起始分类
+        if start_category is None:
+            start_category = self.current_category
+        
+        # 计划缓存：颜色排序与起始分类有关，起始分类也是缓存键的一部分
+        cache_key = None
+        if self.plan_cache:
+            start_time = time.time()
+            cache_key = plan_key(grid, {
+                "region": list(region_info) if region_info else None,
+                "grid": [list(self.grid_start), list(self.grid_end)],
+                "stroke_mode": stroke_mode,
+                "stroke_direction": stroke_direction,
+                "route_method": route_method,
+                "color_order": color_order,
+                "paint_background": paint_background,
+                "match_mode": self.color_mapper.match_mode,
+                "current_category": start_category,
+                "previous_order": list(previous_order) if previous_order else None,
+                "brush_sizes": sorted(brush_sizes) if brush_sizes else None,
+                "bucket_fill": bucket_fill,
+                "progressive": progressive
+            }, cell_mask)
+            plan = self.plan_cache.get(cache_key)
+            if plan is not None:
+                print(f"✓ 使用缓存的绘制计划: {plan.color_count} 个颜色, {plan.total_pixels} 个像素 "
+                      f"(耗时 {time.time() - start_time:.3f}s)")
+                return plan
         
         print(f"\n{'='*50}")
         print(f"原始图片大小: {width}×{height}")
@@ -282,65 +440,280 @@ class PixelPainter:
             
             if actual_height <= 0 or actual_width <= 0:
                 print(f"❌ 区域无效，无像素可绘制")
-                return
-            
-            # ✅ 裁剪像素数据
-            cropped_pixels = []
-            for row in range(start_row, end_row):
-                if row < len(pixels):
-                    row_data = pixels[row]
-                    if start_col < len(row_data):
-                        cropped_pixels.append(row_data[start_col:end_col])
+                return None
             
-            if not cropped_pixels:
-                print(f"❌ 裁剪后无像素数据")
-                return
-            
-            # 更新参数
-            pixels = cropped_pixels
-            width = actual_width
-            height = len(cropped_pixels)
+            # ✅ 区域是索引数组的视图，不复制像素
+            grid = grid.region(start_row, start_col, region_size)
+            width = grid.width
+            height = grid.height
             
-            print(f"裁剪后像素数据: {width}×{height}, 共 {len(cropped_pixels)} 行")
+            print(f"区域像素数据: {width}×{height}")
         else:
             print(f"全图绘制模式")
         
-        print(f"背景色（将跳过）: {', '.join(BACKGROUND_COLORS)}")
+        if stroke_mode:
+            print(f"笔画模式启用: 方向 {stroke_direction}")
+        if brush_sizes:
+            print(f"笔刷模式启用: {', '.join(f'{size}×{size}' for size in sorted(brush_sizes, reverse=True))}")
+        if bucket_fill:
+            print("油漆桶填充启用")
+        if progressive:
+            print(f"渐进绘制启用: {progressive}")
+        
+        if not paint_background:
+            print(f"背景色（将跳过）: {', '.join(BACKGROUND_COLORS)}")
         print(f"{'='*50}\n")
         
-        total_pixels = width * height
-        current_pixel = 0
+        # 区域绘制时裁剪区域在原图中的起点
+        row_offset, col_offset = (start_row, start_col) if region_info else (0, 0)
+        
+        # 只绘制掩码中的格子
+        if cell_mask is not None:
+            cell_mask = cell_mask[row_offset:row_offset + height, col_offset:col_offset + width]
+            total_pixels = int(cell_mask.sum())
+            print(f"只绘制指定的 {total_pixels} 个格子")
+        else:
+            total_pixels = width * height
         
         if total_pixels == 0:
             print("❌ 没有像素需要绘制")
-            return
+            return None
         
         print(f"开始处理，总像素数: {total_pixels}")
         
-        try:
-            # 按颜色分组绘制
-            color_groups = self._group_pixels_by_color(pixels, width, height)
+        # 按颜色分组绘制（格子为原图坐标）
+        color_groups = grid.group_by_color(cell_mask)
+        
+        print(f"初始颜色分组数: {len(color_groups)}")
+        
+        # 过滤背景色
+        original_count = len(color_groups)
+        color_groups = {color: positions for color, positions in color_groups.items() 
+                    if paint_background or color.upper() not in BACKGROUND_COLORS}
+        
+        skipped_bg_count = original_count - len(color_groups)
+        if skipped_bg_count > 0:
+            print(f"✓ 已过滤 {skipped_bg_count} 个背景色分组")
+        
+        print(f"有效颜色分组数: {len(color_groups)}")
+        
+        # 油漆桶：边界画完后一键填充的连通区域（只在空白画板上可靠，补画时不用）
+        fill_groups = {}
+        if bucket_fill and cell_mask is not None:
+            print("⚠️ 补画时画板不是空白的，不使用油漆桶")
+        elif bucket_fill and color_groups:
+            start_time = time.time()
+            background_entries = set(self.color_mapper.color_entries(sorted(BACKGROUND_COLORS)).tolist())
+            open_colors = [color for color, entry in 
+                           zip(grid.palette, self.color_mapper.color_entries(grid.palette).tolist())
+                           if color.upper() in BACKGROUND_COLORS or entry in background_entries]
+            fill_groups, filled = plan_fills(grid, open_colors, (json_data["height"], json_data["width"]))
             
-            print(f"初始颜色分组数: {len(color_groups)}")
+            # 填充的格子不再逐格绘制
+            color_groups = {color: positions[~filled[positions[:, 0] - row_offset, positions[:, 1] - col_offset]]
+                            for color, positions in color_groups.items()}
+            color_groups = {color: positions for color, positions in color_groups.items() if len(positions)}
+            fill_count = sum(len(components) for components in fill_groups.values())
+            print(f"油漆桶规划: {int(filled.sum())} 格由 {fill_count} 次填充完成 "
+                  f"(耗时 {time.time() - start_time:.2f}s)")
+        
+        if not color_groups and not fill_groups:
+            print("❌ 过滤后没有有效颜色需要绘制")
+            return None
+        
+        # 渐进绘制：格子分成由粗到细的几遍，每遍都画所有颜色
+        pass_groups = [color_groups] if color_groups else []
+        if progressive and color_groups:
+            pass_groups = plan_passes(grid, color_groups, progressive)
+            pass_sizes = [sum(len(positions) for positions in groups.values()) for groups in pass_groups]
+            print(f"渐进绘制({progressive}): {len(pass_groups)} 遍，每遍格子数 {' / '.join(map(str, pass_sizes))}")
+        
+        # 颜色排序：每一遍每个分类只翻到一次
+        if color_order == "palette":
+            colors = [color for groups in pass_groups for color in groups] + list(fill_groups)
+            switch_cost_before = self._category_switch_cost(colors, start_category)
             
-            # 过滤背景色
-            original_count = len(color_groups)
-            color_groups = {color: positions for color, positions in color_groups.items() 
-                        if color.upper() not in BACKGROUND_COLORS}
+            # 每一遍和填充组都从上一段结束时的分类出发排序
+            category = start_category
+            for pass_index, groups in enumerate(pass_groups):
+                pass_colors = list(groups)
+                
+                # 排序与当前分类有关，续画时要沿用上次的顺序，保证起始颜色索引含义不变
+                # （后面各遍和填充组的顺序由第一遍决定）
+                previous = list(previous_order[:len(pass_colors)]) if previous_order and pass_index == 0 else None
+                if previous and len(previous) == len(pass_colors) and set(previous) == set(pass_colors):
+                    pass_colors = previous
+                    print("续画模式：沿用上次的颜色顺序")
+                else:
+                    pass_colors = self._order_colors_by_palette(pass_colors, category)
+                
+                pass_groups[pass_index] = {color: groups[color] for color in pass_colors}
+                category = self.color_mapper.get_color_position(pass_colors[-1])["category"]
             
-            skipped_bg_count = original_count - len(color_groups)
-            if skipped_bg_count > 0:
-                print(f"✓ 已过滤 {skipped_bg_count} 个背景色分组")
+            if fill_groups:
+                fill_colors = self._order_colors_by_palette(list(fill_groups), category)
+                fill_groups = {color: fill_groups[color] for color in fill_colors}
             
-            total_color_count = len(color_groups)
-            print(f"有效颜色分组数: {total_color_count}")
+            colors = [color for groups in pass_groups for color in groups] + list(fill_groups)
+            print(f"颜色排序: 分类翻页 {switch_cost_before} → "
+                  f"{self._category_switch_cost(colors, start_category)} 次")
+        
+        # 以 (遍, 颜色) 为键，同一颜色每遍各是一组
+        color_groups = {(pass_index, color): positions for pass_index, groups in enumerate(pass_groups)
+                        for color, positions in groups.items()}
+        
+        # 笔画模式：预先合并连续格子
+        if stroke_mode:
+            color_groups = {color: self._group_positions_into_runs(positions, stroke_direction)
+                            for color, positions in color_groups.items()}
+        
+        # 笔刷模式：大片同色区域用大笔刷印章覆盖
+        if brush_sizes:
+            start_time = time.time()
+            cell_count = sum(len(positions) for positions in color_groups.values())
+            color_groups = {color: plan_stamps(positions, brush_sizes) 
+                            for color, positions in color_groups.items()}
+            stamp_count = sum(len(stamps) for stamps in color_groups.values())
+            print(f"笔刷规划: {cell_count} 格 → {stamp_count} 次点击 (耗时 {time.time() - start_time:.2f}s)")
+        
+        # 路径优化：减少同色像素之间的光标移动
+        route_stats = None
+        if route_method and brush_sizes:
+            # 同一尺寸的印章一起优化，画的时候同色同尺寸的连续画完
+            start_time = time.time()
+            color_groups, route_stats = self._optimize_stamp_routes(color_groups, route_method)
             
-            if total_color_count == 0:
-                print("❌ 过滤后没有有效颜色需要绘制")
-                return
+            before, after = route_stats["before"], route_stats["after"]
+            saved = (1 - after / before) * 100 if before > 0 else 0
+            print(f"路径优化({route_method}): 光标移动 {before:.0f} → {after:.0f} 格 "
+                  f"(减少 {saved:.1f}%, 耗时 {time.time() - start_time:.2f}s)")
+        elif route_method:
+            start_time = time.time()
+            color_groups, route_stats = optimize_routes(color_groups, route_method)
+            
+            before, after = route_stats["before"], route_stats["after"]
+            saved = (1 - after / before) * 100 if before > 0 else 0
+            print(f"路径优化({route_method}): 光标移动 {before:.0f} → {after:.0f} 格 "
+                  f"(减少 {saved:.1f}%, 耗时 {time.time() - start_time:.2f}s)")
+        
+        if brush_sizes:
+            color_groups = self._order_stamp_sizes(color_groups)
+        
+        plan = PaintPlan.from_groups([(color, items) for (_, color), items in color_groups.items()], 
+                                     self.color_mapper, coord_table, stroke_mode, route_stats, 
+                                     brush_mode=bool(brush_sizes), fill_groups=fill_groups,
+                                     passes=[pass_index for pass_index, _ in color_groups])
+        if cache_key:
+            self.plan_cache.put(cache_key, plan)
+        return plan
+    
+    def paint_from_json(self, json_data, progress_callback=None, start_color_index=1, region_info=None,
+                        stroke_mode=False, stroke_direction="horizontal", move_rate=200,
+                        route_method="hilbert", color_order="palette", autotune=False,
+                        cell_mask=None, paint_background=False, match_mode="rgb", brush_sizes=None,
+                        bucket_fill=False, progressive=None, start_category=None, resume=False):
+        """从JSON数据绘制像素画
+        
+        Args:
+            json_data: 像素数据
+            progress_callback: 进度回调函数
+            start_color_index: 从第几个颜色开始绘制
+            region_info: (start_row, start_col, size) 区域信息，None表示绘制全图
+            stroke_mode: 笔画模式，同色连续格子合并为一次按下-拖动-松开
+            stroke_direction: 笔画方向 "horizontal" / "vertical" / "auto"（每个颜色取笔画数更少的方向）
+            move_rate: 笔画模式下每秒移动的格数，过快游戏可能漏格
+            route_method: 同色像素的绘制顺序 "serpentine" / "nn_2opt" / "hilbert"，None 表示按行扫描
+                          （nn_2opt 有总时间预算，超时后其余颜色按 hilbert 排序）
+            color_order: 颜色绘制顺序 "palette"（按调色板分类排序，减少翻页）/ "first_seen"（按出现顺序）
+            autotune: 自动调速，定期截图抽查漏点率并调整点击速率（仅逐像素模式）
+            cell_mask: 原图大小的 bool 数组，只绘制为 True 的格子（用于补画），None 表示全部
+            paint_background: 是否也绘制背景色格子（补画时需要覆盖画错的背景）
+            match_mode: 原图颜色不在调色板中时的配色方式 "rgb"（RGB 距离）/ "perceptual"（ΔE2000）
+            brush_sizes: 可用的大笔刷尺寸，如 (3, 2)，大片同色区域用大笔刷一次画一块（需校准尺寸按钮，
+                         不能与笔画模式同时使用），None 表示逐格点击
+            bucket_fill: 先画完边界，再用油漆桶一键填充封闭的大块同色区域（需校准画笔和油漆桶按钮，
+                         画板必须是空白的；补画时不使用）
+            progressive: 渐进绘制 "lattice"（先画稀疏点阵再逐步加密）/ "outline"（先画颜色交界的轮廓），
+                         中途停下也能看出整张图；None 表示逐个颜色画完
+            start_category: 颜色排序假定的起始分类，None 表示当前分类（分块调度时固定下来，
+                            各块的计划可以预先编译）
+            resume: 按绘制日志从上次中断的位置继续（计划有变化时从头开始）
+        """
+        self.is_stopped = False
+        self.is_paused = False
+        self.color_mapper.set_match_mode(match_mode)
+        
+        # 笔刷模式需要每个尺寸的按钮（包括画完换回的 1×1）
+        brush_sizes = normalize_brush_sizes(brush_sizes)
+        if brush_sizes and stroke_mode:
+            print("⚠️ 笔刷模式不能与笔画模式同时使用，改为逐格笔画")
+            brush_sizes = None
+        if brush_sizes:
+            missing = [size for size in [1] + brush_sizes if size not in self.brush_buttons]
+            if missing:
+                raise Exception(f"笔刷按钮未校准: {', '.join(f'{size}×{size}' for size in missing)}")
+        if bucket_fill and (not self.pen_tool_btn or not self.fill_tool_btn):
+            raise Exception("使用油漆桶需要先校准画笔和油漆桶按钮")
+        
+        # 坐标查找表：整次绘制只计算一次，窗口移动时只平移
+        self.update_window_rect()
+        coord_table = self.get_coord_table(json_data["width"], json_data["height"])
+        
+        # 按日志续画时读取上次的进度（补画的格子每次由截图决定，不记录日志）
+        use_journal = cell_mask is None
+        resume_state = self.journal.load() if resume and use_journal else None
+        
+        # 颜色排序与当前分类有关，续画时要沿用上次的顺序，保证起始颜色索引含义不变
+        previous_order = self.last_color_order if start_color_index > 1 else None
+        if resume_state:
+            previous_order = resume_state["colors"]
+        
+        plan = self.compile_plan(json_data, region_info, stroke_mode, stroke_direction, route_method, 
+                                 color_order, cell_mask, paint_background, previous_order, brush_sizes,
+                                 bucket_fill, progressive, start_category)
+        if plan is None:
+            return
+        
+        self.last_color_order = list(plan.colors)
+        total_pixels = plan.total_pixels
+        total_color_count = plan.color_count
+        current_pixel = 0
+        
+        if stroke_mode:
+            print(f"笔画移动速率 {move_rate} 格/秒")
+        
+        try:
+            # 整次绘制只聚焦一次窗口
+            self.input.begin_session()
             
-            # 转换为列表以支持索引
-            color_items = list(color_groups.items())
+            # 绘制日志：计划哈希确认续画时计划没有变化
+            start_offset = 0
+            if use_journal:
+                if resume:
+                    state = resume_state
+                    if state and state["plan"] == plan.digest and not state["done"]:
+                        if state["color_index"] >= total_color_count:
+                            print("✓ 日志显示所有颜色都已画完")
+                            return
+                        start_color_index = state["color_index"] + 1
+                        start_offset = state["offset"]
+                        print(f"从日志续画: 第 {start_color_index} 个颜色的第 {start_offset} 项")
+                    else:
+                        print("⚠️ 没有可续画的日志（已完成或计划已变化），从头开始")
+                        start_color_index = 1
+                
+                self.journal.begin(plan.digest, region_info, self.last_color_order, {
+                    "stroke_mode": stroke_mode,
+                    "stroke_direction": stroke_direction,
+                    "route_method": route_method,
+                    "color_order": color_order,
+                    "paint_background": paint_background,
+                    "match_mode": match_mode,
+                    "brush_sizes": brush_sizes,
+                    "bucket_fill": bucket_fill,
+                    "progressive": progressive,
+                    "start_category": start_category
+                })
             
             # 验证起始索引
             if start_color_index < 1:
@@ -348,17 +721,27 @@ class PixelPainter:
             if start_color_index > total_color_count:
                 print(f"⚠️ 起始颜色索引 {start_color_index} 超过总颜色数 {total_color_count}，从第一个开始")
                 start_color_index = 1
+                start_offset = 0
             
             print(f"从第 {start_color_index} 个颜色开始绘制")
             print(f"{'='*50}\n")
             
-            # 计算跳过的像素数
-            skipped_pixels = 0
-            if start_color_index > 1:
-                for i in range(start_color_index - 1):
-                    skipped_pixels += len(color_items[i][1])
-                current_pixel = skipped_pixels
-                print(f"已跳过前 {start_color_index - 1} 个颜色，共 {skipped_pixels} 个像素\n")
+            # 计算跳过的像素数（续画时包括起始颜色组内已画完的项）
+            if start_color_index > 1 or start_offset:
+                current_pixel = plan.pixels_before(start_color_index - 1, start_offset)
+                print(f"已跳过前 {start_color_index - 1} 个颜色，共 {current_pixel} 个像素\n")
+            
+            if use_journal:
+                self.journal.record(start_color_index - 1, start_offset, force=True)
+            
+            # 不用大笔刷时确认是 1×1（上次可能停在大笔刷上）
+            if not plan.brush_mode:
+                self.select_brush(1)
+            
+            # 上次停在油漆桶上时先换回画笔
+            has_fills = bool(plan.fills.any())
+            if not has_fills and self.current_tool != "pen" and self.pen_tool_btn:
+                self.select_tool("pen")
             
             # 从指定颜色开始绘制
             for color_index in range(start_color_index - 1, total_color_count):
@@ -366,25 +749,36 @@ class PixelPainter:
                     print("用户停止绘制")
                     break
                 
-                color, positions = color_items[color_index]
+                color = plan.colors[color_index]
+                item_count = plan.item_count(color_index)
+                pixel_count = plan.pixel_count(color_index)
+                first_offset = start_offset if color_index == start_color_index - 1 else 0
+                
+                # 渐进绘制换遍时提示
+                if plan.pass_count > 1 and (color_index == start_color_index - 1 or 
+                                            plan.passes[color_index] != plan.passes[color_index - 1]):
+                    kind = "（油漆桶填充）" if plan.fills[color_index] else ""
+                    print(f"\n--- 第 {plan.passes[color_index] + 1}/{plan.pass_count} 遍{kind} ---")
                 
-                print(f"[{color_index + 1}/{total_color_count}] 处理颜色: {color}, 像素数: {len(positions)}")
+                print(f"[{color_index + 1}/{total_color_count}] 处理颜色: {color}, 像素数: {pixel_count}")
                 
                 # 选择当前颜色
                 try:
                     if self.is_stopped:
                         break
                     
-                    self.select_color(color)
-                    print(f"  ✓ 已选择颜色")
+                    if has_fills:
+                        self.select_tool("fill" if plan.fills[color_index] else "pen")
                     
-                    # 获取颜色分类信息
-                    color_info = self.color_mapper.get_color_position(color)
-                    current_category = color_info['category']
+                    # 计划中已有调色板位置，不再重复查询
+                    current_category = int(plan.categories[color_index])
+                    self.select_color(color, {"category": current_category, 
+                                              "index": int(plan.indices[color_index])})
+                    print(f"  ✓ 已选择颜色")
                     
                 except Exception as e:
                     print(f"  ✗ 颜色选择失败: {e}")
-                    current_pixel += len(positions)
+                    current_pixel += plan.pixel_count(color_index, first_offset)
                     if progress_callback:
                         progress_callback(current_pixel, total_pixels, color, 
                                         color_index + 1, total_color_count, None)
@@ -392,56 +786,176 @@ class PixelPainter:
                 
                 # 绘制该颜色的所有像素
                 painted_count = 0
-                for pixel_index, (row, col) in enumerate(positions):
-                    # 检查暂停状态
-                    while self.is_paused and not self.is_stopped:
-                        time.sleep(0.01)
+                self._autotune_cells = []
+                if plan.fills[color_index]:
+                    # 油漆桶：每个连通区域点一下，边界已由前面的画笔组画好
+                    fill_points = plan.anchor_points(color_index, offset=coord_table.offset)
+                    print(f"  填充区域数: {item_count}")
+                    item_index = first_offset
                     
-                    if self.is_stopped:
-                        print(f"  ! 在像素 {pixel_index}/{len(positions)} 处停止")
-                        break
+                    while item_index < item_count:
+                        self._wait_if_paused()
+                        
+                        if self.is_stopped:
+                            print(f"  ! 在填充区域 {item_index}/{item_count} 处停止")
+                            break
+                        
+                        end = min(item_index + self.click_batch_size, item_count)
+                        try:
+                            done = self.input.click_many(fill_points[item_index:end], 
+                                                         should_stop=self._should_interrupt)
+                        except Exception as e:
+                            print(f"  ! 填充区域 {item_index} 起的一批失败: {e}")
+                            done = end - item_index
+                            pixels = plan.pixel_count(color_index, item_index, end)
+                        else:
+                            pixels = plan.pixel_count(color_index, item_index, item_index + done)
+                            painted_count += pixels
+                        
+                        item_index += done
+                        current_pixel += pixels
+                        self.journal.record(color_index, item_index, pixels)
+                        if progress_callback:
+                            progress_callback(current_pixel, total_pixels, color, 
+                                            color_index + 1, total_color_count, current_category)
+                    
+                elif plan.stroke_mode:
+                    # 笔画模式：连续同色格子一笔画完
+                    print(f"  笔画数: {item_count}")
                     
-                    try:
-                        # ✅ 如果是区域绘制，需要加上偏移量
-                        actual_row = row
-                        actual_col = col
-                        if region_info:
-                            actual_row = start_row + row
-                            actual_col = start_col + col
+                    for run_index in range(first_offset, item_count):
+                        # 检查暂停状态
+                        self._wait_if_paused()
+                        
+                        if self.is_stopped:
+                            print(f"  ! 在笔画 {run_index}/{item_count} 处停止")
+                            break
                         
-                        x, y = self.calculate_pixel_pos(actual_row, actual_col, 
-                                                    json_data["width"], json_data["height"])
-                        win_input.click(x, y)
-                        painted_count += 1
+                        points = plan.points_of(color_index, run_index, run_index + 1, coord_table.offset)
+                        try:
+                            if len(points) == 1:
+                                self.input.click(*points[0])
+                            else:
+                                self.input.drag(points, move_rate)
+                            painted_count += len(points)
+                            
+                        except Exception as e:
+                            print(f"  ! 绘制笔画 {run_index} 失败: {e}")
+                        
+                        # 更新进度
+                        current_pixel += len(points)
+                        self.journal.record(color_index, run_index + 1, len(points))
+                        if progress_callback and run_index % max(1, item_count // 10) == 0:
+                            progress_callback(current_pixel, total_pixels, color, 
+                                            color_index + 1, total_color_count, current_category)
+                    
+                elif plan.brush_mode:
+                    # 笔刷模式：同尺寸的印章批量点击锚点，尺寸变化时切换笔刷
+                    sizes = plan.sizes_of(color_index)
+                    stamp_points = plan.anchor_points(color_index, offset=coord_table.offset)
+                    print(f"  印章数: {item_count}")
+                    item_index = first_offset
+                    
+                    while item_index < item_count:
+                        self._wait_if_paused()
                         
                         if self.is_stopped:
+                            print(f"  ! 在印章 {item_index}/{item_count} 处停止")
                             break
-                        if pixel_index % 20 == 0:
-                            time.sleep(0.001)  # 减少到1ms
                         
-                    except Exception as e:
-                        print(f"  ! 绘制像素 ({row}, {col}) 失败: {e}")
+                        size = int(sizes[item_index])
+                        end = min(item_index + self.click_batch_size, item_count)
+                        changed = np.flatnonzero(sizes[item_index:end] != size)
+                        if len(changed):
+                            end = item_index + int(changed[0])
+                        
+                        try:
+                            self.select_brush(size)
+                            done = self.input.click_many(stamp_points[item_index:end], 
+                                                         should_stop=self._should_interrupt)
+                        except Exception as e:
+                            print(f"  ! 绘制印章 {item_index} 起的一批失败: {e}")
+                            done = end - item_index
+                            pixels = plan.pixel_count(color_index, item_index, end)
+                        else:
+                            pixels = plan.pixel_count(color_index, item_index, item_index + done)
+                            painted_count += pixels
+                        
+                        # 自动调速只抽查 1×1 的点击（补点时不会用大笔刷盖到别的颜色）
+                        if autotune and done and size == 1:
+                            cells = plan.cells_of(color_index, item_index, item_index + done)
+                            self._autotune_check([tuple(cell) for cell in cells.tolist()], color, coord_table)
+                        
+                        item_index += done
+                        current_pixel += pixels
+                        self.journal.record(color_index, item_index, pixels)
+                        if progress_callback:
+                            progress_callback(current_pixel, total_pixels, color, 
+                                            color_index + 1, total_color_count, current_category)
                     
-                    # 更新进度
-                    current_pixel += 1
-                    if progress_callback and pixel_index % max(1, len(positions) // 10) == 0:
-                        progress_callback(current_pixel, total_pixels, color, 
-                                        color_index + 1, total_color_count, current_category)
+                else:
+                    # 整组坐标一次交给输入层批量点击，每批之间检查暂停/停止
+                    cells = plan.cells_of(color_index)
+                    screen_points = plan.points_of(color_index, offset=coord_table.offset)
+                    pixel_index = first_offset
+                    
+                    while pixel_index < len(screen_points):
+                        # 检查暂停状态
+                        self._wait_if_paused()
+                        
+                        if self.is_stopped:
+                            print(f"  ! 在像素 {pixel_index}/{pixel_count} 处停止")
+                            break
+                        
+                        batch = screen_points[pixel_index:pixel_index + self.click_batch_size]
+                        try:
+                            done = self.input.click_many(batch, should_stop=self._should_interrupt)
+                        except Exception as e:
+                            print(f"  ! 绘制像素 {tuple(cells[pixel_index])} 起的一批失败: {e}")
+                            done = len(batch)
+                        else:
+                            painted_count += done
+                        
+                        # 自动调速：抽查刚画的格子
+                        if autotune and done:
+                            recent = [tuple(cell) for cell in cells[pixel_index:pixel_index + done].tolist()]
+                            self._autotune_check(recent, color, coord_table)
+                        
+                        # 更新进度
+                        pixel_index += done
+                        current_pixel += done
+                        self.journal.record(color_index, pixel_index, done)
+                        if progress_callback:
+                            progress_callback(current_pixel, total_pixels, color, 
+                                            color_index + 1, total_color_count, current_category)
+                
+                # 自动调速：颜色画完时检查还没抽查过的格子（选色被漏掉时整个颜色都会画错）
+                if autotune and not self.is_stopped and self._autotune_cells:
+                    self._autotune_check([], color, coord_table, flush=True)
                 
-                print(f"  ✓ 完成 {painted_count}/{len(positions)} 个像素")
+                print(f"  ✓ 完成 {painted_count}/{pixel_count} 个像素")
                 
                 if self.is_stopped:
                     break
                 
+                self.journal.record(color_index + 1, 0, force=True)
+                
                 # 每组完成后更新进度
                 if progress_callback:
                     progress_callback(current_pixel, total_pixels, color, 
                                     color_index + 1, total_color_count, current_category)
             
+            # 换回 1×1，之后的补画和手动操作不会误用大笔刷
+            if plan.brush_mode and not self.is_stopped:
+                self.select_brush(1)
+            if has_fills and not self.is_stopped:
+                self.select_tool("pen")
+            
             print(f"\n{'='*50}")
             if self.is_stopped:
                 print(f"绘制已停止，已完成 {current_pixel}/{total_pixels} 像素")
             else:
+                self.journal.complete()
                 print(f"✓ 绘制流程完成，总像素数: {current_pixel}/{total_pixels}")
             print(f"{'='*50}\n")
         
@@ -450,21 +964,275 @@ class PixelPainter:
             print(f"\n绘制异常: {e}")
             print(traceback.format_exc())
             raise
+        
+        finally:
+            self.input.end_session()
+            self.journal.close()
+            if autotune:
+                self.click_tuner.save()
+                print(f"✓ 点击速率已保存: {self.click_tuner.clicks_per_second:.0f} 次/秒")
 
-    def _group_pixels_by_color(self, pixels, width, height):
-        """将像素按颜色分组"""
-        color_groups = {}
+    def resume_painting(self, json_data, progress_callback=None, **paint_options):
+        """按绘制日志续画
         
-        for row in range(height):
-            for col in range(width):
-                color = pixels[row][col].upper()
-                
-                if color not in color_groups:
-                    color_groups[color] = []
-                
-                color_groups[color].append((row, col))
+        区域和影响计划的选项（笔画模式、路径、颜色顺序）取自日志，
+        其余选项（移动速率、自动调速等）使用传入的值
+        
+        Returns:
+            是否有可续画的进度
+        """
+        state = self.journal.load()
+        if not state or state["done"]:
+            print("没有未完成的绘制日志")
+            return False
+        
+        paint_options.update(state["options"])
+        self.paint_from_json(json_data, progress_callback, region_info=state["region"], 
+                             resume=True, **paint_options)
+        return True
+    
+    def verify_canvas(self, json_data, region_info=None):
+        """截图校验画板
+        
+        截取画板、采样每个格子中心并归到最近的调色板颜色，与目标比较
+        
+        Args:
+            json_data: 像素数据
+            region_info: (start_row, start_col, size) 只校验该区域，None 表示全图
+        
+        Returns:
+            原图大小的 bool 数组，True 表示该格子没有画对
+        """
+        width = json_data["width"]
+        height = json_data["height"]
+        grid = self.get_pixel_grid(json_data)
+        mask = np.zeros((height, width), dtype=bool)
+        
+        row_offset, col_offset = 0, 0
+        if region_info:
+            row_offset, col_offset, region_size = region_info
+            grid = grid.region(row_offset, col_offset, region_size)
+        
+        if grid.indices.size == 0:
+            print("❌ 区域无效，没有可校验的像素")
+            return mask
+        
+        self.update_window_rect()
+        coord_table = self.get_coord_table(width, height)
         
-        return color_groups
+        start_time = time.time()
+        region_mask = find_mismatches(coord_table, grid, self.color_mapper, grab=self.input.grab)
+        mask[row_offset:row_offset + region_mask.shape[0], 
+             col_offset:col_offset + region_mask.shape[1]] = region_mask
+        
+        print(f"✓ 校验完成: {region_mask.size} 格中 {int(region_mask.sum())} 格未画对 "
+              f"(耗时 {time.time() - start_time:.3f}s)")
+        return mask
+    
+    def paint_diff(self, json_data, previous_json=None, progress_callback=None, region_info=None, 
+                   **paint_options):
+        """差异绘制：只画画板当前状态与目标不同的格子
+        
+        画板当前状态来自上一次绘制的像素画 previous_json；为 None 时截图获取（检查补画）。
+        差异格子按颜色分组、按调色板分类排序，需要改回背景色的格子也会被绘制
+        
+        Returns:
+            需要绘制的格子数
+        """
+        # 差异按配色后的色块比较，先切换配色方式
+        self.color_mapper.set_match_mode(paint_options.get("match_mode", "rgb"))
+        
+        if previous_json is None:
+            mask = self.verify_canvas(json_data, region_info)
+        else:
+            start_time = time.time()
+            mask = diff_grids(pixel_grid_of(previous_json), self.get_pixel_grid(json_data), 
+                              self.color_mapper)
+            if region_info:
+                start_row, start_col, region_size = region_info
+                region = np.zeros_like(mask)
+                region[start_row:start_row + region_size, start_col:start_col + region_size] = True
+                mask &= region
+            print(f"✓ 对比完成: {mask.size} 格中 {int(mask.sum())} 格有变化 "
+                  f"(耗时 {time.time() - start_time:.3f}s)")
+        
+        count = int(mask.sum())
+        if count == 0:
+            print("✓ 画板与目标一致，无需绘制")
+            return 0
+        
+        self.paint_from_json(json_data, progress_callback, region_info=region_info, 
+                             cell_mask=mask, paint_background=True, **paint_options)
+        return count
+    
+    def _order_colors_by_palette(self, colors, start_category=None):
+        """按调色板分类和索引排序颜色，每个分类只访问一次
+        
+        从当前分类（或 start_category）出发，比较"先扫到最小分类再向右"和"先扫到最大分类再向左"
+        两种方向，取翻页次数少的一种
+        """
+        start_category = self.current_category if start_category is None else start_category
+        positions = {color: self.color_mapper.get_color_position(color) for color in colors}
+        categories = [position["category"] for position in positions.values()]
+        if not categories:
+            return list(colors)
+        
+        lowest, highest = min(categories), max(categories)
+        ascending_cost = abs(start_category - lowest) + (highest - lowest)
+        descending_cost = abs(start_category - highest) + (highest - lowest)
+        direction = -1 if descending_cost < ascending_cost else 1
+        
+        return sorted(colors, key=lambda color: (direction * positions[color]["category"], 
+                                                 positions[color]["index"]))
+    
+    def _category_switch_cost(self, colors, start_category=None):
+        """按给定顺序绘制时，从当前分类（或 start_category）出发需要点击左右按钮的总次数"""
+        cost = 0
+        category = self.current_category if start_category is None else start_category
+        for color in colors:
+            target = self.color_mapper.get_color_position(color)["category"]
+            cost += abs(target - category)
+            category = target
+        return cost
+    
+    def _optimize_stamp_routes(self, color_groups, route_method):
+        """笔刷模式的路径优化：每个颜色的每种尺寸分别排序"""
+        split = {}
+        for color, stamps in color_groups.items():
+            for size in np.unique(stamps[:, 2])[::-1].tolist():
+                split[(color, size)] = stamps[stamps[:, 2] == size]
+        
+        optimized, route_stats = optimize_routes(split, route_method)
+        
+        color_groups = {color: [] for color in color_groups}
+        for (color, _), stamps in optimized.items():
+            color_groups[color].append(stamps)
+        return {color: np.concatenate(parts) for color, parts in color_groups.items()}, route_stats
+    
+    def _order_stamp_sizes(self, color_groups):
+        """排列每个颜色中各尺寸印章的先后，减少换笔刷的次数
+        
+        上一个颜色停在最小的尺寸上时从小到大画，否则从大到小画。
+        总是假定从 1×1 开始（与当前笔刷无关），中断后续画时计划不变
+        """
+        brush = 1
+        ordered = {}
+        for color, stamps in color_groups.items():
+            sizes = np.unique(stamps[:, 2]).tolist()
+            if brush > sizes[0]:
+                sizes.reverse()
+            ordered[color] = np.concatenate([stamps[stamps[:, 2] == size] for size in sizes])
+            brush = sizes[-1]
+        return ordered
+    
+    def _group_positions_into_runs(self, positions, direction="horizontal"):
+        """将同色像素合并为最长的连续笔画
+        
+        Args:
+            positions: (N, 2) 格子数组或 [(row, col), ...]
+            direction: "horizontal" / "vertical" / "auto"
+        
+        Returns:
+            (R, 4) 数组，每行 (start_row, start_col, end_row, end_col) 闭区间，单个像素的起止相同
+        """
+        positions = np.asarray(positions, dtype=np.int32).reshape(-1, 2)
+        
+        if direction == "auto":
+            horizontal = self._group_positions_into_runs(positions, "horizontal")
+            vertical = self._group_positions_into_runs(positions, "vertical")
+            return vertical if len(vertical) < len(horizontal) else horizontal
+        
+        if direction not in ("horizontal", "vertical"):
+            raise ValueError(f"未知的笔画方向: {direction}")
+        
+        if len(positions) == 0:
+            return np.zeros((0, 4), dtype=np.int32)
+        
+        # 按笔画方向排序：主轴为所在行（列），副轴为行内（列内）位置
+        vertical = direction == "vertical"
+        major, minor = (positions[:, 1], positions[:, 0]) if vertical else (positions[:, 0], positions[:, 1])
+        order = np.lexsort((minor, major))
+        ordered = positions[order]
+        major, minor = major[order], minor[order]
+        
+        # 换行或不相邻处断开
+        breaks = np.ones(len(ordered), dtype=bool)
+        breaks[1:] = (major[1:] != major[:-1]) | (minor[1:] != minor[:-1] + 1)
+        starts = np.flatnonzero(breaks)
+        ends = np.append(starts[1:] - 1, len(ordered) - 1)
+        
+        return np.hstack([ordered[starts], ordered[ends]])
+    
+    def _autotune_check(self, cells, color, coord_table, flush=False):
+        """自动调速：到抽查时机时截图检查上次抽查之后画的格子，调整点击速率并重画
+        
+        抽查的格子几乎都不对时多半是选色的点击被漏掉（整批画成了上一个颜色），
+        先重新选色、重画这些格子再抽查，之后才按结果调速。有漏点时降速后重新选色、
+        重画这些格子（抽查之外的格子也可能漏掉），直到抽查通过或达到重试次数。
+        
+        Args:
+            cells: 刚绘制的格子（原图坐标）
+            color: 这些格子的目标颜色
+            coord_table: 坐标查找表
+            flush: 颜色画完时为 True，不等抽查时机，检查剩下还没抽查的格子
+        """
+        tuner = self.click_tuner
+        self._autotune_cells.extend(cells)
+        if not tuner.record_clicks(len(cells)) and not flush:
+            return
+        cells, self._autotune_cells = self._autotune_cells, []
+        if not cells:
+            return
+        
+        # 与实际选中的色块比较（原图颜色可能不在调色板中）
+        position = self.color_mapper.get_color_position(color)
+        swatch = self.color_mapper.color_palette[position["category"]][position["index"]]
+        swatch_rgb = np.array(self.color_mapper.hex_to_rgb(swatch))
+        background_rgb = np.array(self.color_mapper.hex_to_rgb(BACKGROUND_COLOR))
+        
+        for attempt in range(tuner.max_retries):
+            sample = random.sample(cells, min(tuner.sample_size, len(cells)))
+            self.input.sleep(tuner.settle_time)  # 等游戏刷新画面
+            try:
+                rgb = sample_cells(coord_table, [row for row, _ in sample], [col for _, col in sample], 
+                                   grab=self.input.grab)
+            except Exception as e:
+                print(f"  ! 截图失败，跳过本次调速: {e}")
+                return
+            
+            # 离背景色比离目标色还近的也算漏点（接近背景色的颜色在容差内分不出画没画上）
+            distance = np.sqrt(((rgb - swatch_rgb) ** 2).sum(axis=1))
+            to_background = np.sqrt(((rgb - background_rgb) ** 2).sum(axis=1))
+            dropped = int(((distance > tuner.color_tolerance) | (to_background < distance)).sum())
+            
+            if attempt == 0 and dropped >= len(sample) * tuner.selection_miss_rate:
+                print(f"  ⏱ 抽查 {len(sample)} 格, {dropped} 格不是目标色，可能选色被漏掉，重新选色后重画")
+            else:
+                drop_rate = tuner.update(len(sample), dropped)
+                tuner.apply(self.input)
+                print(f"  ⏱ 抽查 {len(sample)} 格, 漏点 {dropped} ({drop_rate:.0%}), "
+                      f"点击速率 → {tuner.clicks_per_second:.0f} 次/秒")
+                if not dropped:
+                    return
+            
+            # 先重新选色（上次的选色点击可能也被漏掉），再重画这批格子
+            self.select_color(color, position)
+            self.input.click_many(coord_table.points(cells))
+        
+        print(f"  ! 重画 {tuner.max_retries} 次后抽查仍有漏点")
+    
+    def _should_interrupt(self):
+        """批量点击中途是否需要停下（暂停或停止）"""
+        return self.is_paused or self.is_stopped
+    
+    def _wait_if_paused(self):
+        """暂停时等待；恢复后立即检查窗口焦点（暂停期间可能切换过窗口）"""
+        if not self.is_paused:
+            return
+        while self.is_paused and not self.is_stopped:
+            time.sleep(0.01)
+        if not self.is_stopped:
+            self.input.ensure_focus(force=True)
     
     def pause(self):
         """暂停绘制"""
@@ -0,0 +1,72 @@
+"""
+渐进绘制规划 - 把每个颜色的格子分成由粗到细的几遍，中途停下也能看出整张图
+
+逐个颜色画完时，中断后画板上有的颜色完整、有的完全没有。渐进绘制把所有颜色的格子分成几遍：
+    "lattice"  点阵：第 1 遍画每隔 4 格的点（1/16），第 2 遍补到每隔 2 格（再 3/16），第 3 遍画剩下的
+    "outline"  轮廓优先：第 1 遍先画颜色交界处的格子（轮廓），其余格子再按点阵分遍
+每一遍内部仍然按调色板分类排序颜色，每遍每个分类只翻到一次，翻页次数不超过
+遍数 × 分类跨度。画了任意一段时间，画板上都是一张完整但较稀疏的图。
+"""
+import numpy as np
+
+# 渐进绘制方式
+PASS_MODES = ("lattice", "outline")
+
+# 点阵各遍的间隔（最后再加一遍画剩下的格子）
+LATTICE_STRIDES = (4, 2)
+
+
+def lattice_levels(cells, strides=LATTICE_STRIDES):
+    """格子属于点阵的第几遍：行列都是 strides[k] 的倍数的最早一遍，都不是时为 len(strides)
+
+    Args:
+        cells: (N, 2) 格子 (row, col)，原图坐标（点阵与区域无关，分块绘制时拼接处对齐）
+    """
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    levels = np.full(len(cells), len(strides), dtype=np.int32)
+    for level in range(len(strides) - 1, -1, -1):
+        on_lattice = (cells[:, 0] % strides[level] == 0) & (cells[:, 1] % strides[level] == 0)
+        levels[on_lattice] = level
+    return levels
+
+
+def outline_mask(grid):
+    """颜色交界处的格子（上下左右有不同颜色的邻格），与 grid 同尺寸的 bool 数组"""
+    indices = np.asarray(grid.indices)
+    mask = np.zeros(indices.shape, dtype=bool)
+    horizontal = indices[:, 1:] != indices[:, :-1]
+    vertical = indices[1:] != indices[:-1]
+    mask[:, 1:] |= horizontal
+    mask[:, :-1] |= horizontal
+    mask[1:] |= vertical
+    mask[:-1] |= vertical
+    return mask
+
+
+def plan_passes(grid, color_groups, mode="lattice"):
+    """把每个颜色的格子分到由粗到细的各遍
+
+    Args:
+        grid: 要画的 PixelGrid（可以是区域视图）
+        color_groups: {color: (N, 2) 格子数组（原图坐标）}
+        mode: "lattice" / "outline"，见 PASS_MODES
+
+    Returns:
+        [{color: (M, 2) 格子数组}, ...]，每遍一个（空的遍和遍内空的颜色已去掉），颜色保持原顺序
+    """
+    if mode not in PASS_MODES:
+        raise ValueError(f"未知的渐进绘制方式: {mode}")
+
+    edges = outline_mask(grid) if mode == "outline" else None
+    pass_count = len(LATTICE_STRIDES) + 1 + (edges is not None)
+
+    passes = [{} for _ in range(pass_count)]
+    for color, positions in color_groups.items():
+        positions = np.asarray(positions, dtype=np.int32).reshape(-1, 2)
+        levels = lattice_levels(positions)
+        if edges is not None:
+            on_edge = edges[positions[:, 0] - grid.row_offset, positions[:, 1] - grid.col_offset]
+            levels = np.where(on_edge, 0, levels + 1)
+        for level in np.unique(levels).tolist():
+            passes[level][color] = positions[levels == level]
+    return [groups for groups in passes if groups]
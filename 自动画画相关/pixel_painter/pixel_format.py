@@ -0,0 +1,207 @@
+"""
+像素画二进制格式 (.pxg) - 文件头 + 调色板 + 索引网格，可以内存映射直接使用
+
+像素画 JSON 一张 150×150 的图就有 22500 个带引号的颜色字符串，缩进后 384~760 KB，解析也慢。
+.pxg 把 PixelGrid 原样存盘：
+
+    偏移   内容
+    0      文件头 32 字节（小端）：
+               magic "PXGR" | version u16 | flags u16 | width u32 | height u32 |
+               palette_size u32 | index_bytes u8 | 保留 11 字节
+    32     调色板颜色 u32 × palette_size（0xRRGGBB）
+    ...    每种颜色的像素数 u32 × palette_size（加载时不用再统计）
+    ...    对齐到 8 字节后是索引数据：
+               未压缩：(height, width) 的 uint8/uint16/uint32 索引，可直接 np.memmap
+               RLE：   runs u32 + 对齐 + 游程值 × runs（索引类型）+ 对齐 + 游程长度 u32 × runs
+                       （按行扫描顺序整体编码，加载时用 np.repeat 还原）
+
+    save_pixel_file(json_data, "阿尼亚.pxg")      # 默认不压缩，可内存映射
+    save_pixel_file(json_data, "阿尼亚.pxg", rle=None)  # 哪种小用哪种（大色块的图 RLE 更小）
+    json_data = load_pixel_file("阿尼亚.pxg")     # 与 load_pixel_json 的返回格式相同
+    json_to_pixel_file("阿尼亚.json")             # → 阿尼亚.pxg
+    pixel_file_to_json("阿尼亚.pxg")              # → 阿尼亚.json
+
+未压缩的文件以只读内存映射打开，索引网格、区域视图都直接指向文件内容，不解析也不复制。
+命令行转换：python pixel_format.py 文件.json [文件.pxg ...]
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+
+from pixel_grid import PixelGrid, index_dtype, pixel_grid_of
+from pixel_json import load_pixel_json, save_pixel_json
+
+# 文件扩展名
+PIXEL_EXTENSION = ".pxg"
+
+MAGIC = b"PXGR"
+FORMAT_VERSION = 1
+
+# flags
+FLAG_RLE = 1
+
+# 文件头：magic, version, flags, width, height, palette_size, index_bytes
+_HEADER = struct.Struct("<4sHHIIIB11x")
+HEADER_SIZE = _HEADER.size
+
+
+def is_pixel_file(filename):
+    """按扩展名判断是否为 .pxg 文件"""
+    return os.path.splitext(filename)[1].lower() == PIXEL_EXTENSION
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _encode_runs(flat):
+    """按行扫描顺序做游程编码，返回 (值, 长度)"""
+    if flat.size == 0:
+        return flat[:0], np.zeros(0, dtype=np.uint32)
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.append(starts, flat.size)).astype(np.uint32)
+    return flat[starts], lengths
+
+
+def save_pixel_file(json_data, filename, rle=False):
+    """保存为 .pxg
+
+    Args:
+        json_data: 像素画数据（带 grid 或 pixels）或 PixelGrid
+        filename: 输出路径
+        rle: True 游程编码，False 不编码（可内存映射，加载最快），None 时哪种小用哪种
+
+    Returns:
+        写入的字节数
+    """
+    grid = json_data if isinstance(json_data, PixelGrid) else pixel_grid_of(json_data)
+    palette_size = len(grid.palette)
+    dtype = index_dtype(palette_size).newbyteorder("<")
+    flat = np.ascontiguousarray(grid.indices, dtype=dtype).reshape(-1)
+
+    colors = np.array([int(color[1:], 16) for color in grid.palette], dtype="<u4")
+    counts = np.bincount(flat, minlength=palette_size).astype("<u4")
+
+    values, lengths = _encode_runs(flat)
+    rle_size = 8 + _align(values.nbytes, 4) + lengths.nbytes
+    if rle is None:
+        rle = rle_size < flat.nbytes
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_RLE if rle else 0,
+                          grid.width, grid.height, palette_size, dtype.itemsize)
+    table_end = HEADER_SIZE + colors.nbytes + counts.nbytes
+    data_offset = _align(table_end)
+
+    with open(filename, 'wb') as f:
+        f.write(header)
+        f.write(colors.tobytes())
+        f.write(counts.tobytes())
+        f.write(b"\0" * (data_offset - table_end))
+        if rle:
+            f.write(struct.pack("<I4x", len(values)))
+            f.write(values.astype(dtype).tobytes())
+            f.write(b"\0" * (_align(values.nbytes, 4) - values.nbytes))
+            f.write(lengths.astype("<u4").tobytes())
+        else:
+            f.write(flat.tobytes())
+        return f.tell()
+
+
+def load_pixel_file(filename, mmap=True):
+    """加载 .pxg
+
+    Args:
+        filename: .pxg 文件路径
+        mmap: 未压缩的文件以只读内存映射打开（False 时读入内存）
+
+    Returns:
+        {"width", "height", "grid": PixelGrid, "color_counts": {color: 像素数}}
+
+    Raises:
+        ValueError: 不是 .pxg 文件、版本不支持或文件被截断
+    """
+    with open(filename, 'rb') as f:
+        head = f.read(HEADER_SIZE)
+        if len(head) < HEADER_SIZE:
+            raise ValueError("不是有效的 .pxg 文件（文件头不完整）")
+        magic, version, flags, width, height, palette_size, index_bytes = _HEADER.unpack(head)
+        if magic != MAGIC:
+            raise ValueError("不是有效的 .pxg 文件")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"不支持的 .pxg 版本: {version}")
+        if index_bytes not in (1, 2, 4):
+            raise ValueError(f"不支持的索引宽度: {index_bytes} 字节")
+
+        table = np.frombuffer(f.read(8 * palette_size), dtype="<u4")
+        if len(table) != 2 * palette_size:
+            raise ValueError("不是有效的 .pxg 文件（调色板不完整）")
+        colors, counts = table[:palette_size], table[palette_size:]
+        data_offset = _align(HEADER_SIZE + 8 * palette_size)
+        dtype = np.dtype(f"<u{index_bytes}")
+        shape = (height, width)
+
+        if flags & FLAG_RLE:
+            f.seek(data_offset)
+            runs = struct.unpack("<I4x", f.read(8))[0]
+            values = np.frombuffer(f.read(runs * index_bytes), dtype=dtype)
+            f.seek(_align(runs * index_bytes, 4) - runs * index_bytes, os.SEEK_CUR)
+            lengths = np.frombuffer(f.read(4 * runs), dtype="<u4")
+            if len(values) != runs or len(lengths) != runs or int(lengths.sum()) != width * height:
+                raise ValueError("不是有效的 .pxg 文件（游程数据不完整）")
+            indices = np.repeat(values, lengths).reshape(shape)
+        elif mmap and width * height:
+            if os.path.getsize(filename) < data_offset + width * height * index_bytes:
+                raise ValueError("不是有效的 .pxg 文件（索引数据不完整）")
+            indices = np.memmap(filename, dtype=dtype, mode="r", offset=data_offset, shape=shape)
+        else:
+            f.seek(data_offset)
+            indices = np.frombuffer(f.read(width * height * index_bytes), dtype=dtype)
+            if indices.size != width * height:
+                raise ValueError("不是有效的 .pxg 文件（索引数据不完整）")
+            indices = indices.reshape(shape)
+
+    palette = [f"#{int(color):06X}" for color in colors]
+    return {
+        "width": width,
+        "height": height,
+        "grid": PixelGrid(palette, indices),
+        "color_counts": {color: int(count) for color, count in zip(palette, counts) if count}
+    }
+
+
+def json_to_pixel_file(json_file, pixel_file=None, rle=False):
+    """像素画 JSON → .pxg，返回输出路径"""
+    pixel_file = pixel_file or os.path.splitext(json_file)[0] + PIXEL_EXTENSION
+    save_pixel_file(load_pixel_json(json_file), pixel_file, rle)
+    return pixel_file
+
+
+def pixel_file_to_json(pixel_file, json_file=None, compact=False):
+    """.pxg → 像素画 JSON，返回输出路径"""
+    json_file = json_file or os.path.splitext(pixel_file)[0] + ".json"
+    save_pixel_json(load_pixel_file(pixel_file, mmap=False), json_file, compact)
+    return json_file
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法: python pixel_format.py 文件.json [文件.pxg ...]（.json 转 .pxg，.pxg 转 .json）")
+        return 1
+    failed = 0
+    for filename in sys.argv[1:]:
+        try:
+            if is_pixel_file(filename):
+                output = pixel_file_to_json(filename)
+            else:
+                output = json_to_pixel_file(filename)
+            print(f"✓ {filename} ({os.path.getsize(filename)} 字节) → {output} ({os.path.getsize(output)} 字节)")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {filename}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+像素网格模块 - 用调色板索引数组表示像素画，代替 "#RRGGBB" 字符串的二维列表
+
+PixelGrid 只存一张小调色板（图中出现的颜色）和一个 (H, W) 的索引数组：
+    - 从 JSON 构建时整体向量化转换，不逐个 upper()
+    - 按颜色分组用 argsort 完成
+    - 区域是索引数组的视图，不复制数据
+"""
+import numpy as np
+
+# 十六进制字符 → 数值（大小写都支持，其余为 -1）
+_HEX_VALUES = np.full(128, -1, dtype=np.int64)
+for _i, _ch in enumerate("0123456789abcdef"):
+    _HEX_VALUES[ord(_ch)] = _i
+    _HEX_VALUES[ord(_ch.upper())] = _i
+
+
+def parse_hex_colors(pixels):
+    """把 "#RRGGBB" 字符串的二维列表转为 (H, W) 的 24 位整数颜色数组（向量化）
+
+    格式不对的颜色（长短不对、带空格、非十六进制、不是字符串）抛出 ValueError
+    """
+    # 多留一个字符：超过 7 个字符的颜色（如 #RRGGBBAA）第 8 个字符不是 \0，可以报错，
+    # 不会被截断成另一个看起来合法的颜色；较短的颜色补齐的 \0 在十六进制检查中报错
+    try:
+        text = np.array(pixels, dtype="U8")
+    except ValueError:
+        raise ValueError("像素数据必须是矩形的二维列表")
+    if text.ndim != 2:
+        raise ValueError("像素数据必须是矩形的二维列表")
+    if text.size == 0:
+        return np.zeros(text.shape, dtype=np.int64)
+
+    codes = text.view(np.uint32).reshape(text.shape + (8,))
+    if (not (codes[..., 0] == ord("#")).all() or (codes[..., 1:7] >= 128).any()
+            or codes[..., 7].any()):
+        raise ValueError("颜色格式必须是 #RRGGBB")
+
+    digits = _HEX_VALUES[codes[..., 1:7]]
+    if (digits < 0).any():
+        raise ValueError("颜色格式必须是 #RRGGBB")
+
+    value = np.zeros(text.shape, dtype=np.int64)
+    for position in range(6):
+        value = value * 16 + digits[..., position]
+    return value
+
+
+def index_dtype(palette_size):
+    """容纳 palette_size 种颜色的最小索引类型：≤256 为 uint8，≤65536 为 uint16，否则 uint32"""
+    if palette_size <= 1 << 8:
+        return np.dtype(np.uint8)
+    if palette_size <= 1 << 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def pixel_grid_of(json_data):
+    """像素画数据的 PixelGrid：流式加载的数据直接带有网格，json.load 的数据现场转换"""
+    grid = json_data.get("grid")
+    return grid if grid is not None else PixelGrid.from_json(json_data)
+
+
+class PixelGrid:
+    """调色板索引表示的像素画
+
+    Attributes:
+        palette: 图中出现的颜色列表（大写 "#RRGGBB"），下标即索引值
+        indices: (height, width) 索引数组，类型见 index_dtype（uint8 / uint16 / uint32）
+        row_offset, col_offset: 本网格左上角在原图中的位置（区域视图时非 0）
+    """
+
+    def __init__(self, palette, indices, row_offset=0, col_offset=0):
+        self.palette = list(palette)
+        self.indices = indices
+        self.row_offset = row_offset
+        self.col_offset = col_offset
+
+    @classmethod
+    def from_pixels(cls, pixels):
+        """由 "#RRGGBB" 字符串二维列表构建"""
+        return cls.from_values(parse_hex_colors(pixels))
+
+    @classmethod
+    def from_values(cls, values):
+        """由 (H, W) 的 24 位整数颜色数组构建（调色板按颜色值排序）"""
+        values = np.asarray(values)
+        colors, inverse = np.unique(values, return_inverse=True)
+        palette = [f"#{int(color):06X}" for color in colors]
+        return cls(palette, inverse.reshape(values.shape).astype(index_dtype(len(colors))))
+
+    @classmethod
+    def from_json(cls, json_data):
+        """由像素画 JSON 数据构建"""
+        return cls.from_pixels(json_data["pixels"])
+
+    @property
+    def height(self):
+        return self.indices.shape[0]
+
+    @property
+    def width(self):
+        return self.indices.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes
+
+    def region(self, start_row, start_col, size):
+        """区域视图（与原网格共享索引数组，不复制），超出边界的部分被截掉"""
+        end_row = min(start_row + size, self.height)
+        end_col = min(start_col + size, self.width)
+        view = self.indices[start_row:max(start_row, end_row), start_col:max(start_col, end_col)]
+        return PixelGrid(self.palette, view, self.row_offset + start_row, self.col_offset + start_col)
+
+    def to_pixels(self):
+        """转回 "#RRGGBB" 字符串二维列表"""
+        palette = np.array(self.palette)
+        return palette[self.indices].tolist()
+
+    def color_counts(self):
+        """每种颜色的像素数 {color: count}"""
+        counts = np.bincount(self.indices.reshape(-1), minlength=len(self.palette))
+        return {color: int(count) for color, count in zip(self.palette, counts) if count}
+
+    def palette_index(self, color):
+        """颜色在调色板中的下标，不存在时返回 None"""
+        color = color.upper()
+        return self.palette.index(color) if color in self.palette else None
+
+    def group_by_color(self, cell_mask=None):
+        """按颜色分组
+
+        Args:
+            cell_mask: 与本网格同尺寸的 bool 数组，只分组为 True 的格子；None 表示全部
+
+        Returns:
+            {color: (N, 2) int32 数组}，格子为原图坐标 (row, col)，组内按行扫描顺序，
+            颜色按首次出现的顺序排列
+        """
+        width = self.width
+        flat = self.indices.reshape(-1)
+        if cell_mask is not None:
+            cells = np.flatnonzero(np.asarray(cell_mask, dtype=bool).reshape(-1))
+            values = flat[cells]
+        else:
+            cells = None
+            values = flat
+
+        if values.size == 0:
+            return {}
+
+        # 稳定排序：同色格子保持行扫描顺序
+        order = np.argsort(values, kind="stable")
+        positions = order if cells is None else cells[order]
+        counts = np.bincount(values, minlength=len(self.palette))
+        present = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts[present])[:-1]))
+
+        coords = np.empty((len(positions), 2), dtype=np.int32)
+        coords[:, 0] = positions // width + self.row_offset
+        coords[:, 1] = positions % width + self.col_offset
+
+        # 每组第一个格子就是该颜色首次出现的位置
+        first_seen = np.argsort(positions[starts], kind="stable")
+        groups = {}
+        for i in first_seen:
+            start = starts[i]
+            groups[self.palette[present[i]]] = coords[start:start + counts[present[i]]]
+        return groups
@@ -0,0 +1,231 @@
+"""
+像素画 JSON 流式加载 - 按块读取文件，逐行把 pixels 解析进调色板索引网格
+
+像素画 JSON 的格式为 {"width": W, "height": H, "pixels": [["#RRGGBB", ...], ...]}。
+json.load 会先建出 W×H 个字符串对象，大图（1000×1000 的转换结果有几十 MB）内存峰值很高。
+这里只把 pixels 之外的少量内容交给 json 解析，pixels 数组按行转成索引，同时统计每种颜色的像素数：
+
+    json_data = load_pixel_json(path, progress_callback=lambda done, total: ...)
+    json_data["grid"]          # PixelGrid
+    json_data["color_counts"]  # {color: 像素数}
+    json_data["width"], json_data["height"]
+
+返回的数据没有 "pixels" 字段，PixelPainter 通过 pixel_grid_of 直接使用其中的网格。
+save_pixel_json 把这样的数据写回与 Image-to-Pixel-Robot 相同格式的 JSON。
+"""
+import codecs
+import json
+import os
+import re
+
+import numpy as np
+
+from pixel_grid import PixelGrid, index_dtype, parse_hex_colors, pixel_grid_of
+
+# 每次读取的字节数
+CHUNK_SIZE = 1 << 20
+
+# pixels 数组中的一行（行内不会再有方括号），前面可能有逗号
+_ROW = re.compile(r'\s*,?\s*\[([^\[\]]*)\]')
+# pixels 数组结束
+_END = re.compile(r'\s*\]')
+# 行内的颜色字符串
+_COLOR = re.compile(r'"([^"]*)"')
+# "pixels" 键之后到数组开头
+_PIXELS_START = re.compile(r'\s*:\s*\[')
+
+
+class _RowIndexer:
+    """把每行颜色转成调色板索引，同时统计直方图"""
+
+    def __init__(self):
+        self.index_of = {}   # 24 位颜色值 → 索引（按首次出现的顺序）
+        self.counts = []
+        self.rows = []
+
+    def add_row(self, colors):
+        values = parse_hex_colors([colors])[0]
+        unique, inverse = np.unique(values, return_inverse=True)
+        lookup = np.empty(len(unique), dtype=np.int64)
+        for i, value in enumerate(unique.tolist()):
+            index = self.index_of.get(value)
+            if index is None:
+                index = self.index_of[value] = len(self.counts)
+                self.counts.append(0)
+            lookup[i] = index
+        row = lookup[inverse].astype(index_dtype(len(self.counts)))  # 拼接时统一为最宽的类型
+        for index, count in zip(lookup.tolist(), np.bincount(inverse).tolist()):
+            self.counts[index] += count
+        self.rows.append(row)
+
+    def to_grid(self, width):
+        """按颜色值排序调色板（与 PixelGrid.from_pixels 的结果一致），返回 (PixelGrid, {color: 像素数})"""
+        values = np.array(list(self.index_of), dtype=np.int64)
+        order = np.argsort(values)
+        remap = np.empty(len(values), dtype=np.int64)
+        remap[order] = np.arange(len(values))
+
+        dtype = index_dtype(len(values))
+        if self.rows:
+            indices = remap[np.stack(self.rows)].astype(dtype)
+        else:
+            indices = np.zeros((0, width), dtype=dtype)
+
+        palette = [f"#{int(value):06X}" for value in values[order]]
+        counts = np.array(self.counts, dtype=np.int64)[order]
+        return PixelGrid(palette, indices), dict(zip(palette, counts.tolist()))
+
+
+def _find_pixels_key(text, start, state):
+    """在顶层对象中查找 "pixels" 键，返回键之后的位置，没找到返回 None
+
+    state 记录跨块的扫描状态：depth（括号深度）、in_string、escape、key（顶层的当前字符串）。
+    pixels 之外的内容很少，逐字符扫描即可。
+    """
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if state["in_string"]:
+            if state["escape"]:
+                state["escape"] = False
+            elif ch == "\\":
+                state["escape"] = True
+            elif ch == '"':
+                state["in_string"] = False
+                if state["depth"] == 1 and state["key"] == "pixels":
+                    return i + 1
+            elif state["depth"] == 1:
+                state["key"] += ch
+        elif ch == '"':
+            state["in_string"] = True
+            state["key"] = ""
+        elif ch in "[{":
+            state["depth"] += 1
+        elif ch in "]}":
+            state["depth"] -= 1
+        i += 1
+    return None
+
+
+def load_pixel_json(filename, progress_callback=None, chunk_size=CHUNK_SIZE):
+    """流式加载像素画 JSON
+
+    Args:
+        filename: JSON 文件路径
+        progress_callback: callback(已读字节数, 总字节数)，每读一块调用一次
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        除 pixels 外的所有字段，加上 "grid"（PixelGrid）和 "color_counts"（{color: 像素数}）
+
+    Raises:
+        ValueError: 不是像素画 JSON、行长度与宽度不一致或颜色格式错误
+    """
+    total_bytes = os.path.getsize(filename)
+    indexer = _RowIndexer()
+    header = []          # pixels 之外的文本，最后交给 json 解析
+    state = {"depth": 0, "in_string": False, "escape": False, "key": ""}
+    phase = "header"     # header → key（找到键，等数组开头）→ pixels → tail
+    buffer = ""
+    width = None
+    bytes_read = 0
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            bytes_read += len(chunk)
+            buffer += decoder.decode(chunk, final=not chunk)
+            pos = 0
+
+            while True:
+                if phase == "header":
+                    end = _find_pixels_key(buffer, pos, state)
+                    if end is None:
+                        header.append(buffer[pos:])
+                        pos = len(buffer)
+                        break
+                    header.append(buffer[pos:end])
+                    pos = end
+                    phase = "key"
+                elif phase == "key":
+                    match = _PIXELS_START.match(buffer, pos)
+                    if match is None:
+                        rest = buffer[pos:].lstrip()
+                        if not rest or rest == ":" or (rest[0] == ":" and not rest[1:].strip()):
+                            break  # 等下一块
+                        if rest[0] == ":":
+                            raise ValueError("pixels 字段必须是数组")
+                        phase = "header"  # 是值为 "pixels" 的字符串，不是键
+                        continue
+                    header.append(": []")
+                    pos = match.end()
+                    phase = "pixels"
+                elif phase == "pixels":
+                    match = _ROW.match(buffer, pos)
+                    if match is not None:
+                        colors = _COLOR.findall(match.group(1))
+                        if width is None:
+                            width = len(colors)
+                        elif len(colors) != width:
+                            raise ValueError(f"第 {len(indexer.rows) + 1} 行有 {len(colors)} 个像素，"
+                                             f"与第一行的 {width} 个不一致")
+                        indexer.add_row(colors)
+                        pos = match.end()
+                        continue
+                    match = _END.match(buffer, pos)
+                    if match is not None:
+                        pos = match.end()
+                        phase = "tail"
+                        continue
+                    break
+                else:
+                    header.append(buffer[pos:])
+                    pos = len(buffer)
+                    break
+
+            buffer = buffer[pos:]
+            if progress_callback:
+                progress_callback(bytes_read, total_bytes)
+            if not chunk:
+                break
+
+    if phase != "tail" or buffer.strip():
+        raise ValueError("不是有效的像素画 JSON（缺少完整的 pixels 数组）")
+
+    json_data = json.loads("".join(header))
+    if not isinstance(json_data, dict):
+        raise ValueError("不是有效的像素画 JSON")
+    json_data.pop("pixels", None)
+
+    grid, color_counts = indexer.to_grid(width or 0)
+    if "width" in json_data and "height" in json_data:
+        if (json_data["width"], json_data["height"]) != (grid.width, grid.height):
+            raise ValueError(f"声明的尺寸 {json_data['width']}×{json_data['height']} 与像素数据 "
+                             f"{grid.width}×{grid.height} 不一致")
+    else:
+        json_data["width"], json_data["height"] = grid.width, grid.height
+
+    json_data["grid"] = grid
+    json_data["color_counts"] = color_counts
+    return json_data
+
+
+def save_pixel_json(json_data, filename, compact=False):
+    """写出与 Image-to-Pixel-Robot 相同格式的像素画 JSON
+
+    Args:
+        json_data: 像素画数据（带 grid 或 pixels）
+        filename: 输出路径
+        compact: 不缩进（文件小很多）；默认与浏览器工具一样 indent=2
+    """
+    data = {
+        "width": json_data["width"],
+        "height": json_data["height"],
+        "pixels": pixel_grid_of(json_data).to_pixels()
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        if compact:
+            json.dump(data, f, separators=(",", ":"))
+        else:
+            json.dump(data, f, indent=2)
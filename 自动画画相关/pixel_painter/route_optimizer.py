@@ -0,0 +1,277 @@
+"""
+路径优化模块 - 重新排列同色像素的绘制顺序，减少光标移动距离
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 支持的排序方式
+ROUTE_METHODS = ("serpentine", "nn_2opt", "hilbert")
+
+# 最近邻 / 2-opt 的规模上限（两者都是 O(n²)，超过后退化为希尔伯特曲线 / 跳过 2-opt）
+NN_MAX_POINTS = 4000
+TWO_OPT_MAX_POINTS = 1000
+TWO_OPT_MAX_PASSES = 8
+TWO_OPT_MATRIX_MAX_POINTS = 200
+
+# 总点数超过该值时才启用进程池（进程启动本身有几百毫秒开销）
+PARALLEL_MIN_POINTS = 20000
+
+# nn_2opt 整次优化（所有颜色分组合计）的时间预算（秒）：最近邻和 2-opt 都是 O(n²)，
+# 超时后剩下的分组直接用希尔伯特曲线，2-opt 做到一半也停下，保证规划总耗时在一秒以内
+NN_TIME_BUDGET = 0.3
+
+
+def item_points(items):
+    """把像素 (row, col)、笔刷印章 (row, col, size) 或笔画 (start_row, start_col, end_row, end_col) 转为坐标数组
+
+    笔画取中点作为代表位置，印章取锚点
+    """
+    if len(items) == 0:
+        return np.zeros((0, 2), dtype=np.float64)
+
+    arr = np.asarray(items, dtype=np.float64)
+    if arr.shape[1] == 4:
+        return (arr[:, 0:2] + arr[:, 2:4]) / 2
+    return arr[:, 0:2]
+
+
+def path_length(points):
+    """按顺序经过所有点的折线总长度（单位：格）"""
+    if len(points) < 2:
+        return 0.0
+    return float(np.sqrt((np.diff(points, axis=0) ** 2).sum(axis=1)).sum())
+
+
+def serpentine_order(points):
+    """蛇形顺序：逐行扫描，相邻两行方向相反"""
+    rows = points[:, 0]
+    cols = points[:, 1]
+    _, row_rank = np.unique(rows, return_inverse=True)
+    col_key = np.where(row_rank % 2 == 1, -cols, cols)
+    return np.lexsort((col_key, rows))
+
+
+def hilbert_order(points):
+    """希尔伯特曲线顺序：空间上相邻的点在序列中也相邻"""
+    rows = points[:, 0].astype(np.int64)
+    cols = points[:, 1].astype(np.int64)
+
+    side = int(max(rows.max(), cols.max())) + 1
+    n = 1
+    while n < side:
+        n *= 2
+
+    x = cols.copy()
+    y = rows.copy()
+    d = np.zeros(len(points), dtype=np.int64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+
+        # 旋转象限
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s //= 2
+
+    return np.argsort(d, kind="stable")
+
+
+def nearest_neighbor_order(points, start=0, deadline=None):
+    """最近邻贪心：每次走向最近的未访问点（到 deadline 时剩下的点按希尔伯特曲线顺序接在后面）"""
+    n = len(points)
+    visited = np.zeros(n, dtype=bool)
+    order = np.empty(n, dtype=np.int64)
+
+    current = start
+    for step in range(n):
+        if step % 256 == 255 and _out_of_time(deadline):
+            rest = np.flatnonzero(~visited)
+            order[step:] = rest[hilbert_order(points[rest])]
+            break
+        order[step] = current
+        visited[current] = True
+        if step == n - 1:
+            break
+        dist = ((points - points[current]) ** 2).sum(axis=1)
+        dist[visited] = np.inf
+        current = int(np.argmin(dist))
+
+    return order
+
+
+def two_opt(points, order, max_passes=TWO_OPT_MAX_PASSES, deadline=None):
+    """2-opt 局部优化（开放路径，起点固定）
+
+    点数较少时一次算出所有 (i, j) 的收益矩阵，每轮取全局最优；
+    点数较多时逐个 i 扫描，向量化计算所有 j 的收益。
+    到 deadline（time.time() 时刻）时停止，返回已改进到的顺序
+    """
+    if len(order) <= TWO_OPT_MATRIX_MAX_POINTS:
+        return _two_opt_matrix(points, order, deadline)
+    return _two_opt_sweep(points, order, max_passes, deadline)
+
+
+def _out_of_time(deadline):
+    return deadline is not None and time.time() >= deadline
+
+
+def _two_opt_matrix(points, order, deadline=None):
+    """2-opt：基于距离矩阵的全局最优改进"""
+    order = np.array(order)
+    n = len(order)
+
+    diff = points[:, None, :] - points[None, :, :]
+    dist = np.sqrt((diff ** 2).sum(axis=2))
+    inner_mask = np.triu(np.ones((n - 1, n - 1), dtype=bool), k=2)
+
+    for _ in range(10 * n):
+        if _out_of_time(deadline):
+            break
+        path_dist = dist[np.ix_(order, order)]
+        edge = np.diagonal(path_dist, 1)   # edge[i] = 第 i 段长度
+
+        # 反转 order[i+1..j] 的收益；j 为最后一个点时没有后继边
+        delta = np.empty((n - 1, n))
+        inner = path_dist[:-1, :-1] + path_dist[1:, 1:] - edge[:, None] - edge[None, :]
+        delta[:, :-1] = np.where(inner_mask, inner, np.inf)
+        delta[:, -1] = path_dist[:-1, -1] - edge
+        delta[n - 2:, -1] = np.inf
+
+        i, j = divmod(int(np.argmin(delta)), n)
+        if delta[i, j] >= -1e-9:
+            break
+        order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+
+    return order
+
+
+def _two_opt_sweep(points, order, max_passes, deadline=None):
+    """2-opt：逐个 i 扫描"""
+    order = np.array(order)
+    path = points[order]
+    n = len(order)
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 2):
+            if i % 64 == 0 and _out_of_time(deadline):
+                return order
+            a = path[i]
+            b = path[i + 1]
+            c = path[i + 2:]           # 候选 j = i+2 .. n-1
+            d = path[i + 3:]           # j+1（最后一个 j 没有后继）
+
+            old = np.hypot(*(a - b))
+            new = np.hypot(*(a - c).T)
+            if len(d):
+                old = old + np.append(np.hypot(*(c[:-1] - d).T), 0.0)
+                new = new + np.append(np.hypot(*(b - d).T), 0.0)
+
+            delta = new - old
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = i + 2 + k
+                order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+                path[i + 1:j + 1] = path[i + 1:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+
+    return order
+
+
+def optimize_order(points, method="serpentine", deadline=None):
+    """返回重新排列后的下标顺序
+
+    Args:
+        points: (N, 2) 坐标数组
+        method: "serpentine" / "nn_2opt" / "hilbert"
+        deadline: nn_2opt 的截止时刻（time.time()），过了之后改用希尔伯特曲线，None 表示不限时
+    """
+    if method not in ROUTE_METHODS:
+        raise ValueError(f"未知的路径优化方式: {method}")
+
+    if len(points) < 3:
+        return np.arange(len(points))
+
+    if method == "serpentine":
+        return serpentine_order(points)
+    if method == "hilbert" or len(points) > NN_MAX_POINTS or _out_of_time(deadline):
+        return hilbert_order(points)
+
+    # 从最左上的点出发
+    start = int(np.lexsort((points[:, 1], points[:, 0]))[0])
+    order = nearest_neighbor_order(points, start, deadline)
+    if len(points) <= TWO_OPT_MAX_POINTS:
+        order = two_opt(points, order, deadline=deadline)
+    return order
+
+
+def _optimize_group(task):
+    """进程池任务：优化单个颜色分组，返回 (排序后的元素, 优化前距离, 优化后距离)"""
+    items, method, deadline = task
+    points = item_points(items)
+    before = path_length(points)
+    order = optimize_order(points, method, deadline)
+    after = path_length(points[order])
+    if isinstance(items, np.ndarray):
+        return items[order], before, after
+    return [items[i] for i in order], before, after
+
+
+def optimize_routes(color_groups, method="serpentine", workers=None, time_budget=NN_TIME_BUDGET):
+    """对每个颜色分组重新排序
+
+    nn_2opt 在 time_budget 秒内尽量对前面的分组做最近邻 + 2-opt，超时后其余分组用希尔伯特曲线，
+    路径比不限时略长；hilbert 和 serpentine 本身就是向量化的，不受预算影响。
+
+    Args:
+        color_groups: {color: [(row, col), ...] 或 [(r0, c0, r1, c1), ...]}，也可以是对应的 (N, 2) / (N, 4) 数组
+        method: 排序方式，见 ROUTE_METHODS
+        workers: 进程数，None 表示自动（点数较少或只有一个 CPU 时不启用进程池）
+        time_budget: nn_2opt 的总时间预算（秒），None 表示不限时（上千个分组时要好几秒）
+
+    Returns:
+        (新的 color_groups（保持颜色顺序）, {"before": 优化前总距离, "after": 优化后总距离})
+    """
+    if method not in ROUTE_METHODS:
+        raise ValueError(f"未知的路径优化方式: {method}")
+
+    deadline = time.time() + time_budget if time_budget is not None else None
+    colors = list(color_groups.keys())
+    tasks = [(color_groups[color], method, deadline) for color in colors]
+    total_points = sum(len(task[0]) for task in tasks)
+
+    workers = workers or os.cpu_count() or 1
+    use_pool = (method == "nn_2opt" and total_points >= PARALLEL_MIN_POINTS
+                and workers > 1 and len(tasks) > 1)
+
+    results = None
+    if use_pool:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                results = list(executor.map(_optimize_group, tasks, chunksize=chunksize))
+        except Exception as e:
+            print(f"⚠️ 进程池不可用，改为单进程优化: {e}")
+            results = None
+
+    if results is None:
+        results = [_optimize_group(task) for task in tasks]
+
+    optimized = {}
+    stats = {"before": 0.0, "after": 0.0}
+    for color, (items, before, after) in zip(colors, results):
+        optimized[color] = items
+        stats["before"] += before
+        stats["after"] += after
+
+    return optimized, stats
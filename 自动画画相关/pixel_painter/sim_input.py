@@ -0,0 +1,303 @@
+"""
+模拟输入模块 - 不需要游戏和 Windows，把鼠标事件记到内存里的虚拟画板上
+
+用于在 Linux 上端到端运行 PixelPainter 并测量吞吐量：
+    canvas = VirtualCanvas(painter, width, height)
+    sim = SimulatedInput(canvas, latency=0.002, drop_rate=0.01)
+    painter.input = sim
+    painter.paint_from_json(json_data)
+    print(sim.stats())
+时间用虚拟时钟计算（sleep 和事件延迟只推进时钟，不真正等待）。
+"""
+import math
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from brush_planner import brush_origin
+from input_backend import InputBackend
+from pixel_grid import PixelGrid
+
+# 画板初始颜色（与绘制时跳过的背景色一致）
+BACKGROUND_COLOR = "#F9F6E9"
+
+
+class VirtualCanvas:
+    """虚拟游戏画面：画板网格、调色板分类页、左右翻页按钮和色块
+
+    布局取自 PixelPainter 的校准数据（grid_start/grid_end、color_left_btn/color_right_btn、
+    color_positions、brush_buttons、pen_tool_btn/fill_tool_btn），点击按钮和色块时按游戏规则切换分类、
+    选中颜色、切换笔刷和工具，点击画板时按当前笔刷给格子上色，或用油漆桶填充同色连通区域（4 邻接）。
+    """
+
+    def __init__(self, painter, width, height, hit_radius=6, background=BACKGROUND_COLOR):
+        """
+        Args:
+            painter: 已校准的 PixelPainter
+            width, height: 画板格子数（与要绘制的图片一致）
+            hit_radius: 按钮和色块的点击判定半径（像素）
+            background: 画板初始颜色
+        """
+        self.grid_start = tuple(painter.grid_start)
+        self.grid_end = tuple(painter.grid_end)
+        self.left_btn = tuple(painter.color_left_btn)
+        self.right_btn = tuple(painter.color_right_btn)
+        self.swatches = [tuple(p) for p in painter.color_positions]
+        self.brush_buttons = {size: tuple(p) for size, p in painter.brush_buttons.items()}
+        self.pen_tool_btn = tuple(painter.pen_tool_btn) if painter.pen_tool_btn else None
+        self.fill_tool_btn = tuple(painter.fill_tool_btn) if painter.fill_tool_btn else None
+        self.palette = painter.color_mapper.color_palette
+        self.hex_to_rgb = painter.color_mapper.hex_to_rgb
+        self.width = width
+        self.height = height
+        self.hit_radius = hit_radius
+
+        self.background = np.array(self.hex_to_rgb(background), dtype=np.uint8)
+        self.cells = np.empty((height, width, 3), dtype=np.uint8)
+        self.cells[:] = self.background
+
+        self.category = 1      # 当前显示的调色板分类（与 PixelPainter 初始值一致）
+        self.selected = None   # 当前选中颜色的 RGB
+        self.brush_size = 1    # 当前笔刷尺寸（与 PixelPainter 初始值一致）
+        self.tool = "pen"      # 当前工具 "pen" / "fill"
+
+        # 统计
+        self.cells_painted = 0
+        self.category_switches = 0
+        self.color_selections = 0
+
+    def _cell_at(self, x, y):
+        """屏幕坐标所在的格子 (row, col)，不在画板内返回 None"""
+        left, top = self.grid_start
+        right, bottom = self.grid_end
+        if not (left <= x < right and top <= y < bottom):
+            return None
+        col = int((x - left) * self.width // (right - left))
+        row = int((y - top) * self.height // (bottom - top))
+        return row, col
+
+    def _hit(self, x, y, target):
+        return abs(x - target[0]) <= self.hit_radius and abs(y - target[1]) <= self.hit_radius
+
+    def press(self, x, y):
+        """鼠标在 (x, y) 按下（或按住拖动经过）"""
+        cell = self._cell_at(x, y)
+        if cell is not None:
+            if self.selected is not None and self.tool == "fill":
+                self._flood_fill(cell)
+            elif self.selected is not None:
+                origin = brush_origin(self.brush_size)
+                top, left = max(0, cell[0] - origin), max(0, cell[1] - origin)
+                bottom = min(self.height, cell[0] - origin + self.brush_size)
+                right = min(self.width, cell[1] - origin + self.brush_size)
+                self.cells[top:bottom, left:right] = self.selected
+                self.cells_painted += (bottom - top) * (right - left)
+            return
+
+        if self._hit(x, y, self.left_btn):
+            if self.category > 1:
+                self.category -= 1
+                self.category_switches += 1
+            return
+        if self._hit(x, y, self.right_btn):
+            if self.category < len(self.palette):
+                self.category += 1
+                self.category_switches += 1
+            return
+
+        if self.pen_tool_btn and self._hit(x, y, self.pen_tool_btn):
+            self.tool = "pen"
+            return
+        if self.fill_tool_btn and self._hit(x, y, self.fill_tool_btn):
+            self.tool = "fill"
+            return
+
+        for size, button in self.brush_buttons.items():
+            if self._hit(x, y, button):
+                self.brush_size = size
+                return
+
+        colors = self.palette.get(self.category, [])
+        for index, swatch in enumerate(self.swatches):
+            if self._hit(x, y, swatch):
+                if index < len(colors):
+                    self.selected = np.array(self.hex_to_rgb(colors[index]), dtype=np.uint8)
+                    self.color_selections += 1
+                return
+
+    def _flood_fill(self, cell):
+        """把 cell 所在的同色连通区域（4 邻接）换成当前颜色"""
+        target = self.cells[cell].copy()
+        if np.array_equal(target, self.selected):
+            return
+        same = np.all(self.cells == target, axis=2)
+        same[cell] = False
+        self.cells[cell] = self.selected
+        filled = 1
+        queue = deque([cell])
+        while queue:
+            row, col = queue.popleft()
+            for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= r < self.height and 0 <= c < self.width and same[r, c]:
+                    same[r, c] = False
+                    self.cells[r, c] = self.selected
+                    filled += 1
+                    queue.append((r, c))
+        self.cells_painted += filled
+
+    def render(self, left, top, right, bottom):
+        """渲染屏幕矩形区域（右下不含），画板外为白色，返回 (H, W, 3) 的 uint8 数组"""
+        xs = np.arange(left, right)
+        ys = np.arange(top, bottom)
+        grid_left, grid_top = self.grid_start
+        grid_right, grid_bottom = self.grid_end
+
+        cols = (xs - grid_left) * self.width // (grid_right - grid_left)
+        rows = (ys - grid_top) * self.height // (grid_bottom - grid_top)
+        col_inside = (xs >= grid_left) & (xs < grid_right)
+        row_inside = (ys >= grid_top) & (ys < grid_bottom)
+
+        image = self.cells[np.clip(rows, 0, self.height - 1)[:, None],
+                           np.clip(cols, 0, self.width - 1)[None, :]]
+        image[~(row_inside[:, None] & col_inside[None, :])] = 255
+        return image
+
+    def to_pixels(self):
+        """当前画板内容，格式同 JSON 的 pixels（十六进制颜色二维列表）"""
+        return [[f"#{r:02X}{g:02X}{b:02X}" for r, g, b in row] for row in self.cells.tolist()]
+
+    def to_grid(self):
+        """当前画板内容的 PixelGrid"""
+        cells = self.cells.astype(np.int64)
+        return PixelGrid.from_values((cells[..., 0] << 16) | (cells[..., 1] << 8) | cells[..., 2])
+
+
+class SimulatedInput(InputBackend):
+    """模拟输入后端
+
+    每个事件（移动+按下、拖动中的移动）在虚拟时钟上花费 latency 秒，另外按
+    press_duration / click_interval / 移动间隔推进时钟。事件以 drop_rate 的概率被游戏漏掉；
+    与上一个被接受的事件间隔小于 min_event_interval 时也会被漏掉（模拟游戏每帧只处理有限输入），
+    这样自动调速可以在模拟器上闭环运行。
+    """
+
+    def __init__(self, canvas, latency=0.0, drop_rate=0.0, min_event_interval=0.0,
+                 window_rect=(0, 0, 1920, 1080), seed=0):
+        """
+        Args:
+            canvas: VirtualCanvas
+            latency: 每个事件的注入延迟（秒）
+            drop_rate: 事件被随机漏掉的概率
+            min_event_interval: 游戏能处理的最小事件间隔（秒），更快的事件被漏掉
+            window_rect: 模拟的游戏窗口位置
+            seed: 随机种子（保证基准测试可重复）
+        """
+        super().__init__()
+        self.canvas = canvas
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.min_event_interval = min_event_interval
+        self.window_rect = tuple(window_rect)
+        self.random = random.Random(seed)
+
+        self.clock = 0.0
+        self._last_accepted = None
+        self.cursor = (0, 0)
+        self.travel = 0.0              # 光标移动总距离（像素）
+        self.first_event_time = None   # 第一个事件的真实时间（perf_counter），用于测量计划耗时
+        self.events = 0
+        self.dropped = 0
+        self.clicks = 0
+        self.drags = 0
+        self.focus_count = 0
+
+    def sleep(self, seconds):
+        """推进虚拟时钟"""
+        if seconds > 0:
+            self.clock += seconds
+
+    def _event(self, x, y, press=True):
+        """注入一个事件：移动光标，按下时交给画板处理（可能被漏掉）"""
+        if self.first_event_time is None:
+            self.first_event_time = time.perf_counter()
+        self.clock += self.latency
+        self.travel += math.hypot(x - self.cursor[0], y - self.cursor[1])
+        self.cursor = (x, y)
+        self.events += 1
+        if not press:
+            return
+
+        too_fast = (self._last_accepted is not None and
+                    self.clock - self._last_accepted < self.min_event_interval)
+        if too_fast or (self.drop_rate > 0 and self.random.random() < self.drop_rate):
+            self.dropped += 1
+            return
+        self._last_accepted = self.clock
+        self.canvas.press(x, y)
+
+    def focus_window(self):
+        self.focus_count += 1
+
+    def ensure_focus(self, force=False):
+        if self.session_depth == 0:
+            self.focus_window()
+
+    def click(self, x, y):
+        self.ensure_focus()
+        self._event(x, y)
+        self.sleep(self.press_duration)
+        self.sleep(self.click_interval)
+        self.clicks += 1
+
+    def click_many(self, points, should_stop=None):
+        for done, (x, y) in enumerate(points):
+            if should_stop and should_stop():
+                return done
+            self.click(x, y)
+        return len(points)
+
+    def double_click(self, x, y):
+        self.click(x, y)
+        self.sleep(0.05)
+        self.click(x, y)
+
+    def drag(self, points, move_rate=200):
+        if not points:
+            return
+        self.ensure_focus()
+        move_interval = 1.0 / move_rate if move_rate > 0 else 0
+
+        x, y = points[0]
+        self._event(x, y)
+        self.sleep(self.press_duration)
+        for x, y in points[1:]:
+            self._event(x, y)
+            self.sleep(move_interval)
+        self.sleep(self.click_interval)
+        self.drags += 1
+
+    def move_mouse(self, x, y):
+        self._event(x, y, press=False)
+
+    def get_window_rect(self, hwnd):
+        return self.window_rect
+
+    def grab(self, left, top, right, bottom):
+        return self.canvas.render(left, top, right, bottom)
+
+    def stats(self):
+        """模拟统计"""
+        return {
+            "simulated_seconds": round(self.clock, 3),
+            "events": self.events,
+            "dropped_events": self.dropped,
+            "clicks": self.clicks,
+            "drags": self.drags,
+            "cursor_travel_px": round(self.travel),
+            "cells_painted": self.canvas.cells_painted,
+            "category_switches": self.canvas.category_switches,
+            "color_selections": self.canvas.color_selections,
+            "focus_count": self.focus_count
+        }
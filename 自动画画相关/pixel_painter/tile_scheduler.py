@@ -0,0 +1,215 @@
+"""
+分块调度 - 把大图切成画板大小的方块，按固定顺序逐块绘制并记录每块的完成情况
+
+大图不用再手动输入每一块的起始坐标：
+    scheduler = TileScheduler(json_data, tile_size=150)
+    scheduler.precompute(painter, paint_options)     # 后台线程池预先编译所有方块的计划
+    scheduler.paint_next(painter, progress_callback, **paint_options)  # 画下一块（可反复调用）
+
+方块就是 paint_from_json 的 region_info (start_row, start_col, tile_size)，右边和下边的方块按图片边界截掉。
+顺序固定为蛇形（一行从左到右、下一行从右到左，相邻两块总是挨着）或按行扫描。
+每块的计划都假定从调色板第 TILE_START_CATEGORY 个分类开始排序颜色，互不依赖，可以并行编译，
+绘制时按同样的起始分类从计划缓存直接取出。
+
+进度保存在 tile_progress.json：以图片内容和分块方式的哈希区分不同的图，
+每块为 "pending"（未画）/ "started"（画到一半，下次按绘制日志续画）/ "done"（已画完）。
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from brush_planner import normalize_brush_sizes
+from paint_plan import plan_key
+from pixel_grid import pixel_grid_of
+
+# 默认方块大小（与区域绘制的默认大小一致）
+TILE_SIZE = 150
+
+# 方块顺序
+TILE_ORDERS = ("serpentine", "rows")
+
+# 方块状态
+PENDING = "pending"
+STARTED = "started"
+DONE = "done"
+
+# 预编译时颜色排序的起始分类
+TILE_START_CATEGORY = 1
+
+# 影响计划内容的绘制选项（其余选项如 move_rate、autotune 只影响执行）
+PLAN_OPTIONS = ("stroke_mode", "stroke_direction", "route_method", "color_order",
+                "paint_background", "brush_sizes", "bucket_fill", "progressive")
+
+
+def split_tiles(height, width, tile_size=TILE_SIZE, order="serpentine"):
+    """把 height×width 的图切成方块
+
+    Returns:
+        [(start_row, start_col, tile_size), ...]，按绘制顺序排列
+    """
+    if tile_size <= 0:
+        raise ValueError(f"方块大小必须为正数: {tile_size}")
+    if order not in TILE_ORDERS:
+        raise ValueError(f"未知的方块顺序: {order}")
+
+    tiles = []
+    for tile_row, start_row in enumerate(range(0, height, tile_size)):
+        starts = list(range(0, width, tile_size))
+        if order == "serpentine" and tile_row % 2 == 1:
+            starts.reverse()
+        tiles.extend((start_row, start_col, tile_size) for start_col in starts)
+    return tiles
+
+
+class TileScheduler:
+    """大图分块绘制调度"""
+
+    def __init__(self, json_data, tile_size=TILE_SIZE, order="serpentine", state_file="tile_progress.json"):
+        """
+        Args:
+            json_data: 像素画数据（整张大图）
+            tile_size: 方块边长（格子数）
+            order: 方块顺序 "serpentine" / "rows"
+            state_file: 进度文件路径
+        """
+        self.json_data = json_data
+        self.tile_size = tile_size
+        self.order = order
+        self.state_file = state_file
+        self.tiles = split_tiles(json_data["height"], json_data["width"], tile_size, order)
+        self.image_key = plan_key(pixel_grid_of(json_data), {"tile_size": tile_size, "order": order})
+        self.states = [PENDING] * len(self.tiles)
+
+        self._executor = None
+        self._futures = {}
+        self._plan_options = None
+
+        self.load()
+
+    def load(self):
+        """读取进度文件（不是同一张图或同一种分块时忽略）"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取分块进度失败: {e}")
+            return
+        if state.get("image") == self.image_key and len(state.get("tiles", [])) == len(self.tiles):
+            self.states = list(state["tiles"])
+            print(f"✓ 已加载分块进度: {self.done_count}/{len(self.tiles)} 块已完成")
+
+    def save(self):
+        """保存进度（先写临时文件再替换，写到一半崩溃不会损坏旧进度）"""
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "image": self.image_key,
+                "tile_size": self.tile_size,
+                "order": self.order,
+                "tiles": self.states
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.state_file)
+
+    def reset(self):
+        """所有方块标记为未画"""
+        self.states = [PENDING] * len(self.tiles)
+        self.save()
+
+    @property
+    def done_count(self):
+        return sum(state == DONE for state in self.states)
+
+    def next_tile(self):
+        """下一个要画的方块序号（画到一半的优先），都画完时返回 None"""
+        for wanted in (STARTED, PENDING):
+            for index, state in enumerate(self.states):
+                if state == wanted:
+                    return index
+        return None
+
+    def describe(self, index):
+        start_row, start_col, _ = self.tiles[index]
+        return f"方块 {index + 1}/{len(self.tiles)} [{start_row}, {start_col}]"
+
+    def precompute(self, painter, paint_options=None, workers=None):
+        """后台预先编译所有未画方块的计划（放进 painter 的计划缓存），不等待完成
+
+        选项与上次相同时不重复提交。
+
+        Args:
+            painter: 已校准的 PixelPainter
+            paint_options: 之后调用 paint_next 时用的绘制选项
+            workers: 线程数，None 表示自动
+        """
+        if not painter.plan_cache:
+            print("⚠️ 计划缓存未启用，不预编译方块")
+            return
+
+        paint_options = dict(paint_options or {})
+        plan_options = {name: paint_options[name] for name in PLAN_OPTIONS if name in paint_options}
+
+        # 与 paint_from_json 相同的笔刷尺寸处理，保证缓存键一致
+        plan_options["brush_sizes"] = (None if plan_options.get("stroke_mode")
+                                       else normalize_brush_sizes(plan_options.get("brush_sizes")))
+        if plan_options == self._plan_options and self._futures:
+            return
+
+        self.shutdown()
+
+        # 坐标表和配色查找表在这里准备好，编译线程只读（画板未校准时在这里报错）
+        painter.get_coord_table(self.json_data["width"], self.json_data["height"])
+        painter.color_mapper.set_match_mode(paint_options.get("match_mode", "rgb"))
+        if painter.color_mapper.match_mode == "perceptual":
+            painter.color_mapper.lut
+
+        # 缓存至少能放下所有方块，否则先编译好的会在画到之前被淘汰
+        painter.plan_cache.max_entries = max(painter.plan_cache.max_entries, len(self.tiles) + 8)
+
+        self._plan_options = plan_options
+        self._executor = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1))
+        for index in range(len(self.tiles)):
+            if self.states[index] != DONE:
+                self._futures[index] = self._executor.submit(
+                    painter.compile_plan, self.json_data, region_info=self.tiles[index],
+                    start_category=TILE_START_CATEGORY, **plan_options)
+        print(f"后台预编译 {len(self._futures)} 个方块的计划")
+
+    def paint_next(self, painter, progress_callback=None, **paint_options):
+        """画下一个方块（等它的预编译完成），返回画的方块序号，都画完时返回 None
+
+        中途停止时方块保持 "started"，下次调用按绘制日志续画。
+        """
+        index = self.next_tile()
+        if index is None:
+            print("✓ 所有方块都已画完")
+            return None
+
+        future = self._futures.pop(index, None)
+        if future is not None:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ {self.describe(index)} 预编译失败，绘制时重新编译: {e}")
+
+        resume = self.states[index] == STARTED
+        self.states[index] = STARTED
+        self.save()
+
+        print(f"\n开始绘制 {self.describe(index)}{'（续画）' if resume else ''}")
+        painter.paint_from_json(self.json_data, progress_callback, region_info=self.tiles[index],
+                                start_category=TILE_START_CATEGORY, resume=resume, **paint_options)
+
+        if not painter.is_stopped:
+            self.states[index] = DONE
+            self.save()
+            print(f"✓ {self.describe(index)} 完成，共完成 {self.done_count}/{len(self.tiles)} 块")
+        return index
+
+    def shutdown(self):
+        """取消还没开始的预编译"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._futures = {}
@@ -1,27 +1,58 @@
 """
 Windows输入控制模块 - 处理鼠标和键盘操作
 """
-import win32gui
-import win32api
-import win32con
 import time
 import ctypes
 
-class WindowsInput:
+from input_backend import InputBackend
+from canvas_capture import grab_region
+
+try:
+    import win32gui
+    import win32api
+    import win32con
+except ImportError:
+    # 非 Windows 环境（如在 Linux 上用模拟后端跑基准测试），调用时才会报错
+    win32gui = win32api = win32con = None
+
+# ============ SendInput 结构体 ============
+INPUT_MOUSE = 0
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+# GetSystemMetrics: 虚拟屏幕（所有显示器）范围
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [("dx", ctypes.c_long),
+                ("dy", ctypes.c_long),
+                ("mouseData", ctypes.c_ulong),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", ctypes.c_size_t)]
+
+class _INPUTUNION(ctypes.Union):
+    # 只用到鼠标输入；MOUSEINPUT 是联合体中最大的成员，结构体大小与系统定义一致
+    _fields_ = [("mi", MOUSEINPUT)]
+
+class INPUT(ctypes.Structure):
+    _anonymous_ = ("u",)
+    _fields_ = [("type", ctypes.c_ulong),
+                ("u", _INPUTUNION)]
+
+class WindowsInput(InputBackend):
     def __init__(self):
-        self.target_hwnd = None
-        self.locked_hwnd = None # 添加锁定窗口
-    
-    def lock_window(self, hwnd):
-        """锁定目标窗口"""
-        self.locked_hwnd = hwnd
-        self.target_hwnd = hwnd
-        print(f"窗口已锁定: {hwnd}")
-    
-    def unlock_window(self):
-        """解锁窗口"""
-        self.locked_hwnd = None
-        print("窗口已解锁")
+        super().__init__()
+        
+        # SendInput 批量注入（失败时自动退回 SetCursorPos + mouse_event）
+        self.use_send_input = True
+        self.batch_size = 64        # 两个间隔都为 0 时，每次 SendInput 提交的点击数
     
     def focus_window(self):
         """将目标窗口置为前景窗口"""
@@ -34,11 +65,192 @@ class WindowsInput:
                 time.sleep(0.05)
             except:
                 pass
+    
+    def ensure_focus(self, force=False):
+        """确保目标窗口在前台
+        
+        会话外每次都聚焦；会话内每隔 focus_check_interval 次操作（或 force 时）
+        用 GetForegroundWindow 检查一次，只有真的失去焦点才重新聚焦
+        """
+        if self.session_depth == 0:
+            self.focus_window()
+            return
+        
+        self._events_since_check += 1
+        if not force and self._events_since_check < self.focus_check_interval:
+            return
+        self._events_since_check = 0
+        
+        hwnd = self.locked_hwnd if self.locked_hwnd else self.target_hwnd
+        if hwnd and win32gui.GetForegroundWindow() != hwnd:
+            print("⚠️ 目标窗口失去焦点，重新聚焦")
+            self.focus_window()
+    
+    # ============ SendInput 批量注入 ============
+    def _virtual_screen(self):
+        """虚拟屏幕范围 (left, top, width, height)，用于换算绝对坐标"""
+        return (win32api.GetSystemMetrics(SM_XVIRTUALSCREEN),
+                win32api.GetSystemMetrics(SM_YVIRTUALSCREEN),
+                win32api.GetSystemMetrics(SM_CXVIRTUALSCREEN),
+                win32api.GetSystemMetrics(SM_CYVIRTUALSCREEN))
+    
+    @staticmethod
+    def _mouse_input(flags, x=None, y=None, screen=None):
+        """构造一条鼠标 INPUT 记录；给出坐标时附带绝对移动"""
+        record = INPUT(type=INPUT_MOUSE)
+        if x is not None:
+            left, top, width, height = screen
+            # 绝对坐标归一化到 0..65535
+            record.mi.dx = round((x - left) * 65535 / max(1, width - 1))
+            record.mi.dy = round((y - top) * 65535 / max(1, height - 1))
+            flags |= MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+        record.mi.dwFlags = flags
+        return record
+    
+    @staticmethod
+    def _send(records):
+        """一次 SendInput 提交一组记录"""
+        count = len(records)
+        if count == 0:
+            return
+        array = (INPUT * count)(*records)
+        sent = ctypes.windll.user32.SendInput(count, array, ctypes.sizeof(INPUT))
+        if sent != count:
+            raise OSError(f"SendInput 只注入了 {sent}/{count} 条记录（可能被 UIPI 拦截）")
+    
+    def _send_click(self, x, y, screen):
+        """SendInput 单次点击：移动+按下，等待，松开"""
+        self._send([self._mouse_input(0, x, y, screen),
+                    self._mouse_input(MOUSEEVENTF_LEFTDOWN)])
+        time.sleep(self.press_duration)
+        self._send([self._mouse_input(MOUSEEVENTF_LEFTUP)])
+    
+    def _disable_send_input(self, error):
+        """SendInput 不可用时退回旧方式，并确保左键已松开"""
+        print(f"SendInput 失败，改用 mouse_event: {error}")
+        self.use_send_input = False
+        try:
+            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+        except:
+            pass
+    
+    def click_many(self, points, should_stop=None):
+        """批量点击
+        
+        按下时长和点击间隔都为 0 时，每 batch_size 次点击的全部记录
+        （移动、按下、松开）合并为一次 SendInput；否则每次点击一组记录并按间隔等待。
+        
+        Args:
+            points: 屏幕坐标列表 [(x, y), ...]
+            should_stop: 每批开始前调用，返回 True 时提前结束（用于暂停/停止）
+        
+        Returns:
+            已处理的点击数
+        """
+        if not self.use_send_input:
+            for done, (x, y) in enumerate(points):
+                if should_stop and should_stop():
+                    return done
+                self._legacy_click(x, y)
+            return len(points)
+        
+        merge = self.press_duration <= 0 and self.click_interval <= 0
+        step = self.batch_size if merge else 1
+        done = 0
+        
+        try:
+            screen = self._virtual_screen()
+            for start in range(0, len(points), step):
+                if should_stop and should_stop():
+                    return done
+                self.ensure_focus()
+                
+                chunk = points[start:start + step]
+                if merge:
+                    records = []
+                    for x, y in chunk:
+                        records.append(self._mouse_input(0, x, y, screen))
+                        records.append(self._mouse_input(MOUSEEVENTF_LEFTDOWN))
+                        records.append(self._mouse_input(MOUSEEVENTF_LEFTUP))
+                    self._send(records)
+                else:
+                    x, y = chunk[0]
+                    self._send_click(x, y, screen)
+                    time.sleep(self.click_interval)
+                done += len(chunk)
+        except Exception as e:
+            self._disable_send_input(e)
+            return done + self.click_many(points[done:], should_stop)
+        
+        return done
+    
     def click(self, x, y):
         """在指定坐标点击"""
+        if self.use_send_input:
+            self.click_many([(x, y)])
+        else:
+            self._legacy_click(x, y)
+
+    def double_click(self, x, y):
+        """在指定坐标双击"""
+        if self.use_send_input:
+            try:
+                self.ensure_focus()
+                screen = self._virtual_screen()
+                self._send_click(x, y, screen)
+                time.sleep(0.05)  # 两次点击之间的间隔
+                self._send_click(x, y, screen)
+                time.sleep(self.click_interval)
+                return
+            except Exception as e:
+                self._disable_send_input(e)
+        self._legacy_double_click(x, y)
+    
+    def drag(self, points, move_rate=200):
+        """按住左键沿路径依次移动后松开（连续笔画）
+
+        Args:
+            points: 屏幕坐标列表 [(x, y), ...]，第一个点为落笔位置
+            move_rate: 每秒移动次数，过快游戏可能漏掉中间的格子
+        """
+        if not points:
+            return
+
+        move_interval = 1.0 / move_rate if move_rate > 0 else 0
+
+        if self.use_send_input:
+            try:
+                self.ensure_focus()
+                screen = self._virtual_screen()
+                
+                # 落笔
+                x, y = points[0]
+                self._send([self._mouse_input(0, x, y, screen),
+                            self._mouse_input(MOUSEEVENTF_LEFTDOWN)])
+                time.sleep(self.press_duration)
+                
+                # 逐格移动；不限速时所有移动一次提交
+                if move_interval > 0:
+                    for x, y in points[1:]:
+                        self._send([self._mouse_input(0, x, y, screen)])
+                        time.sleep(move_interval)
+                else:
+                    self._send([self._mouse_input(0, x, y, screen) for x, y in points[1:]])
+                
+                # 松开
+                self._send([self._mouse_input(MOUSEEVENTF_LEFTUP)])
+                time.sleep(self.click_interval)
+                return
+            except Exception as e:
+                self._disable_send_input(e)
+        self._legacy_drag(points, move_interval)
+    
+    # ============ 旧方式：SetCursorPos + mouse_event ============
+    def _legacy_click(self, x, y):
+        """在指定坐标点击（SetCursorPos + mouse_event）"""
         try:
             # 确保目标窗口有焦点
-            self.focus_window()
+            self.ensure_focus()
             # time.sleep(0.05)
             
             # 移动鼠标
@@ -53,11 +265,11 @@ class WindowsInput:
         except Exception as e:
             print(f"点击失败: {e}")
 
-    def double_click(self, x, y):
-        """在指定坐标双击"""
+    def _legacy_double_click(self, x, y):
+        """在指定坐标双击（SetCursorPos + mouse_event）"""
         try:
             # 确保目标窗口有焦点
-            self.focus_window()
+            self.ensure_focus()
             
             # 移动鼠标
             win32api.SetCursorPos((x, y))
@@ -77,9 +289,46 @@ class WindowsInput:
         except Exception as e:
             print(f"双击失败: {e}")
     
+    def _legacy_drag(self, points, move_interval):
+        """按住左键沿路径移动后松开（SetCursorPos + mouse_event）"""
+        try:
+            # 确保目标窗口有焦点
+            self.ensure_focus()
+
+            # 移动到起点并按下
+            x, y = points[0]
+            win32api.SetCursorPos((x, y))
+            time.sleep(0.01)
+            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+            time.sleep(0.02)
+
+            # 逐格移动
+            for x, y in points[1:]:
+                win32api.SetCursorPos((x, y))
+                time.sleep(move_interval)
+
+            # 松开
+            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+            time.sleep(0.02)
+        except Exception as e:
+            # 出错时确保左键不会一直处于按下状态
+            try:
+                win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+            except:
+                pass
+            print(f"拖动失败: {e}")
+
     def move_mouse(self, x, y):
         """移动鼠标到指定位置"""
         win32api.SetCursorPos((x, y))
+    
+    def get_window_rect(self, hwnd):
+        """窗口位置 (left, top, right, bottom)"""
+        return win32gui.GetWindowRect(hwnd)
+    
+    def grab(self, left, top, right, bottom):
+        """截取屏幕矩形区域（右下不含），返回 (H, W, 3) 的 uint8 数组"""
+        return grab_region(left, top, right, bottom)
 
 # 全局实例
 win_input = WindowsInput()